@@ -1,10 +1,62 @@
+import os
+
+from pydantic import Field, field_validator, model_validator
 from pydantic_settings import BaseSettings
 
+# backend/, the anchor for relative paths so they do not depend on the working directory
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 class Settings(BaseSettings):
     app_name: str = "Liberty OS"
     version: str = "0.1.0"
     debug: bool = True
     pod_id: str = "default-pod"
+    model_dir: str = "models"
+    model_seed: int = 42
+    optimizer_budget: int = 200
+    optimizer_population: int = 50
+    prediction_cache_size: int = 4096
+    prediction_cache_ttl: float = 30.0
+    workflow_change_log_size: int = 1000
+    data_dir: str = "data"  # Relative to backend/; relative data paths below are resolved against it
+    workflow_db_path: str = "workflow.db"  # Empty disables persistence
+    workflow_snapshot_interval: int = 200
+    spc_subgroup_size: int = Field(5, ge=2, le=10)  # Sizes with X-bar/R chart constants
+    anomaly_window_size: int = 5000
+    anomaly_refit_every: int = 1000
+    telemetry_buffer_size: int = 600_000  # Samples per channel, 10 min at 1 kHz
+    telemetry_memory_mb: int = 512  # Budget for all telemetry buffers; sets how many channels can be created
+    inference_workers: int = 2
+    inference_max_batch: int = 256
+    inference_max_wait_ms: float = 5.0
+    inference_watch_interval: float = 5.0  # Seconds between checks of the registry's ACTIVE file; 0 disables
+    toolpath_cache_size: int = 256
+    pareto_population: int = 2048
+    pareto_cache_size: int = 64
+    timeseries_dir: str = "timeseries"  # Empty disables metrics history
+    event_loop_lag_interval: float = 0.25  # Seconds between lag probes, 0 disables
+    profile_max_seconds: float = 60.0
+    profile_token: str = ""  # Bearer token for /admin/profile; empty disables the endpoint
+    warmup: str = "background"  # background, blocking or off: when models are fitted relative to startup
+    quality_lut: bool = False  # Answer trained-model quality predictions from an interpolated lookup table
+    quality_lut_points: int = 33  # Grid points per axis of the first attempt
+    quality_lut_max_points: int = 65
+    quality_lut_max_error: float = 2.0  # Quality points, at quality_lut_error_quantile
+    quality_lut_error_quantile: float = 99.0
+    quality_lut_mmap: bool = True
+
+    @field_validator("model_dir", "data_dir")
+    @classmethod
+    def _resolve_path(cls, value: str) -> str:
+        return os.path.join(BACKEND_DIR, value) if value else value
+
+    @model_validator(mode="after")
+    def _resolve_data_paths(self) -> "Settings":
+        for name in ("workflow_db_path", "timeseries_dir"):
+            value = getattr(self, name)
+            if value:
+                setattr(self, name, os.path.join(self.data_dir, value))
+        return self
 
     class Config:
         env_file = ".env"
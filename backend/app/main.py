@@ -1,14 +1,42 @@
 # backend/app/main.py
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Dict, List, Optional
+from contextlib import aclosing
+import asyncio
+import json
+import logging
+import secrets
+import time
 import numpy as np
 from datetime import datetime
 
+from .models.workflow import StageStatus
 from .services.enhanced_ml_service import EnhancedManufacturingMLService
+from .services.inference_executor import InferenceExecutor
+from .services.ml_service import ManufacturingMLService
 from .services.workflow_service import WorkflowService
+from .services.workflow_manager import WorkflowManager
+from .services.workflow_store import StoreLockedError, WorkflowEventStore
+from .services.measurement_ingest import parse_measurement_stream
+from .services.spc_service import SPCService
+from .services.telemetry_service import TelemetryService
+from .services.timeseries_store import TimeSeriesStore, series_name
+from .services.toolpath_service import ToolPathService
+from .services.stock_removal import simulate_stock_removal
+from .config.settings import settings
+from .services.simulation_service import MachiningSimulationService
+from .utils.metrics import (
+    PROMETHEUS_CONTENT_TYPE, EventLoopLagMonitor, MetricsMiddleware, metrics, timed, timer
+)
+from .utils.profiler import ProfilerBusyError, SamplingProfiler
+from .utils.responses import negotiated_response
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Liberty OS")
 
@@ -19,11 +47,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Roughing-Points", "X-Finishing-Points"],
 )
+app.add_middleware(MetricsMiddleware)
 
-# Initialize services
-workflow_service = WorkflowService()
+# Initialize services; the workflow and history stores are opened at startup (see open_workflow_store)
+spc_service = SPCService(subgroup_size=settings.spc_subgroup_size)
+history_store = TimeSeriesStore(settings.timeseries_dir) if settings.timeseries_dir else None
+workflow_manager = WorkflowManager(spc=spc_service, history=history_store)
+telemetry_service = TelemetryService(
+    capacity_per_channel=settings.telemetry_buffer_size, memory_budget_mb=settings.telemetry_memory_mb
+)
 ml_service = EnhancedManufacturingMLService()
+simulation_service = MachiningSimulationService(ml_service)
+inference_executor = InferenceExecutor()
+toolpath_service = ToolPathService(cache_size=settings.toolpath_cache_size)
+loop_monitor = EventLoopLagMonitor(interval=settings.event_loop_lag_interval)
+profiler = SamplingProfiler(max_duration=settings.profile_max_seconds)
+
+# Service counters exported on /metrics at scrape time
+metrics.register_stats("prediction_cache", ml_service.cache.stats, counters=("hits", "misses", "evictions", "expirations"))
+metrics.register_stats("toolpath_cache", toolpath_service.stats, counters=("hits", "misses"))
+metrics.register_stats("anomaly_engine", ml_service.anomaly_engine.stats, counters=("fits", "samples_scored", "score_calls"))
+metrics.register_stats("inference", inference_executor.stats, counters=(
+    "swaps", "quality_batching_requests", "quality_batching_batches", "quality_batching_rows",
+    "shadow_batches", "shadow_rows", "shadow_errors"
+))
 
 # Base models
 class MachiningParameters(BaseModel):
@@ -32,6 +81,20 @@ class MachiningParameters(BaseModel):
     depth_of_cut: float
     tool_type: str
 
+class ToolPathParameters(MachiningParameters):
+    tool_diameter: float = Field(..., gt=0, lt=6)
+
+class StockRemovalRequest(BaseModel):
+    tool_diameter: float = Field(..., gt=0)
+    points: Optional[List[List[float]]] = None  # Tool tip path as [x, y, z] triples
+    feed_rate: Optional[float] = Field(None, gt=0)  # Without points, sweep the digital twin's tool path
+    lod: int = Field(0, ge=0, le=3)
+    bounds: List[float] = Field([-4.0, 4.0, -4.0, 4.0], min_length=4, max_length=4)  # x_min, x_max, y_min, y_max
+    z_bottom: float = 0.0
+    z_top: float = 6.0
+    cell_size: float = Field(0.05, gt=0)
+    map_size: int = Field(128, ge=0, le=1024)
+
 class ProcessSimulation(BaseModel):
     operation_time: float
     quality_metrics: Dict
@@ -41,6 +104,44 @@ class ProcessSimulation(BaseModel):
     optimization_suggestions: Optional[Dict] = None
     anomaly_detection: Optional[Dict] = None
 
+class ProcessSimulationBatch(BaseModel):
+    count: int
+    operation_time: List[float]
+    quality_metrics: Dict
+    maintenance_metrics: Dict
+    energy_consumption: List[float]
+    tool_wear: List[float]
+    optimization_suggestions: Dict
+    anomaly_detection: Dict
+
+class MonteCarloRequest(MachiningParameters):
+    samples: int = Field(10_000, ge=1, le=1_000_000)
+    seed: Optional[int] = Field(None, ge=0)
+    percentiles: List[float] = Field([5, 50, 90, 95, 99], min_length=1, max_length=20)
+    bins: int = Field(30, ge=1, le=200)
+
+class SweepAxis(BaseModel):
+    min: float
+    max: float
+    steps: int = Field(..., ge=1, le=1000)
+
+class ParameterSweepRequest(BaseModel):
+    cutting_speed: SweepAxis
+    feed_rate: SweepAxis
+    depth_of_cut: SweepAxis
+    tool_type: str = "carbide"
+
+class TelemetrySamples(BaseModel):
+    cutting_speed: List[float]
+    feed_rate: List[float]
+    depth_of_cut: List[float]
+
+class TelemetryIngest(BaseModel):
+    channels: Dict[str, List[float]]
+    timestamps: Optional[List[float]] = None
+    start_time: Optional[float] = None
+    sample_rate_hz: Optional[float] = Field(None, gt=0)
+
 class ProgressUpdate(BaseModel):
     progress: float
     metrics: Optional[Dict] = None
@@ -50,25 +151,122 @@ class QualityGateUpdate(BaseModel):
     gate_name: str
     measurements: Dict
 
+class SPCMeasurement(BaseModel):
+    feature: str
+    value: float
+    nominal: Optional[float] = None
+    upper_tolerance: Optional[float] = None
+    lower_tolerance: Optional[float] = None
+    tool_type: Optional[str] = None
+    stage: Optional[str] = None
+
+class WorkflowInstanceCreate(BaseModel):
+    part_id: str
+    pod_id: Optional[str] = None
+
+def get_workflow(part_id: Optional[str] = None, pod_id: Optional[str] = None) -> WorkflowService:
+    """Resolve the workflow instance for a part, defaulting to this pod's default part"""
+    workflow = workflow_manager.get(part_id, pod_id)
+    if workflow is None:
+        raise HTTPException(status_code=404, detail="Workflow instance not found")
+    return workflow
+
+def versioned_response(request: Request, body: bytes, etag: str) -> Response:
+    """Serve pre-serialized JSON with a version ETag, answering 304 when the client is current"""
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
+
 # Workflow endpoints
+@app.get("/workflow/instances")
+async def list_workflow_instances():
+    """List all workflow instances on this pod"""
+    return workflow_manager.list_instances()
+
+@app.post("/workflow/instances")
+async def create_workflow_instance(instance: WorkflowInstanceCreate):
+    """Start tracking a workflow for a part"""
+    workflow = workflow_manager.get_or_create(instance.part_id, instance.pod_id)
+    return {"pod_id": workflow.pod_id, "part_id": workflow.part_id, "version": workflow.version}
+
+@app.delete("/workflow/instances/{part_id}")
+async def delete_workflow_instance(part_id: str, pod_id: Optional[str] = None):
+    """Stop tracking a part's workflow"""
+    if not workflow_manager.remove(part_id, pod_id):
+        raise HTTPException(status_code=404, detail="Workflow instance not found")
+    return {"success": True}
+
 @app.get("/workflow/stages")
-async def get_workflow_stages():
-    """Get all workflow stages and their status"""
-    return workflow_service.get_all_stages()
+async def get_workflow_stages(
+    request: Request,
+    since: Optional[str] = None,
+    workflow_service: WorkflowService = Depends(get_workflow)
+):
+    """Get all workflow stages and their status, or only the changes after a known ``epoch-version`` (or ETag)"""
+    if since is not None:
+        version = workflow_service.version_from_event_id(since)
+        changes = workflow_service.get_changes_since(version) if version is not None else None
+        if changes is None:
+            # Another epoch, or the change log no longer reaches back that far; send everything
+            return {
+                "epoch": workflow_service.epoch,
+                "version": workflow_service.version,
+                "reset": True,
+                **workflow_service.get_snapshot()
+            }
+        return {"epoch": workflow_service.epoch, "version": workflow_service.version, "reset": False, "changes": changes}
+    return versioned_response(request, workflow_service.get_serialized_stages(), workflow_service.etag)
 
 @app.get("/workflow/current")
-async def get_current_stage():
+async def get_current_stage(request: Request, workflow_service: WorkflowService = Depends(get_workflow)):
     """Get the currently active workflow stage"""
-    return workflow_service.get_current_stage()
+    return versioned_response(request, workflow_service.get_serialized_current_stage(), workflow_service.etag)
+
+@app.get("/workflow/stream")
+async def stream_workflow_changes(
+    request: Request,
+    since: Optional[str] = None,
+    workflow_service: WorkflowService = Depends(get_workflow)
+):
+    """Stream workflow changes as server-sent events, delta-encoded from the client's last ``epoch-version``"""
+    # An id from before a restart names no version here and gets a snapshot
+    last_event_id = since or request.headers.get("last-event-id")
+    version = workflow_service.version_from_event_id(last_event_id) if last_event_id else None
+
+    async def event_source():
+        async with aclosing(workflow_manager.events(workflow_service).stream(version)) as changes:
+            async for change in changes:
+                if await request.is_disconnected():
+                    break
+                if change is None:
+                    yield ": keepalive\n\n"
+                    continue
+                event_id = workflow_service.event_id(change["version"])
+                yield f"id: {event_id}\nevent: {change['type']}\ndata: {json.dumps(change)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.put("/workflow/stage/progress")
-async def update_stage_progress(update: ProgressUpdate):
+async def update_stage_progress(update: ProgressUpdate, workflow_service: WorkflowService = Depends(get_workflow)):
     """Update the progress of the current stage"""
     workflow_service.update_stage_progress(update.progress, update.metrics)
-    return workflow_service.get_all_stages()
+    return Response(
+        content=workflow_service.get_serialized_stages(),
+        media_type="application/json",
+        headers={"ETag": workflow_service.etag}
+    )
 
 @app.post("/workflow/quality-gate")
-async def update_quality_gate(update: QualityGateUpdate):
+async def update_quality_gate(update: QualityGateUpdate, workflow_service: WorkflowService = Depends(get_workflow)):
     """Update a quality gate with measurements"""
     success = workflow_service.update_quality_gate(
         update.stage_id,
@@ -80,15 +278,151 @@ async def update_quality_gate(update: QualityGateUpdate):
         "stages": workflow_service.get_all_stages()
     }
 
+@app.post("/workflow/stage/{stage_id}/gate/{gate_name}/measurements")
+async def ingest_gate_measurements(
+    stage_id: str,
+    gate_name: str,
+    request: Request,
+    tool_type: Optional[str] = None,
+    workflow_service: WorkflowService = Depends(get_workflow)
+):
+    """Stream a CMM run (NDJSON, or CSV with a header row) into a quality gate.
+
+    Rows may name their measurement ``type`` (dimensional by default); the
+    batch must cover every measurement the gate requires.
+    """
+    stage = workflow_service.get_stage(stage_id)
+    if stage is None:
+        raise HTTPException(status_code=404, detail="Stage not found")
+    # Checked before reading the upload; apply_measurement_batch re-checks under the workflow lock
+    gate = workflow_service.get_gate(stage_id, gate_name)
+    if gate is None:
+        raise HTTPException(status_code=404, detail="Quality gate not found")
+    if gate.status == StageStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail="Quality gate is already completed")
+
+    try:
+        batch = await parse_measurement_stream(request.stream(), request.headers.get("content-type"))
+        summary = batch.evaluate()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        success = workflow_service.apply_measurement_batch(stage_id, gate_name, summary)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if success is None:
+        # Completed by a concurrent upload while this one was being parsed
+        raise HTTPException(status_code=409, detail="Quality gate is already completed")
+    spc_service.record_batch(
+        batch.features,
+        batch.column("value"),
+        batch.column("nominal"),
+        batch.column("upper_tolerance"),
+        batch.column("lower_tolerance"),
+        tool_type,
+        stage.name
+    )
+    return {
+        "success": success,
+        "summary": summary
+    }
+
+# Machine telemetry
+@app.post("/telemetry/{machine_id}")
+async def ingest_telemetry(machine_id: str, batch: TelemetryIngest):
+    """Append high-rate telemetry samples for a machine"""
+    try:
+        count = telemetry_service.ingest(
+            machine_id, batch.channels, batch.timestamps, batch.start_time, batch.sample_rate_hz
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"ingested": count}
+
+@app.get("/telemetry/{machine_id}")
+async def list_telemetry_channels(machine_id: str):
+    """List a machine's telemetry channels with their latest samples"""
+    return telemetry_service.list_channels(machine_id)
+
+@app.get("/telemetry/{machine_id}/{channel}")
+async def query_telemetry(
+    request: Request,
+    machine_id: str,
+    channel: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    width: int = Query(800, ge=3, le=10000)
+):
+    """Get rollups and a series downsampled to the chart's pixel width"""
+    result = telemetry_service.query(machine_id, channel, start, end, width)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Telemetry channel not found")
+    return negotiated_response(request, result)
+
+# Metrics history
+@app.get("/history")
+async def list_history_series():
+    """List the recorded metric series"""
+    if history_store is None:
+        raise HTTPException(status_code=404, detail="Metrics history is disabled")
+    return history_store.list_series()
+
+@app.get("/history/{series}")
+async def query_history(
+    request: Request,
+    series: str,
+    start: float,
+    end: Optional[float] = None,
+    resolution: str = "auto",
+    max_points: int = Query(2000, ge=1, le=100_000)
+):
+    """Get a metric series over [start, end) from the raw data or a 1s/1m/1h rollup tier"""
+    if history_store is None:
+        raise HTTPException(status_code=404, detail="Metrics history is disabled")
+    try:
+        result = history_store.query(series, start, time.time() if end is None else end, resolution, max_points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return negotiated_response(request, result)
+
+# Statistical process control
+@app.post("/spc/measurements")
+async def record_spc_measurements(measurements: List[SPCMeasurement]):
+    """Feed measurements directly into the SPC accumulators"""
+    try:
+        # Checked up front so a bad entry does not leave the batch half recorded
+        for m in measurements:
+            spc_service.check_finite(m.feature, m.value, m.nominal, m.upper_tolerance, m.lower_tolerance)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    for m in measurements:
+        spc_service.record(m.feature, m.value, m.nominal, m.upper_tolerance, m.lower_tolerance, m.tool_type, m.stage)
+    return {"recorded": len(measurements)}
+
+@app.get("/spc/charts")
+async def list_spc_charts():
+    """Get SPC summaries for every tracked feature"""
+    return spc_service.list_charts()
+
+@app.get("/spc/chart")
+async def get_spc_chart(feature: str, tool_type: Optional[str] = None, stage: Optional[str] = None):
+    """Get control limits, capability and violations for one feature"""
+    chart = spc_service.get_chart(feature, tool_type, stage)
+    if chart is None:
+        raise HTTPException(status_code=404, detail="No SPC data for feature")
+    return chart
+
 @app.get("/workflow/stage/{stage_id}/metrics")
-async def get_stage_metrics(stage_id: str):
+async def get_stage_metrics(stage_id: str, workflow_service: WorkflowService = Depends(get_workflow)):
     """Get metrics for a specific stage"""
-    stage = next((s for s in workflow_service.stages if s.id == stage_id), None)
+    stage = workflow_service.get_stage(stage_id)
     if not stage:
         raise HTTPException(status_code=404, detail="Stage not found")
     return stage.metrics
 
 # Machining simulation and optimization
+@timed("simulation.simulate_machining_process")
 def simulate_machining_process(params: MachiningParameters) -> ProcessSimulation:
     """Simulate a CNC machining process with given parameters."""
     # Calculate basic metrics
@@ -118,71 +452,457 @@ def simulate_machining_process(params: MachiningParameters) -> ProcessSimulation
         100
     ))
 
-    return ProcessSimulation(
-        operation_time=round(operation_time, 2),
-        quality_metrics=quality_metrics,
-        maintenance_metrics=maintenance_metrics,
-        energy_consumption=round(energy_consumption, 2),
-        tool_wear=round(tool_wear, 2),
-        optimization_suggestions=optimization_data,
-        anomaly_detection=anomaly_data
-    )
+    with timer("pydantic.ProcessSimulation.validate"):
+        return ProcessSimulation(
+            operation_time=round(operation_time, 2),
+            quality_metrics=quality_metrics,
+            maintenance_metrics=maintenance_metrics,
+            energy_consumption=round(energy_consumption, 2),
+            tool_wear=round(tool_wear, 2),
+            optimization_suggestions=optimization_data,
+            anomaly_detection=anomaly_data
+        )
 
 # Application endpoints
+warmup_task: Optional[asyncio.Future] = None
+
+def warm_up():
+    """Import scikit-learn and fit the anomaly baseline ahead of the first request"""
+    with timer("startup.warm_up"):
+        ml_service.initialize_models()
+
+def open_workflow_store():
+    """Open the workflow log and recover persisted instances.
+
+    The first worker process to open the database owns it; other workers
+    keep their workflow state in memory only.
+    """
+    if not settings.workflow_db_path:
+        return
+    try:
+        store = WorkflowEventStore(settings.workflow_db_path, settings.workflow_snapshot_interval)
+    except StoreLockedError as e:
+        logger.warning("Workflow persistence disabled in this worker: %s", e)
+        return
+    workflow_manager.open_store(store)
+    metrics.register_stats("workflow_store", store.stats, counters=("write_errors",))
+
+def open_history_store():
+    """Claim the metrics history files.
+
+    The first worker process to claim them records history; other workers
+    serve queries from its files but do not record.
+    """
+    if history_store is None:
+        return
+    try:
+        history_store.claim()
+    except StoreLockedError as e:
+        logger.warning("Metrics history is read-only in this worker: %s", e)
+
+async def require_models():
+    """Await the model warm-up in its executor thread.
+
+    Handlers that call the ML service inline would otherwise fit the models,
+    or block on the fit's lock, on the event loop.
+    """
+    global warmup_task
+    if ml_service.initialized:
+        return
+    if warmup_task is None:
+        # With WARMUP=off the first request that needs the models starts the fit
+        warmup_task = asyncio.get_running_loop().run_in_executor(None, warm_up)
+    try:
+        await asyncio.shield(warmup_task)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Warm-up failed: {e}")
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize ML models on startup."""
-    ml_service.initialize_models()
+    """Open the workflow and history stores, start background services and warm up the ML models."""
+    global warmup_task
+    await run_in_threadpool(open_history_store)
+    await run_in_threadpool(open_workflow_store)
+    if settings.warmup == "blocking":
+        await run_in_threadpool(warm_up)
+    elif settings.warmup == "background":
+        # Serve immediately; requests that need the models wait for the same fit
+        warmup_task = asyncio.get_running_loop().run_in_executor(None, warm_up)
+    try:
+        await inference_executor.start()
+    except Exception:
+        # Only the trained-model endpoints need the pool; they answer 503 until a version loads
+        logger.exception("Inference workers failed to start; trained-model endpoints are unavailable")
+    loop_monitor.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    loop_monitor.stop()
+    inference_executor.shutdown()
+    await run_in_threadpool(workflow_manager.close_store)
+    if history_store is not None:
+        await run_in_threadpool(history_store.close)
 
 @app.get("/")
 async def root():
     return {"message": "Liberty OS API"}
 
-@app.post("/simulate/machining")
-async def simulate_machining(params: MachiningParameters):
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: 503 while the background warm-up is still running or if it failed"""
+    if warmup_task is not None:
+        if not warmup_task.done():
+            raise HTTPException(status_code=503, detail="Warming up")
+        if warmup_task.exception() is not None:
+            raise HTTPException(status_code=503, detail=f"Warm-up failed: {warmup_task.exception()}")
+    return {
+        "ready": True,
+        "models_warm": ml_service.initialized,
+        "inference": inference_executor.running,
+        "workflow_persistence": workflow_manager.store is not None,
+        "history_recording": history_store is not None and history_store.writable
+    }
+
+@app.post("/simulate/machining", dependencies=[Depends(require_models)])
+async def simulate_machining(request: Request, params: MachiningParameters):
     """Simulate a machining operation with given parameters."""
     try:
         result = simulate_machining_process(params)
-        return result
+        if history_store is not None:
+            history_store.record(series_name("simulation", params.tool_type), time.time(), {
+                "operation_time": result.operation_time,
+                "energy_consumption": result.energy_consumption,
+                "tool_wear": result.tool_wear
+            })
+        with timer("pydantic.ProcessSimulation.model_dump"):
+            content = result.model_dump()
+        return negotiated_response(request, content)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/optimize/parameters")
-async def optimize_parameters(params: MachiningParameters):
+# Documented but not validated: the columns are rendered by negotiated_response as they are
+@app.post("/simulate/machining/batch", responses={200: {"model": ProcessSimulationBatch}})
+async def simulate_machining_batch(request: Request, params: List[MachiningParameters]):
+    """Simulate many machining operations in one vectorized pass."""
+    if not params:
+        raise HTTPException(status_code=400, detail="At least one parameter set is required")
+    try:
+        columns = simulation_service.parameters_to_columns([p.dict() for p in params])
+        result = await run_in_threadpool(simulation_service.simulate_batch, columns)
+        if history_store is not None:
+            history_store.record_columns("simulation.batch", time.time(), {
+                name: result[name] for name in ("operation_time", "energy_consumption", "tool_wear")
+            })
+        return negotiated_response(request, result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/simulate/machining/monte-carlo")
+async def simulate_machining_monte_carlo(request: Request, mc: MonteCarloRequest):
+    """Simulate one parameter set many times and return outcome percentiles and histograms."""
+    parameters = mc.model_dump(include=set(MachiningParameters.model_fields))
+    try:
+        result = await run_in_threadpool(
+            simulation_service.monte_carlo, parameters, mc.samples, mc.seed, mc.percentiles, mc.bins
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return negotiated_response(request, result)
+
+@app.post("/optimize/parameters", dependencies=[Depends(require_models)])
+async def optimize_parameters(request: Request, params: MachiningParameters):
     """Get optimized parameters for current settings."""
     try:
-        return ml_service.optimize_parameters(params.dict())
+        return negotiated_response(request, ml_service.optimize_parameters(params.dict()))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/analyze/maintenance")
-async def analyze_maintenance(params: MachiningParameters):
+@app.post("/analyze/maintenance", dependencies=[Depends(require_models)])
+async def analyze_maintenance(request: Request, params: MachiningParameters):
     """Get detailed maintenance analysis."""
     try:
-        return ml_service.predict_maintenance(params.dict())
+        return negotiated_response(request, ml_service.predict_maintenance(params.dict()))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/detect/anomalies")
-async def detect_anomalies(params: MachiningParameters):
+@app.post("/toolpath")
+async def generate_tool_path(params: ToolPathParameters, lod: int = Query(0, ge=0, le=3)):
+    """Get roughing then finishing points as little-endian float32 xyz triples"""
+    try:
+        buffer, counts = toolpath_service.encode(params.feed_rate, params.tool_diameter, lod)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(
+        content=buffer,
+        media_type="application/octet-stream",
+        headers={
+            "X-Roughing-Points": str(counts["roughing"]),
+            "X-Finishing-Points": str(counts["finishing"])
+        }
+    )
+
+@app.post("/simulate/stock-removal")
+async def simulate_stock_removal_endpoint(request: Request, removal: StockRemovalRequest):
+    """Sweep a tool path through a dexel stock model and report removed volume per segment"""
+    try:
+        if removal.points is not None:
+            points = np.asarray(removal.points, dtype=np.float64)
+        elif removal.feed_rate is not None:
+            paths = toolpath_service.generate(removal.feed_rate, removal.tool_diameter, removal.lod)
+            points = np.concatenate([paths["roughing"], paths["finishing"]])
+        else:
+            raise ValueError("Either points or feed_rate is required")
+        result = await run_in_threadpool(
+            simulate_stock_removal,
+            points,
+            removal.tool_diameter,
+            tuple(removal.bounds),
+            removal.z_bottom,
+            removal.z_top,
+            removal.cell_size,
+            removal.map_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return negotiated_response(request, result)
+
+# Trained-model inference, served from the worker pool
+def require_inference():
+    if not inference_executor.running:
+        error = inference_executor.load_error
+        if error is not None:
+            raise HTTPException(status_code=503, detail=f"Model version {error['version']} failed to load: {error['error']}")
+        raise HTTPException(status_code=503, detail="No trained model; run `python -m app.train`")
+
+@app.post("/predict/quality", dependencies=[Depends(require_inference)])
+async def predict_quality(params: MachiningParameters):
+    """Predict quality with the trained model; concurrent requests share one batched predict"""
+    try:
+        features = ManufacturingMLService.encode_features([params.dict()])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    predictions = await inference_executor.predict_quality(features)
+    return {"predicted_quality": float(predictions[0])}
+
+@app.post("/predict/quality/batch", dependencies=[Depends(require_inference)])
+async def predict_quality_batch(request: Request, params: List[MachiningParameters]):
+    """Predict quality for many parameter sets with the trained model"""
+    if not params:
+        raise HTTPException(status_code=400, detail="At least one parameter set is required")
+    try:
+        features = ManufacturingMLService.encode_features([p.dict() for p in params])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    predictions = await inference_executor.predict_quality(features)
+    return negotiated_response(request, {"predicted_quality": predictions})
+
+@app.post("/predict/optimize", dependencies=[Depends(require_inference)])
+async def optimize_with_model(params: MachiningParameters, budget: Optional[int] = Query(None, ge=1, le=10_000)):
+    """Search for the parameters the trained model scores highest, in a worker process"""
+    if params.tool_type not in ManufacturingMLService.TOOL_TYPE_ENCODING:
+        raise HTTPException(status_code=400, detail=f"Unknown tool type: {params.tool_type}")
+    return await inference_executor.optimize_parameters(params.dict(), budget)
+
+@app.get("/predict/stats")
+async def get_inference_stats():
+    """Get worker pool and micro-batching statistics"""
+    return inference_executor.stats()
+
+# Model registry
+@app.get("/models")
+async def list_models():
+    """List registered model versions, the active one and any shadow candidate"""
+    return {
+        "active": inference_executor.active_version,
+        "shadow": inference_executor.shadow.version if inference_executor.shadow else None,
+        "versions": inference_executor.registry.versions()
+    }
+
+@app.post("/models/{version}/activate")
+async def activate_model(version: str):
+    """Hot-swap the serving model; in-flight requests finish on the previous version"""
+    try:
+        metadata = await inference_executor.activate(version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"active": version, "model": metadata}
+
+@app.post("/models/{version}/shadow", dependencies=[Depends(require_inference)])
+async def shadow_model(version: str, sample_rate: float = Query(0.1, gt=0, le=1)):
+    """Score a candidate version on a sampled share of live quality batches"""
+    try:
+        return await inference_executor.set_shadow(version, sample_rate)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/models/shadow")
+async def get_shadow_stats():
+    """Get latency and prediction deltas of the shadow candidate against the active model"""
+    if inference_executor.shadow is None:
+        raise HTTPException(status_code=404, detail="No shadow model")
+    return inference_executor.shadow.stats()
+
+@app.delete("/models/shadow")
+async def stop_shadow_model():
+    """Stop shadow scoring and return its final statistics"""
+    stats = inference_executor.clear_shadow()
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No shadow model")
+    return stats
+
+@app.post("/detect/anomalies", dependencies=[Depends(require_models)])
+async def detect_anomalies(request: Request, params: MachiningParameters):
     """Detect and analyze process anomalies."""
     try:
-        return ml_service.detect_anomalies(params.dict())
+        return negotiated_response(request, ml_service.detect_anomalies(params.dict()))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/optimize/parameters/{stage}")
-async def optimize_parameters(stage: str, params: MachiningParameters):
+@app.post("/detect/anomalies/batch", dependencies=[Depends(require_models)])
+async def detect_anomalies_batch(request: Request, samples: TelemetrySamples):
+    """Score a micro-batch of telemetry samples in one vectorized call"""
+    if not (len(samples.cutting_speed) == len(samples.feed_rate) == len(samples.depth_of_cut)):
+        raise HTTPException(status_code=400, detail="Telemetry columns must have equal length")
+    if not samples.cutting_speed:
+        raise HTTPException(status_code=400, detail="At least one sample is required")
+    try:
+        columns = {
+            "cutting_speed": np.asarray(samples.cutting_speed),
+            "feed_rate": np.asarray(samples.feed_rate),
+            "depth_of_cut": np.asarray(samples.depth_of_cut)
+        }
+        return negotiated_response(request, ml_service.detect_anomalies_batch(columns, observe=True))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/detect/anomalies/model")
+async def get_anomaly_model_stats():
+    """Get anomaly model fit and scoring statistics"""
+    return ml_service.anomaly_engine.stats()
+
+@app.post("/optimize/parameters/{stage}", dependencies=[Depends(require_models)])
+async def optimize_parameters(request: Request, stage: str, params: MachiningParameters):
     """Get optimized parameters for current manufacturing stage"""
     try:
-        return ml_service.get_parameter_optimization(params.dict(), stage)
+        return negotiated_response(request, ml_service.get_parameter_optimization(params.dict(), stage))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/optimize/pareto/{stage}")
+async def get_pareto_front(
+    request: Request,
+    stage: str,
+    tool_type: str = "carbide",
+    quality: Optional[float] = Query(None, ge=0),
+    energy_efficiency: Optional[float] = Query(None, ge=0),
+    tool_life: Optional[float] = Query(None, ge=0),
+    material_removal_rate: Optional[float] = Query(None, ge=0)
+):
+    """Get the quality/energy/tool life/removal rate Pareto front, optionally picking a weighted trade-off"""
+    weights = {
+        name: weight for name, weight in (
+            ("quality", quality),
+            ("energy_efficiency", energy_efficiency),
+            ("tool_life", tool_life),
+            ("material_removal_rate", material_removal_rate)
+        ) if weight is not None
+    }
+    # Quality comes from the active trained model when there is one, and fronts are cached per version
+    model_version, predict_quality = inference_executor.quality_scorer() if inference_executor.running else (None, None)
+    try:
+        front = await run_in_threadpool(ml_service.get_pareto_front, stage, tool_type, predict_quality, model_version)
+        if weights:
+            front = {**front, "selected": ml_service.select_trade_off(front, weights)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return negotiated_response(request, front)
 
-@app.post("/analyze/parameters")
-async def analyze_parameters(params: MachiningParameters):
+@app.post("/analyze/parameters", dependencies=[Depends(require_models)])
+async def analyze_parameters(request: Request, params: MachiningParameters):
     """Get detailed parameter relationship analysis"""
     try:
-        return ml_service.analyze_parameter_relationships(params.dict())
+        return negotiated_response(request, ml_service.analyze_parameter_relationships(params.dict()))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/ml/cache/stats")
+async def get_prediction_cache_stats():
+    """Get prediction cache hit/miss counters"""
+    return ml_service.cache.stats()
+
+@app.delete("/ml/cache")
+async def clear_prediction_cache():
+    """Drop all cached predictions"""
+    ml_service.cache.clear()
+    return ml_service.cache.stats()
+
+@app.post("/analyze/parameters/sweep")
+async def sweep_parameters(request: Request, sweep: ParameterSweepRequest):
+    """Evaluate parameter relationships over a cutting_speed x feed_rate x depth_of_cut grid"""
+    axes = {
+        name: np.linspace(axis.min, axis.max, axis.steps)
+        for name, axis in (
+            ("cutting_speed", sweep.cutting_speed),
+            ("feed_rate", sweep.feed_rate),
+            ("depth_of_cut", sweep.depth_of_cut)
+        )
+    }
+    try:
+        result = await run_in_threadpool(ml_service.sweep_parameter_relationships, axes, sweep.tool_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return negotiated_response(request, result)
+
+# Observability
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of request, service, cache, batching and event loop metrics"""
+    return Response(content=metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+def require_profile_token(authorization: Optional[str] = Header(None)):
+    """The profiler is off unless PROFILE_TOKEN is set, and then needs it as a bearer token"""
+    if not settings.profile_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.profile_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid profile token", headers={"WWW-Authenticate": "Bearer"})
+
+@app.get("/admin/profile", include_in_schema=False, dependencies=[Depends(require_profile_token)])
+async def profile_worker(
+    duration: float = Query(5.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$")
+):
+    """Sample every thread of this worker for a while and return the stacks.
+
+    ``collapsed`` is the folded-stack text read by flamegraph.pl and
+    speedscope; ``speedscope`` is speedscope's own JSON format.
+    """
+    try:
+        profile = await run_in_threadpool(profiler.sample, duration, interval_ms / 1000)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filename = f"liberty-profile-{int(time.time())}"
+    if format == "speedscope":
+        return Response(
+            content=json.dumps(profiler.to_speedscope(profile, name=f"{settings.app_name} {settings.pod_id}")),
+            media_type="application/json",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.speedscope.json"'}
+        )
+    return PlainTextResponse(
+        profiler.to_collapsed(profile),
+        headers={"Content-Disposition": f'attachment; filename="{filename}.collapsed.txt"'}
+    )
@@ -49,6 +49,26 @@ class QualityMeasurement(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     inspector: Optional[str] = None
     notes: Optional[str] = None
+    tool_type: Optional[str] = None
+
+class FeatureDeviation(BaseModel):
+    feature: str
+    deviation: float
+    tolerance_utilization: Optional[float] = None  # None when the feature has no tolerance band on that side
+
+class MeasurementBatchSummary(BaseModel):
+    measurement_types: List[MeasurementType] = []
+    feature_count: int
+    passed_count: int
+    failed_count: int
+    pass_rate: float
+    mean_deviation: float
+    std_deviation: float
+    max_abs_deviation: float
+    max_tolerance_utilization: Optional[float] = None
+    failed_features: List[str] = []
+    worst_features: List[FeatureDeviation] = []
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class QualityGate(BaseModel):
     name: str
@@ -56,6 +76,7 @@ class QualityGate(BaseModel):
     criteria: Dict[str, float]
     metrics: Dict[str, float] = {}
     measurements: Dict[str, QualityMeasurement] = {}
+    batch_summary: Optional[MeasurementBatchSummary] = None
     required_measurements: List[MeasurementType] = []
     inspection_methods: List[InspectionMethod] = []
     status: StageStatus = StageStatus.PENDING
@@ -0,0 +1,152 @@
+# backend/app/services/anomaly_engine.py
+
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from sklearn.ensemble import IsolationForest
+
+class StreamingAnomalyEngine:
+    """IsolationForest anomaly scoring over a sliding window of process telemetry.
+
+    Samples are scored in micro-batches with a single ``score_samples`` call
+    and appended to a preallocated ring buffer. Once enough new samples have
+    arrived, a replacement model is fitted on the window in a background
+    thread and swapped in atomically, so scoring never waits on a refit.
+    """
+
+    FEATURES = ("cutting_speed", "feed_rate", "depth_of_cut")
+    # Decision scores below these thresholds are reported as medium/high severity
+    MEDIUM_THRESHOLD = 0.0
+    HIGH_THRESHOLD = -0.1
+
+    def __init__(
+        self,
+        window_size: int = 5000,
+        refit_every: int = 1000,
+        n_estimators: int = 100,
+        contamination: float = 0.02,
+        seed: Optional[int] = None
+    ):
+        self.window_size = window_size
+        self.refit_every = refit_every
+        self.n_estimators = n_estimators
+        self.contamination = contamination
+        self.seed = seed
+
+        self._window = np.empty((window_size, len(self.FEATURES)), dtype=np.float64)
+        self._position = 0
+        self._filled = 0
+        self._since_fit = 0
+        self._lock = threading.Lock()
+        self._baseline_lock = threading.Lock()
+        self._refitting = False
+
+        self.model: Optional["IsolationForest"] = None
+        self.fits = 0
+        self.last_fit_time: Optional[float] = None
+        self.samples_scored = 0
+        self.score_calls = 0
+
+    @property
+    def fitted(self) -> bool:
+        return self.model is not None
+
+    def fit_baseline(self, n_samples: int = 2000):
+        """Fit the initial model on synthetic samples from the nominal operating region"""
+        rng = np.random.default_rng(self.seed)
+        X = np.column_stack([
+            rng.uniform(80, 160, n_samples),
+            rng.uniform(0.15, 0.35, n_samples),
+            rng.uniform(1.0, 3.5, n_samples)
+        ])
+        self._install(self._fit(X))
+
+    def ensure_fitted(self):
+        """Fit the baseline unless a model exists; concurrent callers wait for a single fit"""
+        if self.model is None:
+            with self._baseline_lock:
+                if self.model is None:
+                    self.fit_baseline()
+
+    def _fit(self, X: np.ndarray) -> "IsolationForest":
+        # scikit-learn (and SciPy behind it) takes about a second to import, so load it on first fit
+        from sklearn.ensemble import IsolationForest
+
+        model = IsolationForest(
+            n_estimators=self.n_estimators,
+            contamination=self.contamination,
+            random_state=self.seed
+        )
+        model.fit(X)
+        return model
+
+    def _install(self, model: "IsolationForest"):
+        """Swap in a fitted model; ``fits`` changes only once the new model scores"""
+        self.model = model
+        self.fits += 1
+        self.last_fit_time = time.time()
+
+    def decision_scores(self, X: np.ndarray) -> np.ndarray:
+        """Score an (n, 3) sample matrix in one call; negative scores are anomalous"""
+        self.ensure_fitted()
+        model = self.model  # Read once so a concurrent swap cannot split the batch
+        self.score_calls += 1
+        self.samples_scored += len(X)
+        return model.score_samples(X) - model.offset_
+
+    def score_and_observe(self, X: np.ndarray) -> np.ndarray:
+        """Score a micro-batch and add it to the sliding window"""
+        scores = self.decision_scores(X)
+        self.observe(X)
+        return scores
+
+    def observe(self, X: np.ndarray):
+        """Append samples to the ring buffer, triggering a background refit when due"""
+        X = X[-self.window_size:]
+        with self._lock:
+            end = self._position + len(X)
+            if end <= self.window_size:
+                self._window[self._position:end] = X
+            else:
+                split = self.window_size - self._position
+                self._window[self._position:] = X[:split]
+                self._window[:end - self.window_size] = X[split:]
+            self._position = end % self.window_size
+            self._filled = min(self.window_size, self._filled + len(X))
+            self._since_fit += len(X)
+
+            if self._since_fit < self.refit_every or self._refitting:
+                return
+            self._refitting = True
+            self._since_fit = 0
+            window = self._window[:self._filled].copy()
+
+        threading.Thread(target=self._refit, args=(window,), daemon=True).start()
+
+    def _refit(self, window: np.ndarray):
+        try:
+            self._install(self._fit(window))
+        finally:
+            self._refitting = False
+
+    def severity(self, scores: np.ndarray) -> np.ndarray:
+        return np.select(
+            [scores < self.HIGH_THRESHOLD, scores < self.MEDIUM_THRESHOLD], ["high", "medium"], default="low"
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "fitted": self.fitted,
+            "fits": self.fits,
+            "last_fit_time": self.last_fit_time,
+            "refitting": self._refitting,
+            "window_size": self.window_size,
+            "window_filled": self._filled,
+            "samples_since_fit": self._since_fit,
+            "samples_scored": self.samples_scored,
+            "score_calls": self.score_calls
+        }
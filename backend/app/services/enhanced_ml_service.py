@@ -1,35 +1,66 @@
 # backend/app/services/enhanced_ml_service.py
 
+import threading
+from collections import OrderedDict
+
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestRegressor, IsolationForest
-from sklearn.multioutput import MultiOutputRegressor
-from typing import Dict, List, Tuple, Optional
-import joblib
-from datetime import datetime
+from typing import Callable, Dict, List, Tuple, Optional
+
+from ..config.settings import settings
+from ..utils.metrics import timed
+from .prediction_cache import PredictionCache, cached_prediction
+from .anomaly_engine import StreamingAnomalyEngine
+from .ml_service import ManufacturingMLService
+from .optimizer import ParetoFrontSearch
 
 class EnhancedManufacturingMLService:
-    def __init__(self):
+    SWEEP_AXES = ("cutting_speed", "feed_rate", "depth_of_cut")
+    MAX_SWEEP_POINTS = 1_000_000
+    LIMITING_FACTORS = ("High cutting speed", "Excessive feed rate", "Deep cut depth", "None")
+    WEAR_PATTERNS = ("Flank wear dominant", "Crater wear dominant", "Normal wear pattern")
+    MODEL_VERSION = "heuristic-1"
+    PARETO_OBJECTIVES = ("quality", "energy_efficiency", "tool_life", "material_removal_rate")
+    # cutting_speed, feed_rate and depth_of_cut ranges searched for each stage's trade-offs:
+    # roughing takes heavy cuts, verification passes are light finishing cuts
+    DEFAULT_BOUNDS = ((50.0, 200.0), (0.1, 0.5), (0.5, 5.0))
+    STAGE_BOUNDS = {
+        "Initial Machining": ((80.0, 200.0), (0.2, 0.5), (1.5, 5.0)),
+        "Quality Verification": ((100.0, 200.0), (0.1, 0.25), (0.5, 1.5))
+    }
+    # The workflow's stages; those without STAGE_BOUNDS search DEFAULT_BOUNDS
+    PARETO_STAGES = ("Material Setup", "Initial Machining", "Quality Verification", "Process Completion")
+
+    def __init__(self, cache: Optional[PredictionCache] = None, anomaly_engine: Optional[StreamingAnomalyEngine] = None):
         self.initialized = False
+        self.model_version = self.MODEL_VERSION
+        self.cache = cache if cache is not None else PredictionCache(
+            max_size=settings.prediction_cache_size,
+            ttl_seconds=settings.prediction_cache_ttl
+        )
+        self.anomaly_engine = anomaly_engine or StreamingAnomalyEngine(
+            window_size=settings.anomaly_window_size,
+            refit_every=settings.anomaly_refit_every,
+            seed=settings.model_seed
+        )
+        self._pareto_fronts: "OrderedDict[Tuple[str, str, str], Dict]" = OrderedDict()
+        self._pareto_lock = threading.Lock()
 
     def initialize_models(self):
         """Initialize the service. In production, this would load or train models."""
         if not self.initialized:
+            self.anomaly_engine.ensure_fitted()
             self.initialized = True
 
     def _to_python_type(self, value):
         """Convert numpy types to Python native types."""
-        if isinstance(value, (np.int_, np.intc, np.intp, np.int8, np.int16, np.int32, 
-                            np.int64, np.uint8, np.uint16, np.uint32, np.uint64)):
-            return int(value)
-        elif isinstance(value, (np.float_, np.float16, np.float32, np.float64)):
-            return float(value)
-        elif isinstance(value, (np.bool_)):
-            return bool(value)
-        elif isinstance(value, np.ndarray):
-            return self._to_python_type(value.item()) if value.size == 1 else [self._to_python_type(x) for x in value]
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, np.ndarray):
+            return value.item() if value.size == 1 else value.tolist()
         return value
 
+    @timed("ml.predict_quality")
+    @cached_prediction
     def predict_quality(self, parameters: Dict) -> Dict:
         """Predict multiple quality metrics for given parameters."""
         if not self.initialized:
@@ -46,6 +77,8 @@ class EnhancedManufacturingMLService:
             "overall_quality": self._to_python_type(overall_quality)
         }
 
+    @timed("ml.predict_maintenance")
+    @cached_prediction
     def predict_maintenance(self, parameters: Dict) -> Dict:
         """Predict maintenance requirements and tool health."""
         if not self.initialized:
@@ -63,14 +96,15 @@ class EnhancedManufacturingMLService:
             "maintenance_priority": "high" if tool_health < 50 else "medium" if tool_health < 70 else "low"
         }
 
+    @timed("ml.detect_anomalies")
     def detect_anomalies(self, parameters: Dict) -> Dict:
         """Detect and analyze process anomalies."""
         if not self.initialized:
             self.initialize_models()
 
-        # Generate realistic anomaly metrics
-        anomaly_score = np.random.normal(-0.2, 0.3)
-        is_anomaly = anomaly_score < -0.5
+        # Only the model score is cached; the threshold checks below see the exact values
+        anomaly_score = self._anomaly_score(parameters)
+        is_anomaly = anomaly_score < StreamingAnomalyEngine.MEDIUM_THRESHOLD
         
         causes = []
         if parameters["cutting_speed"] > 180:
@@ -83,10 +117,22 @@ class EnhancedManufacturingMLService:
         return {
             "is_anomaly": self._to_python_type(is_anomaly),
             "anomaly_score": self._to_python_type(anomaly_score),
-            "severity": "high" if anomaly_score < -0.7 else "medium" if anomaly_score < -0.5 else "low",
+            "severity": (
+                "high" if anomaly_score < StreamingAnomalyEngine.HIGH_THRESHOLD
+                else "medium" if anomaly_score < StreamingAnomalyEngine.MEDIUM_THRESHOLD
+                else "low"
+            ),
             "potential_causes": causes
         }
 
+    # Keyed on the engine's fit count, so a background refit retires every cached score
+    @cached_prediction(version=lambda self: f"{self.model_version}+anomaly{self.anomaly_engine.fits}")
+    def _anomaly_score(self, parameters: Dict) -> float:
+        """Score a what-if sample against the telemetry model without adding it to the window"""
+        features = np.array([[parameters[name] for name in StreamingAnomalyEngine.FEATURES]])
+        return float(self.anomaly_engine.decision_scores(features)[0])
+
+    @timed("ml.optimize_parameters")
     def optimize_parameters(self, current_params: Dict) -> Dict:
         """Optimize manufacturing parameters."""
         if not self.initialized:
@@ -108,7 +154,101 @@ class EnhancedManufacturingMLService:
             "predicted_quality": self._to_python_type(predicted_quality),
             "quality_improvement": self._to_python_type(quality_improvement)
         }
-    
+
+    @timed("ml.predict_quality_batch")
+    def predict_quality_batch(self, parameters: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Vectorized predict_quality over columnar parameter arrays."""
+        if not self.initialized:
+            self.initialize_models()
+
+        n = len(parameters["cutting_speed"])
+        surface_quality = 85 + np.random.normal(0, 5, n)
+        dimensional_accuracy = 88 + np.random.normal(0, 4, n)
+
+        return {
+            "surface_quality": surface_quality,
+            "dimensional_accuracy": dimensional_accuracy,
+            "overall_quality": (surface_quality + dimensional_accuracy) / 2
+        }
+
+    @timed("ml.predict_maintenance_batch")
+    def predict_maintenance_batch(self, parameters: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Vectorized predict_maintenance over columnar parameter arrays."""
+        if not self.initialized:
+            self.initialize_models()
+
+        n = len(parameters["cutting_speed"])
+        tool_health = np.maximum(0, 100 - np.random.normal(20, 5, n))
+
+        return {
+            "tool_health": tool_health,
+            "maintenance_needed": tool_health < 70,
+            "estimated_remaining_hours": tool_health * 0.5,
+            "maintenance_priority": np.select(
+                [tool_health < 50, tool_health < 70], ["high", "medium"], default="low"
+            )
+        }
+
+    @timed("ml.detect_anomalies_batch")
+    def detect_anomalies_batch(self, parameters: Dict[str, np.ndarray], observe: bool = False) -> Dict[str, np.ndarray]:
+        """Vectorized detect_anomalies over columnar parameter arrays.
+
+        Only measured process telemetry should pass ``observe=True``: observed
+        samples join the sliding window the model is refitted on, while
+        simulated and what-if parameters are scored only.
+        """
+        if not self.initialized:
+            self.initialize_models()
+
+        n = len(parameters["cutting_speed"])
+        features = np.column_stack([parameters[name] for name in StreamingAnomalyEngine.FEATURES])
+        if observe:
+            anomaly_score = self.anomaly_engine.score_and_observe(features)
+        else:
+            anomaly_score = self.anomaly_engine.decision_scores(features)
+
+        # Cause flags are evaluated as masks and only joined into lists at the end
+        cause_masks = [
+            (parameters["cutting_speed"] > 180, "High cutting speed"),
+            (parameters["feed_rate"] > 0.4, "Excessive feed rate"),
+            (parameters["depth_of_cut"] > 4, "Deep cut depth")
+        ]
+        potential_causes = [[] for _ in range(n)]
+        for mask, cause in cause_masks:
+            for i in np.flatnonzero(mask):
+                potential_causes[i].append(cause)
+
+        return {
+            "is_anomaly": anomaly_score < StreamingAnomalyEngine.MEDIUM_THRESHOLD,
+            "anomaly_score": anomaly_score,
+            "severity": self.anomaly_engine.severity(anomaly_score),
+            "potential_causes": potential_causes
+        }
+
+    @timed("ml.optimize_parameters_batch")
+    def optimize_parameters_batch(self, current_params: Dict[str, np.ndarray]) -> Dict:
+        """Vectorized optimize_parameters over columnar parameter arrays."""
+        if not self.initialized:
+            self.initialize_models()
+
+        n = len(current_params["cutting_speed"])
+        optimized_params = {
+            "cutting_speed": np.minimum(200, current_params["cutting_speed"] * (1 + np.random.normal(0, 0.1, n))),
+            "feed_rate": np.minimum(0.5, current_params["feed_rate"] * (1 + np.random.normal(0, 0.1, n))),
+            "depth_of_cut": np.minimum(5.0, current_params["depth_of_cut"] * (1 + np.random.normal(0, 0.1, n))),
+            "tool_type": current_params["tool_type"]
+        }
+
+        predicted_quality = 90 + np.random.normal(0, 2, n)
+
+        return {
+            "optimized_parameters": optimized_params,
+            "predicted_quality": predicted_quality,
+            "quality_improvement": predicted_quality - 85
+        }
+
+    @timed("ml.get_parameter_optimization")
+    @cached_prediction(exact=True)  # Echoes the parameters and compares them in its recommendations
     def get_parameter_optimization(self, parameters: Dict, current_stage: str) -> Dict:
         """Get optimized parameters based on current stage and conditions"""
         if not self.initialized:
@@ -152,6 +292,114 @@ class EnhancedManufacturingMLService:
             "recommendations": self._generate_recommendations(parameters, optimized_params, current_stage)
         }
 
+    def trade_off_objectives(self, candidates: np.ndarray, quality: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> np.ndarray:
+        """Quality, energy efficiency, tool life and material removal rate for an (n, 3) candidate matrix.
+
+        ``quality`` scores the candidates with a trained model; without one,
+        the deterministic parts of the surface finish and dimensional
+        accuracy scores stand in for it.
+        """
+        grid = {name: candidates[:, i] for i, name in enumerate(self.SWEEP_AXES)}
+        efficiency = self._efficiency_grid(grid)
+        if quality is not None:
+            quality_score = np.asarray(quality(candidates), dtype=np.float64)
+        else:
+            surface_finish = np.clip((grid["cutting_speed"] / 100) * (0.2 / grid["feed_rate"]) * 80, 0, 100)
+            dimensional_accuracy = np.clip(100 - (grid["feed_rate"] * 100) - (grid["depth_of_cut"] * 10), 0, 100)
+            quality_score = (surface_finish + dimensional_accuracy) / 2
+        return np.column_stack([
+            quality_score,
+            efficiency["energy_efficiency_score"],
+            efficiency["tool_life_remaining"],
+            efficiency["material_removal_rate"]
+        ])
+
+    @timed("ml.get_pareto_front")
+    def get_pareto_front(
+        self,
+        stage: str,
+        tool_type: str,
+        predict_quality: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        model_version: Optional[str] = None
+    ) -> Dict:
+        """Non-dominated trade-offs between the PARETO_OBJECTIVES, best quality first.
+
+        ``predict_quality`` scores an (n, 4) feature matrix with the trained
+        model named by ``model_version``; without it the heuristic quality
+        score is used. Fronts are cached per (stage, tool_type, model
+        version), so only the first request after a model change pays for
+        the search.
+        """
+        if stage not in self.PARETO_STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        if tool_type not in ManufacturingMLService.TOOL_TYPE_ENCODING:
+            raise ValueError(f"Unknown tool type: {tool_type}")
+        quality = None
+        if predict_quality is not None:
+            tool_code = ManufacturingMLService.TOOL_TYPE_ENCODING[tool_type]
+
+            def quality(candidates: np.ndarray) -> np.ndarray:
+                return predict_quality(np.column_stack([candidates, np.full(len(candidates), tool_code)]))
+        else:
+            model_version = self.model_version
+
+        key = (stage, tool_type, model_version)
+        with self._pareto_lock:
+            front = self._pareto_fronts.get(key)
+            if front is not None:
+                self._pareto_fronts.move_to_end(key)
+                return front
+
+        bounds = np.array(self.STAGE_BOUNDS.get(stage, self.DEFAULT_BOUNDS))
+        result = ParetoFrontSearch(
+            lambda candidates: self.trade_off_objectives(candidates, quality),
+            lower=bounds[:, 0],
+            upper=bounds[:, 1],
+            population=settings.pareto_population,
+            seed=settings.model_seed
+        ).search()
+        order = np.argsort(-result["objectives"][:, 0], kind="stable")
+
+        front = {
+            "stage": stage,
+            "tool_type": tool_type,
+            "model_version": model_version,
+            "size": len(order),
+            "bounds": {name: bounds[i].tolist() for i, name in enumerate(self.SWEEP_AXES)},
+            "parameters": {name: result["candidates"][order, i] for i, name in enumerate(self.SWEEP_AXES)},
+            "objectives": {name: result["objectives"][order, i] for i, name in enumerate(self.PARETO_OBJECTIVES)},
+            "stats": result["stats"]
+        }
+        with self._pareto_lock:
+            self._pareto_fronts[key] = front
+            while len(self._pareto_fronts) > settings.pareto_cache_size:
+                self._pareto_fronts.popitem(last=False)
+        return front
+
+    def select_trade_off(self, front: Dict, weights: Dict[str, float]) -> Dict:
+        """Pick the front point with the highest weighted sum of min-max normalized objectives"""
+        unknown = set(weights) - set(self.PARETO_OBJECTIVES)
+        if unknown:
+            raise ValueError(f"Unknown objectives: {', '.join(sorted(unknown))}")
+        w = np.array([weights.get(name, 0.0) for name in self.PARETO_OBJECTIVES])
+        if (w < 0).any() or w.sum() <= 0:
+            raise ValueError("Weights must be non-negative with a positive sum")
+
+        values = np.column_stack([front["objectives"][name] for name in self.PARETO_OBJECTIVES])
+        low, high = values.min(axis=0), values.max(axis=0)
+        normalized = (values - low) / np.where(high > low, high - low, 1.0)
+        scores = normalized @ (w / w.sum())
+        best = int(np.argmax(scores))
+        return {
+            "index": best,
+            "score": float(scores[best]),
+            "parameters": {
+                **{name: float(front["parameters"][name][best]) for name in self.SWEEP_AXES},
+                "tool_type": front["tool_type"]
+            },
+            "objectives": {name: float(front["objectives"][name][best]) for name in self.PARETO_OBJECTIVES}
+        }
+
     def _generate_recommendations(self, current_params: Dict, optimized_params: Dict, stage: str) -> List[str]:
         """Generate specific recommendations based on parameter differences"""
         recommendations = []
@@ -174,6 +422,7 @@ class EnhancedManufacturingMLService:
 
         return recommendations
     
+    @timed("ml.analyze_parameter_relationships")
     def analyze_parameter_relationships(self, parameters: Dict) -> Dict:
         """Analyze how parameters interact and affect quality/efficiency"""
         
@@ -207,6 +456,98 @@ class EnhancedManufacturingMLService:
             "optimization_space": self._calculate_optimization_space(parameters)
         }
 
+    @timed("ml.sweep_parameter_relationships")
+    def sweep_parameter_relationships(self, axes: Dict[str, np.ndarray], tool_type: str = "carbide") -> Dict:
+        """Evaluate the parameter relationship model over a full cutting_speed x feed_rate x depth_of_cut grid.
+
+        Every column is flattened in C order over the axis order, so index
+        ``(i * len(feed_rate) + j) * len(depth_of_cut) + k`` is grid point (i, j, k).
+        Categorical columns are returned as integer codes into ``categories``.
+        The relationship model does not depend on the tool type; it is
+        validated and echoed so results can be labelled with the tool swept for.
+        """
+        if tool_type not in ManufacturingMLService.TOOL_TYPE_ENCODING:
+            raise ValueError(f"Unknown tool type: {tool_type}")
+        shape = tuple(len(axes[name]) for name in self.SWEEP_AXES)
+        n_points = int(np.prod(shape))
+        if n_points > self.MAX_SWEEP_POINTS:
+            raise ValueError(f"Sweep of {n_points} points exceeds limit of {self.MAX_SWEEP_POINTS}")
+
+        # Broadcast each axis along its own dimension of the grid
+        cutting_speed = np.asarray(axes["cutting_speed"], dtype=np.float64)[:, None, None]
+        feed_rate = np.asarray(axes["feed_rate"], dtype=np.float64)[None, :, None]
+        depth_of_cut = np.asarray(axes["depth_of_cut"], dtype=np.float64)[None, None, :]
+        grid = {"cutting_speed": cutting_speed, "feed_rate": feed_rate, "depth_of_cut": depth_of_cut}
+
+        columns = {
+            "speed_feed_interaction": (cutting_speed * feed_rate) / 20,
+            "depth_load": depth_of_cut * feed_rate * 100,
+            "tool_load": (cutting_speed * feed_rate * depth_of_cut) / 4
+        }
+        columns.update(self._surface_finish_grid(grid, shape))
+        columns.update(self._dimensional_accuracy_grid(grid, shape))
+        columns.update(self._tool_wear_grid(grid))
+        columns.update(self._efficiency_grid(grid))
+
+        return {
+            "shape": list(shape),
+            "tool_type": tool_type,
+            "axes": {name: np.asarray(axes[name], dtype=np.float64) for name in self.SWEEP_AXES},
+            "columns": {
+                name: np.round(np.broadcast_to(values, shape).ravel(), 4)
+                if values.dtype.kind == "f" else np.broadcast_to(values, shape).ravel()
+                for name, values in columns.items()
+            },
+            "categories": {
+                "limiting_factor": list(self.LIMITING_FACTORS),
+                "wear_pattern": list(self.WEAR_PATTERNS)
+            }
+        }
+
+    def _surface_finish_grid(self, grid: Dict[str, np.ndarray], shape: Tuple[int, ...]) -> Dict[str, np.ndarray]:
+        with np.errstate(divide="ignore"):
+            base_impact = (grid["cutting_speed"] / 100) * (0.2 / grid["feed_rate"])
+        return {
+            "surface_finish_score": np.clip(base_impact * 80, 0, 100),
+            "surface_finish_confidence": np.clip(85 + np.random.normal(0, 5, shape), 0, 100),
+            "limiting_factor": np.select(
+                [grid["cutting_speed"] > 150, grid["feed_rate"] > 0.3, grid["depth_of_cut"] > 3],
+                [0, 1, 2], default=3
+            ).astype(np.uint8)
+        }
+
+    def _dimensional_accuracy_grid(self, grid: Dict[str, np.ndarray], shape: Tuple[int, ...]) -> Dict[str, np.ndarray]:
+        base_accuracy = 100 - (grid["feed_rate"] * 100) - (grid["depth_of_cut"] * 10)
+        return {
+            "dimensional_accuracy_score": np.clip(base_accuracy, 0, 100),
+            "dimensional_accuracy_confidence": np.clip(90 + np.random.normal(0, 3, shape), 0, 100),
+            "tolerance_range_mm": grid["feed_rate"] * 0.1
+        }
+
+    def _tool_wear_grid(self, grid: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        wear_rate = (grid["cutting_speed"] * grid["feed_rate"] * grid["depth_of_cut"]) / 10
+        return {
+            "tool_wear_rate": np.clip(wear_rate, 0, 100),
+            "tool_estimated_life": np.maximum(0, 100 - wear_rate * 5),
+            "wear_pattern": np.select(
+                [grid["cutting_speed"] > 150, grid["feed_rate"] > 0.3], [0, 1], default=2
+            ).astype(np.uint8)
+        }
+
+    def _efficiency_grid(self, grid: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        cutting_speed, feed_rate, depth_of_cut = grid["cutting_speed"], grid["feed_rate"], grid["depth_of_cut"]
+        base_efficiency = 100 - (cutting_speed * 0.2) - (depth_of_cut * 10)
+        base_life = 100 - (cutting_speed * 0.3) - (feed_rate * 100) - (depth_of_cut * 10)
+        return {
+            "material_removal_rate": cutting_speed * feed_rate * depth_of_cut * 0.8,
+            "energy_efficiency_score": np.clip(base_efficiency, 0, 100),
+            "energy_consumption_rate": cutting_speed * depth_of_cut * 0.05,
+            "energy_optimization_potential": np.clip(100 - base_efficiency, 0, 100),
+            "tool_life_remaining": np.clip(base_life, 0, 100),
+            "tool_life_hours": np.maximum(0, base_life * 0.5),
+            "replacement_warning": base_life < 30
+        }
+
     def _calculate_surface_finish_impact(self, parameters: Dict) -> Dict:
         base_impact = (parameters["cutting_speed"] / 100) * (0.2 / parameters["feed_rate"])
         return {
@@ -0,0 +1,467 @@
+# backend/app/services/inference_executor.py
+
+import asyncio
+import logging
+import multiprocessing
+import random
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config.settings import settings
+from ..utils.metrics import SIZE_BUCKETS, metrics
+from .ml_service import ManufacturingMLService
+from .model_registry import ModelRegistry
+from .model_store import ModelArtifactStore
+
+# Models loaded in each worker process, keyed by artifact directory. Holding
+# a few lets batches for the old and new version overlap during a hot swap.
+_worker_services: "OrderedDict[str, ManufacturingMLService]" = OrderedDict()
+_WORKER_MODEL_SLOTS = 3
+# Shared by every worker of a pool; preloading waits on it so each worker takes one task
+_preload_barrier = None
+_PRELOAD_TIMEOUT = 300.0
+
+logger = logging.getLogger(__name__)
+
+BATCH_ROWS = metrics.histogram("inference_batch_rows", "Rows per micro-batch sent to a worker", buckets=SIZE_BUCKETS)
+BATCH_LATENCY = metrics.histogram("inference_batch_seconds", "Micro-batch round trip to a worker, including queueing")
+
+def _worker_service(model_dir: str) -> ManufacturingMLService:
+    service = _worker_services.get(model_dir)
+    if service is None:
+        service = ManufacturingMLService(ModelArtifactStore(model_dir))
+        service.initialize_models()
+        _worker_services[model_dir] = service
+        while len(_worker_services) > _WORKER_MODEL_SLOTS:
+            _worker_services.popitem(last=False)
+    _worker_services.move_to_end(model_dir)
+    return service
+
+def _init_worker(registry_root: str, barrier):
+    """Load the version ACTIVE points at, so workers spawned after a swap start on it"""
+    global _preload_barrier
+    _preload_barrier = barrier
+    registry = ModelRegistry(registry_root)
+    version = registry.active_version()
+    if version is not None:
+        _worker_service(registry.store(version).root)
+
+def _load_model(model_dir: str) -> Dict:
+    service = _worker_service(model_dir)
+    return {**service.metadata, "quality_lut": service.lookup_stats}
+
+def _preload_model(model_dir: str) -> Dict:
+    """Load a model, then hold this worker until every other worker has loaded it too"""
+    metadata = _load_model(model_dir)
+    _preload_barrier.wait(_PRELOAD_TIMEOUT)
+    return metadata
+
+def _predict_quality_batch(model_dir: str, features: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Predict in a worker, returning the predictions and the model time in milliseconds"""
+    service = _worker_service(model_dir)
+    start = time.perf_counter()
+    predictions = service.predict_quality_batch(features)
+    return predictions, (time.perf_counter() - start) * 1000
+
+def _optimize_parameters(model_dir: str, parameters: Dict, budget: Optional[int]) -> Dict:
+    return _worker_service(model_dir).optimize_parameters(parameters, budget)
+
+class MicroBatcher:
+    """Coalesces concurrent requests into one batch call.
+
+    Rows submitted while a batch is open are stacked and sent together once
+    the batch reaches ``max_batch`` rows or ``max_wait`` seconds have passed
+    since its first row, whichever comes first.
+    """
+
+    def __init__(self, run_batch: Callable[[np.ndarray], Awaitable[np.ndarray]], max_batch: int = 256, max_wait: float = 0.005):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._pending_rows = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.batches = 0
+        self.rows = 0
+        self.requests = 0
+        self.largest_batch = 0
+
+    async def submit(self, rows: np.ndarray) -> np.ndarray:
+        """Queue rows for the next batch and wait for their results"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((rows, future))
+        self._pending_rows += len(rows)
+        self.requests += 1
+
+        if self._pending_rows >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_rows = self._pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)  # Hold a reference until the batch completes
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[np.ndarray, asyncio.Future]]):
+        features = np.vstack([rows for rows, _ in batch])
+        self.batches += 1
+        self.rows += len(features)
+        self.largest_batch = max(self.largest_batch, len(features))
+        BATCH_ROWS.observe(len(features))
+        start = time.perf_counter()
+        try:
+            results = await self.run_batch(features)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            BATCH_LATENCY.observe(time.perf_counter() - start)
+
+        offset = 0
+        for rows, future in batch:
+            if not future.done():
+                future.set_result(results[offset:offset + len(rows)])
+            offset += len(rows)
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_rows": self.rows / self.batches if self.batches else None,
+            "largest_batch": self.largest_batch,
+            "pending_rows": self._pending_rows,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000
+        }
+
+class ShadowScorer:
+    """Compares a candidate model against the active one on sampled live batches"""
+
+    def __init__(self, version: str, model_dir: str, sample_rate: float, window: int = 1000):
+        self.version = version
+        self.model_dir = model_dir
+        self.sample_rate = sample_rate
+        self.started_at = time.time()
+        self.batches = 0
+        self.rows = 0
+        self.errors = 0
+        self._primary_ms = deque(maxlen=window)
+        self._shadow_ms = deque(maxlen=window)
+        self._abs_delta_sum = 0.0
+        self._delta_sum = 0.0
+        self._squared_delta_sum = 0.0
+        self._max_abs_delta = 0.0
+
+    def sampled(self) -> bool:
+        return random.random() < self.sample_rate
+
+    def record(self, primary: np.ndarray, primary_ms: float, shadow: np.ndarray, shadow_ms: float):
+        delta = shadow - primary
+        self.batches += 1
+        self.rows += len(delta)
+        self._primary_ms.append(primary_ms)
+        self._shadow_ms.append(shadow_ms)
+        self._delta_sum += float(delta.sum())
+        self._abs_delta_sum += float(np.abs(delta).sum())
+        self._squared_delta_sum += float((delta * delta).sum())
+        self._max_abs_delta = max(self._max_abs_delta, float(np.abs(delta).max()))
+
+    @staticmethod
+    def _latency(samples: deque) -> Optional[Dict]:
+        if not samples:
+            return None
+        values = np.fromiter(samples, dtype=np.float64)
+        return {"mean_ms": float(values.mean()), "p50_ms": float(np.percentile(values, 50)), "p95_ms": float(np.percentile(values, 95))}
+
+    def stats(self) -> Dict:
+        rows = self.rows or 1
+        return {
+            "version": self.version,
+            "sample_rate": self.sample_rate,
+            "started_at": self.started_at,
+            "batches": self.batches,
+            "rows": self.rows,
+            "errors": self.errors,
+            "primary_latency": self._latency(self._primary_ms),
+            "shadow_latency": self._latency(self._shadow_ms),
+            "delta": {
+                "mean": self._delta_sum / rows,
+                "mean_abs": self._abs_delta_sum / rows,
+                "rms": (self._squared_delta_sum / rows) ** 0.5,
+                "max_abs": self._max_abs_delta
+            } if self.rows else None
+        }
+
+class InferenceExecutor:
+    """Runs model inference in a process pool so the event loop only awaits results.
+
+    Each worker loads artifacts memory-mapped from the model registry, so the
+    file's pages are shared through the OS page cache. Quality predictions
+    from concurrent requests are micro-batched into one vectorized predict.
+    The active model is a single (version, directory, metadata) reference:
+    swapping it only affects batches dispatched afterwards, and batches in
+    flight finish on the version they started with. A new version is loaded
+    in every worker before it takes traffic, and each server process polls
+    the registry's ACTIVE file to follow swaps made by the others.
+    """
+
+    def __init__(
+        self,
+        registry: Optional[ModelRegistry] = None,
+        workers: int = settings.inference_workers,
+        max_batch: int = settings.inference_max_batch,
+        max_wait_ms: float = settings.inference_max_wait_ms,
+        watch_interval: float = settings.inference_watch_interval
+    ):
+        self.registry = registry or ModelRegistry(settings.model_dir)
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.watch_interval = watch_interval
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._barrier = None
+        self._quality: Optional[MicroBatcher] = None
+        self._tasks = set()
+        self._swap_lock: Optional[asyncio.Lock] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self.active: Optional[Tuple[str, str, Dict]] = None
+        self.shadow: Optional[ShadowScorer] = None
+        self.swaps = 0
+        self.started_at: Optional[float] = None
+        self.load_error: Optional[Dict] = None  # Last version that failed to load; not retried automatically
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None and self.active is not None
+
+    @property
+    def metadata(self) -> Dict:
+        return self.active[2] if self.active else {}
+
+    @property
+    def active_version(self) -> Optional[str]:
+        return self.active[0] if self.active else None
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            # Spawn rather than fork: the server process already runs threads
+            context = multiprocessing.get_context("spawn")
+            self._barrier = context.Barrier(self.workers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.registry.root, self._barrier)
+            )
+            self._quality = MicroBatcher(self._predict_batch, self.max_batch, self.max_wait_ms / 1000)
+
+    @property
+    def swap_lock(self) -> asyncio.Lock:
+        """Held across a preload and the ACTIVE update that follows it"""
+        if self._swap_lock is None:
+            self._swap_lock = asyncio.Lock()
+        return self._swap_lock
+
+    async def _preload(self, model_dir: str) -> Dict:
+        """Load a model in every worker; the barrier keeps one task per worker.
+
+        Callers hold swap_lock: interleaved preloads could put two tasks of
+        one preload on the same worker and skip another.
+        """
+        self._ensure_pool()
+        results = await asyncio.gather(
+            *(self._submit(_preload_model, model_dir) for _ in range(self.workers)),
+            return_exceptions=True
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            if any(isinstance(error, BrokenProcessPool) for error in errors):
+                # A worker died, e.g. its initializer could not load the model: start over with a fresh pool
+                self._discard_pool()
+                self.active = None
+            else:
+                self._barrier.reset()
+            raise errors[0]
+        return results[0]
+
+    def _discard_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        self._barrier = None
+        self._quality = None
+
+    async def start(self) -> bool:
+        """Start the worker pool on the active version; returns False when nothing has been trained yet.
+
+        Either way the ACTIVE file is watched from then on, so a version
+        trained or activated by another process is picked up.
+        """
+        if self._watcher is None and self.watch_interval > 0:
+            self._watcher = asyncio.ensure_future(self._watch_active())
+        if self.running:
+            return True
+        version = self.registry.active_version()
+        if version is None:
+            return False
+
+        async with self.swap_lock:
+            if not self.running:
+                model_dir = self.registry.store(version).root
+                try:
+                    metadata = await self._preload(model_dir)
+                except Exception as e:
+                    self.load_error = {"version": version, "error": repr(e), "at": time.time()}
+                    raise
+                self.active = (version, model_dir, metadata)
+                self.load_error = None
+                self.started_at = time.time()
+        return True
+
+    async def activate(self, version: str) -> Dict:
+        """Hot-swap the active model; the new version is loaded in every worker before it takes traffic"""
+        async with self.swap_lock:
+            metadata = await self._swap(version)
+            self.registry.activate(version)
+        return metadata
+
+    async def _swap(self, version: str) -> Dict:
+        """Preload a version everywhere and route new batches to it; callers hold swap_lock"""
+        store = self.registry.store(version)
+        if not store.exists():
+            raise FileNotFoundError(f"Model version {version} not found")
+        try:
+            metadata = await self._preload(store.root)
+        except Exception as e:
+            self.load_error = {"version": version, "error": repr(e), "at": time.time()}
+            raise
+        self.active = (version, store.root, metadata)
+        self.load_error = None
+        self.swaps += 1
+        if self.started_at is None:
+            self.started_at = time.time()
+        if self.shadow is not None and self.shadow.version == version:
+            self.shadow = None
+        return metadata
+
+    async def _watch_active(self):
+        """Follow ACTIVE when another server process activates a version"""
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            try:
+                async with self.swap_lock:
+                    version = await asyncio.to_thread(self.registry.active_version)
+                    failed = self.load_error is not None and self.load_error["version"] == version
+                    if version is not None and version != self.active_version and not failed:
+                        logger.info("Model version %s was activated elsewhere; loading it", version)
+                        await self._swap(version)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Following the active model version failed")
+
+    async def set_shadow(self, version: str, sample_rate: float) -> Dict:
+        """Shadow-score a candidate version on a share of live quality batches"""
+        if not self.running:
+            raise RuntimeError("Inference executor is not running; train a model with `python -m app.train`")
+        store = self.registry.store(version)
+        if not store.exists():
+            raise FileNotFoundError(f"Model version {version} not found")
+        async with self.swap_lock:
+            await self._preload(store.root)
+        self.shadow = ShadowScorer(version, store.root, sample_rate)
+        return self.shadow.stats()
+
+    def clear_shadow(self) -> Optional[Dict]:
+        shadow, self.shadow = self.shadow, None
+        return shadow.stats() if shadow else None
+
+    def shutdown(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+        self._discard_pool()
+        self.active = None
+
+    async def _submit(self, fn: Callable, *args):
+        if self._pool is None:
+            raise RuntimeError("Inference executor is not running; train a model with `python -m app.train`")
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    async def _predict_batch(self, features: np.ndarray) -> np.ndarray:
+        _, model_dir, _ = self.active  # Read once: a swap mid-batch must not split it
+        predictions, model_ms = await self._submit(_predict_quality_batch, model_dir, features)
+
+        shadow = self.shadow
+        if shadow is not None and shadow.sampled():
+            task = asyncio.ensure_future(self._shadow_score(shadow, features, predictions, model_ms))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return predictions
+
+    async def _shadow_score(self, shadow: ShadowScorer, features: np.ndarray, primary: np.ndarray, primary_ms: float):
+        try:
+            predictions, model_ms = await self._submit(_predict_quality_batch, shadow.model_dir, features)
+        except Exception:
+            shadow.errors += 1
+            return
+        shadow.record(primary, primary_ms, predictions, model_ms)
+
+    async def predict_quality(self, features: np.ndarray) -> np.ndarray:
+        """Predict quality for an (n, 4) feature matrix, batched with concurrent callers"""
+        if not self.running:
+            raise RuntimeError("Inference executor is not running; train a model with `python -m app.train`")
+        return await self._quality.submit(features)
+
+    def quality_scorer(self) -> Tuple[str, Callable[[np.ndarray], np.ndarray]]:
+        """The active version and a blocking quality predictor pinned to it.
+
+        For searches running in a thread: each call is one round trip to a
+        worker, skipping the micro-batcher, and a swap mid-search does not
+        mix versions.
+        """
+        if not self.running:
+            raise RuntimeError("Inference executor is not running; train a model with `python -m app.train`")
+        version, model_dir, _ = self.active
+        pool = self._pool
+
+        def predict(features: np.ndarray) -> np.ndarray:
+            predictions, _ = pool.submit(_predict_quality_batch, model_dir, features).result()
+            return predictions
+
+        return version, predict
+
+    async def optimize_parameters(self, parameters: Dict, budget: Optional[int] = None) -> Dict:
+        """Run a parameter search in a worker process"""
+        _, model_dir, _ = self.active
+        return await self._submit(_optimize_parameters, model_dir, parameters, budget)
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "started_at": self.started_at,
+            "active_version": self.active_version,
+            "swaps": self.swaps,
+            "load_error": self.load_error,
+            "model": {key: self.metadata.get(key) for key in ("content_hash", "created_at", "sklearn_version", "quality_lut")},
+            "quality_batching": self._quality.stats() if self._quality else None,
+            "shadow": self.shadow.stats() if self.shadow else None
+        }
@@ -0,0 +1,136 @@
+# backend/app/services/measurement_ingest.py
+
+import csv
+import json
+import math
+from array import array
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+import numpy as np
+
+from ..models.workflow import MeasurementType
+
+class MeasurementBatch:
+    """Columnar buffer of CMM feature measurements.
+
+    Values are appended into compact typed arrays while the upload is being
+    parsed and exposed as NumPy views for evaluation, so the raw upload is
+    never held in memory.
+    """
+
+    NUMERIC_COLUMNS = ("value", "nominal", "upper_tolerance", "lower_tolerance")
+    DEFAULT_TYPE = MeasurementType.DIMENSIONAL  # What a CMM run measures unless a row says otherwise
+
+    def __init__(self):
+        self._columns = {name: array("d") for name in self.NUMERIC_COLUMNS}
+        self.features: List[str] = []
+        self.measurement_types: Set[MeasurementType] = set()
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    def append(self, row: Dict, line: int):
+        """Append one parsed row; missing nominal/tolerances default to 0 like single gate updates"""
+        try:
+            value = float(row["value"])
+            nominal = float(row.get("nominal") or 0.0)
+            upper = float(row.get("upper_tolerance") or 0.0)
+            lower = float(row.get("lower_tolerance") or 0.0)
+            measurement_type = MeasurementType(row.get("type") or self.DEFAULT_TYPE)
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Invalid measurement on line {line}")
+        # NaN and infinity parse as floats from both NDJSON and CSV but cannot be evaluated
+        if not all(math.isfinite(x) for x in (value, nominal, upper, lower)):
+            raise ValueError(f"Non-finite measurement on line {line}")
+        self.measurement_types.add(measurement_type)
+        self._columns["value"].append(value)
+        self._columns["nominal"].append(nominal)
+        self._columns["upper_tolerance"].append(upper)
+        self._columns["lower_tolerance"].append(lower)
+        self.features.append(str(row.get("feature") or f"feature_{len(self.features) + 1}"))
+
+    def column(self, name: str) -> np.ndarray:
+        return np.frombuffer(self._columns[name], dtype=np.float64)
+
+    def evaluate(self, max_listed: int = 100) -> Dict:
+        """Evaluate pass/fail and deviation for every feature in one vector pass"""
+        if not len(self):
+            raise ValueError("No measurements in upload")
+
+        value = self.column("value")
+        nominal = self.column("nominal")
+        upper_tolerance = self.column("upper_tolerance")
+        lower_tolerance = self.column("lower_tolerance")
+
+        deviation = value - nominal
+        passed = (deviation >= lower_tolerance) & (deviation <= upper_tolerance)
+
+        # Share of the tolerance band used on the side the deviation falls on. Without a band
+        # (tolerances default to 0) it is undefined: NaN here, null in the summary
+        band = np.where(deviation >= 0, upper_tolerance, -lower_tolerance)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            utilization = np.where(band > 0, np.abs(deviation) / band, np.where(deviation == 0, 0.0, np.nan))
+
+        failed_idx = np.flatnonzero(~passed)
+        # Features without a band are out of tolerance, so they rank as the worst
+        worst_idx = np.argsort(-np.nan_to_num(utilization, nan=np.inf), kind="stable")[:min(10, len(self))]
+        abs_deviation = np.abs(deviation)
+        defined = ~np.isnan(utilization)
+
+        return {
+            "measurement_types": sorted(t.value for t in self.measurement_types),
+            "feature_count": int(len(self)),
+            "passed_count": int(passed.sum()),
+            "failed_count": int(len(failed_idx)),
+            "pass_rate": float(passed.mean()),
+            "mean_deviation": float(deviation.mean()),
+            "std_deviation": float(deviation.std()),
+            "max_abs_deviation": float(abs_deviation.max()),
+            "max_tolerance_utilization": float(utilization.max()) if defined.all() else None,
+            "failed_features": [self.features[i] for i in failed_idx[:max_listed]],
+            "worst_features": [
+                {
+                    "feature": self.features[i],
+                    "deviation": float(deviation[i]),
+                    "tolerance_utilization": float(utilization[i]) if defined[i] else None
+                }
+                for i in worst_idx
+            ]
+        }
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into decoded lines without buffering the whole body"""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8").rstrip("\r")
+
+async def parse_measurement_stream(chunks: AsyncIterator[bytes], content_type: Optional[str]) -> MeasurementBatch:
+    """Parse an NDJSON or CSV (with header row) measurement upload into a MeasurementBatch"""
+    batch = MeasurementBatch()
+    is_csv = bool(content_type) and "csv" in content_type
+    header: Optional[List[str]] = None
+    line_number = 0
+
+    async for line in _iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        if is_csv:
+            fields = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in fields]
+                continue
+            row = dict(zip(header, fields))
+        else:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                raise ValueError(f"Invalid JSON on line {line_number}")
+        batch.append(row, line_number)
+
+    return batch
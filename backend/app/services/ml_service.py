@@ -1,23 +1,68 @@
 # backend/app/services/ml_service.py
 
+import os
+from contextlib import contextmanager
+
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestRegressor
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from ..config.settings import settings
+from .model_registry import ModelRegistry
+from .model_store import ModelArtifactStore
+from .optimizer import BatchedParameterOptimizer
+from .quality_lut import QualityLookupTable
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, workers may build the table concurrently
+    fcntl = None
+
+if TYPE_CHECKING:
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.preprocessing import StandardScaler
+
+@contextmanager
+def _build_lock(path: str):
+    """Exclusive advisory lock held for a block; waiters run it after the holder finishes"""
+    try:
+        handle = open(path, "w")
+    except OSError:  # Read-only model directory: nothing will be saved to share anyway
+        yield
+        return
+    with handle:  # Closing the file releases the lock
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
 
 class ManufacturingMLService:
-    def __init__(self):
-        self.scaler = StandardScaler()
-        self.quality_model = RandomForestRegressor(n_estimators=100, random_state=42)
+    FEATURES = ["cutting_speed", "feed_rate", "depth_of_cut", "tool_type"]
+    TOOL_TYPE_ENCODING = {
+        "carbide": 0,
+        "high_speed_steel": 1,
+        "diamond": 2
+    }
+    # Lower/upper bounds for cutting_speed, feed_rate and depth_of_cut
+    PARAMETER_BOUNDS = np.array([[50.0, 200.0], [0.1, 0.5], [0.5, 5.0]])
+    SEARCH_SPREAD = np.array([20.0, 0.1, 0.5])
+
+    def __init__(self, store: Optional[ModelArtifactStore] = None):
+        self.store = store or ModelRegistry(settings.model_dir).active_store()
+        self.scaler: Optional["StandardScaler"] = None
+        self.quality_model: Optional["RandomForestRegressor"] = None
+        self.metadata: Dict = {}
+        self.lookup: Optional[QualityLookupTable] = None
+        self.lookup_stats: Optional[Dict] = None
         self.initialized = False
 
-    def _generate_synthetic_data(self, n_samples: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+    def _generate_synthetic_data(self, n_samples: int = 1000, seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
         """Generate synthetic manufacturing data for initial model training."""
+        rng = np.random.default_rng(seed)
+
         # Generate random parameters within realistic ranges
-        cutting_speeds = np.random.uniform(50, 200, n_samples)
-        feed_rates = np.random.uniform(0.1, 0.5, n_samples)
-        depths_of_cut = np.random.uniform(0.5, 5.0, n_samples)
-        tool_types = np.random.choice([0, 1, 2], n_samples)  # Encoded tool types
+        cutting_speeds = rng.uniform(50, 200, n_samples)
+        feed_rates = rng.uniform(0.1, 0.5, n_samples)
+        depths_of_cut = rng.uniform(0.5, 5.0, n_samples)
+        tool_types = rng.choice([0, 1, 2], n_samples)  # Encoded tool types
 
         X = np.column_stack([cutting_speeds, feed_rates, depths_of_cut, tool_types])
 
@@ -27,71 +72,196 @@ class ManufacturingMLService:
             - (feed_rates - 0.3)**2 * 200         # Optimal feed rate around 0.3
             - (depths_of_cut - 2)**2 * 5          # Optimal depth around 2
             + tool_types * 2                      # Tool type influence
-            + np.random.normal(0, 2, n_samples)   # Random variation
+            + rng.normal(0, 2, n_samples)         # Random variation
         )
         quality_scores = np.clip(quality_scores, 0, 100)
 
         return X, quality_scores
 
+    def train_models(self, n_samples: int = 1000, seed: int = settings.model_seed) -> Dict:
+        """Train the ML models on synthetic data. This is an offline step, see app.train."""
+        # Imported here so serving processes that only load artifacts skip scikit-learn's import cost
+        import sklearn
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.preprocessing import StandardScaler
+
+        X, y = self._generate_synthetic_data(n_samples, seed)
+        self.scaler = StandardScaler()
+        self.quality_model = RandomForestRegressor(n_estimators=100, random_state=seed)
+        self.quality_model.fit(self.scaler.fit_transform(X), y)
+        self.metadata = {
+            "features": self.FEATURES,
+            "n_samples": n_samples,
+            "seed": seed,
+            "n_estimators": self.quality_model.n_estimators,
+            "sklearn_version": sklearn.__version__
+        }
+        self.initialized = True
+        return self.metadata
+
+    def save_models(self) -> Dict:
+        """Persist the fitted scaler and model to the artifact store."""
+        if not self.initialized:
+            raise RuntimeError("No trained models to save")
+        self.metadata = self.store.save(
+            {"scaler": self.scaler, "quality_model": self.quality_model},
+            self.metadata
+        )
+        return self.metadata
+
     def initialize_models(self):
-        """Initialize and train the ML models with synthetic data."""
+        """Load the trained models from the artifact store, memory-mapped."""
         if not self.initialized:
-            X, y = self._generate_synthetic_data()
-            X_scaled = self.scaler.fit_transform(X)
-            self.quality_model.fit(X_scaled, y)
+            if not self.store.exists():
+                raise FileNotFoundError(
+                    f"No model artifact in {self.store.root}; run `python -m app.train` first"
+                )
+            artifacts, self.metadata = self.store.load(mmap_mode="r")
+            self.scaler = artifacts["scaler"]
+            self.quality_model = artifacts["quality_model"]
             self.initialized = True
+            if settings.quality_lut:
+                self.lookup = self.load_lookup_table()
+
+    def load_lookup_table(self) -> Optional[QualityLookupTable]:
+        """Reuse the lookup table saved with this model version, or build one within the error bound and save it.
+
+        Worker processes starting together take a file lock around the
+        build, so one of them builds and the others reuse its table. A build
+        that misses the bound is recorded too, and is not retried on later
+        starts unless the lookup table settings change.
+        """
+        build = {
+            "content_hash": self.metadata.get("content_hash"),
+            "points": settings.quality_lut_points,
+            "max_points": settings.quality_lut_max_points,
+            "quantile": settings.quality_lut_error_quantile
+        }
+        saved = self._saved_lookup_table(build)
+        if saved is not False:
+            return saved
+
+        with _build_lock(os.path.join(self.store.root, QualityLookupTable.LOCK_FILE)):
+            saved = self._saved_lookup_table(build)  # Another worker may have finished first
+            if saved is not False:
+                return saved
+
+            table, self.lookup_stats = QualityLookupTable.fit(
+                self._predict_exact,
+                self.PARAMETER_BOUNDS,
+                tool_types=len(self.TOOL_TYPE_ENCODING),
+                points=settings.quality_lut_points,
+                max_points=settings.quality_lut_max_points,
+                max_error=settings.quality_lut_max_error,
+                quantile=settings.quality_lut_error_quantile,
+                seed=settings.model_seed
+            )
+            try:
+                if table is None:
+                    QualityLookupTable.save_failure(self.store.root, {**self.lookup_stats, "build": build})
+                    return None
+                table.metadata["content_hash"] = build["content_hash"]
+                table.save(self.store.root)
+            except OSError:
+                return table  # Read-only model directory: serve the in-memory table
+        # Reopen memory-mapped so every worker shares the same pages
+        return QualityLookupTable.load(self.store.root, mmap=settings.quality_lut_mmap) or table
+
+    def _saved_lookup_table(self, build: Dict):
+        """The saved table if it meets the error bound, None if a saved failure rules one out, False to build"""
+        error_key = f"p{settings.quality_lut_error_quantile:g}"
+        table = QualityLookupTable.load(self.store.root, mmap=settings.quality_lut_mmap)
+        if table is not None and table.metadata.get("content_hash") == build["content_hash"]:
+            final = table.metadata.get("attempts", [{}])[-1]
+            if final.get(error_key, np.inf) <= settings.quality_lut_max_error:
+                self.lookup_stats = table.metadata
+                return table
+
+        # The same build already missed a bound at least as loose as this one
+        failure = QualityLookupTable.load_failure(self.store.root)
+        if failure is not None and failure.get("build") == build and settings.quality_lut_max_error <= failure["max_error"]:
+            self.lookup_stats = failure
+            return None
+        return False
+
+    @classmethod
+    def encode_features(cls, parameters: List[Dict]) -> np.ndarray:
+        """Build the (n, 4) feature matrix for a list of parameter dicts."""
+        try:
+            return np.array([
+                [
+                    p["cutting_speed"],
+                    p["feed_rate"],
+                    p["depth_of_cut"],
+                    cls.TOOL_TYPE_ENCODING[p["tool_type"]]
+                ]
+                for p in parameters
+            ], dtype=np.float64)
+        except KeyError as e:
+            raise ValueError(f"Unknown tool type or missing parameter: {e}")
 
     def predict_quality(self, parameters: Dict) -> float:
         """Predict quality score for given manufacturing parameters."""
+        features = self.encode_features([parameters])
+        return float(self.predict_quality_batch(features)[0])
+
+    def predict_quality_batch(self, features: np.ndarray) -> np.ndarray:
+        """Predict quality scores for an (n, 4) feature matrix in one model or lookup table call."""
         if not self.initialized:
             self.initialize_models()
 
-        # Convert parameters to feature vector
-        tool_type_encoding = {
-            "carbide": 0,
-            "high_speed_steel": 1,
-            "diamond": 2
-        }
-
-        features = np.array([[
-            parameters["cutting_speed"],
-            parameters["feed_rate"],
-            parameters["depth_of_cut"],
-            tool_type_encoding[parameters["tool_type"]]
-        ]])
+        if self.lookup is None:
+            return self._predict_exact(features)
+        inside = self.lookup.covers(features)
+        if inside.all():
+            return self.lookup.predict(features)
+        # Rows outside the table fall back to the forest
+        predictions = np.empty(len(features))
+        predictions[inside] = self.lookup.predict(features[inside])
+        predictions[~inside] = self._predict_exact(features[~inside])
+        return predictions
 
-        # Scale features and predict
+    def _predict_exact(self, features: np.ndarray) -> np.ndarray:
+        """Scale features and run the forest"""
         features_scaled = self.scaler.transform(features)
-        predicted_quality = self.quality_model.predict(features_scaled)[0]
-        return float(predicted_quality)
+        return self.quality_model.predict(features_scaled)
 
-    def optimize_parameters(self, current_params: Dict) -> Dict:
+    def optimize_parameters(self, current_params: Dict, budget: Optional[int] = None) -> Dict:
         """Suggest optimized parameters based on current settings."""
         if not self.initialized:
             self.initialize_models()
 
-        # Generate a grid of potential parameters around current values
-        n_variations = 50
-        variations = []
-        base_cutting_speed = current_params["cutting_speed"]
-        base_feed_rate = current_params["feed_rate"]
-        base_depth = current_params["depth_of_cut"]
-
-        for _ in range(n_variations):
-            params = {
-                "cutting_speed": max(50, min(200, base_cutting_speed + np.random.uniform(-20, 20))),
-                "feed_rate": max(0.1, min(0.5, base_feed_rate + np.random.uniform(-0.1, 0.1))),
-                "depth_of_cut": max(0.5, min(5.0, base_depth + np.random.uniform(-0.5, 0.5))),
-                "tool_type": current_params["tool_type"]
-            }
-            quality = self.predict_quality(params)
-            variations.append((quality, params))
+        tool_code = self.TOOL_TYPE_ENCODING[current_params["tool_type"]]
+
+        def score(candidates: np.ndarray) -> np.ndarray:
+            features = np.column_stack([candidates, np.full(len(candidates), tool_code)])
+            return self.predict_quality_batch(features)
 
-        # Find best parameters
-        best_quality, best_params = max(variations, key=lambda x: x[0])
+        # Search the parameter bounds, starting from the current settings
+        optimizer = BatchedParameterOptimizer(
+            score,
+            lower=self.PARAMETER_BOUNDS[:, 0],
+            upper=self.PARAMETER_BOUNDS[:, 1],
+            budget=budget or settings.optimizer_budget,
+            population=settings.optimizer_population
+        )
+        x0 = np.array([
+            current_params["cutting_speed"],
+            current_params["feed_rate"],
+            current_params["depth_of_cut"]
+        ])
+        result = optimizer.optimize(x0, spread=self.SEARCH_SPREAD)
+
+        best = result["best"]
         return {
-            "optimized_parameters": best_params,
-            "predicted_quality": best_quality
+            "optimized_parameters": {
+                "cutting_speed": float(best[0]),
+                "feed_rate": float(best[1]),
+                "depth_of_cut": float(best[2]),
+                "tool_type": current_params["tool_type"]
+            },
+            "predicted_quality": result["best_score"],
+            "convergence": result["stats"]
         }
 
     def detect_anomalies(self, parameters: Dict, actual_quality: float) -> Dict:
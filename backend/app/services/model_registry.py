@@ -0,0 +1,99 @@
+# backend/app/services/model_registry.py
+
+import json
+import os
+import re
+import tempfile
+from typing import Dict, List, Optional
+
+from .model_store import ModelArtifactStore
+
+class ModelRegistry:
+    """Directory of versioned model artifacts with an atomically switched active pointer.
+
+    Layout::
+
+        <root>/versions/v0001/{model.joblib,metadata.json}
+        <root>/versions/v0002/...
+        <root>/ACTIVE            {"version": "v0002"}
+
+    A bundle written by an older release directly under ``<root>`` is
+    served as the ``legacy`` version until a registered version is activated.
+    """
+
+    VERSIONS_DIR = "versions"
+    ACTIVE_FILE = "ACTIVE"
+    LEGACY_VERSION = "legacy"
+    _VERSION_NAME = re.compile(r"^v(\d+)$")
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @property
+    def versions_dir(self) -> str:
+        return os.path.join(self.root, self.VERSIONS_DIR)
+
+    @property
+    def active_path(self) -> str:
+        return os.path.join(self.root, self.ACTIVE_FILE)
+
+    def create_version(self) -> str:
+        """Reserve the next version number; the directory is empty until a bundle is saved into it"""
+        os.makedirs(self.versions_dir, exist_ok=True)
+        while True:
+            numbers = [int(m.group(1)) for m in map(self._VERSION_NAME.match, os.listdir(self.versions_dir)) if m]
+            version = f"v{max(numbers, default=0) + 1:04d}"
+            try:
+                os.mkdir(os.path.join(self.versions_dir, version))
+                return version
+            except FileExistsError:
+                continue  # Another trainer took this number
+
+    def store(self, version: str) -> ModelArtifactStore:
+        if version == self.LEGACY_VERSION:
+            return ModelArtifactStore(self.root)
+        if not self._VERSION_NAME.match(version):
+            raise ValueError(f"Invalid model version: {version}")
+        return ModelArtifactStore(os.path.join(self.versions_dir, version))
+
+    def exists(self, version: str) -> bool:
+        try:
+            return self.store(version).exists()
+        except ValueError:
+            return False
+
+    def versions(self) -> List[Dict]:
+        """List complete versions with their metadata, oldest first"""
+        versions = []
+        if os.path.isdir(self.versions_dir):
+            names = [name for name in os.listdir(self.versions_dir) if self._VERSION_NAME.match(name)]
+            for name in sorted(names, key=lambda n: int(n[1:])):
+                store = self.store(name)
+                if store.exists():
+                    versions.append({"version": name, **store.load_metadata()})
+        if ModelArtifactStore(self.root).exists():
+            versions.insert(0, {"version": self.LEGACY_VERSION, **ModelArtifactStore(self.root).load_metadata()})
+        return versions
+
+    def active_version(self) -> Optional[str]:
+        if os.path.exists(self.active_path):
+            with open(self.active_path) as f:
+                return json.load(f)["version"]
+        if ModelArtifactStore(self.root).exists():
+            return self.LEGACY_VERSION
+        return None
+
+    def active_store(self) -> ModelArtifactStore:
+        """Store of the active version, or the registry root when nothing has been trained yet"""
+        version = self.active_version()
+        return self.store(version) if version else ModelArtifactStore(self.root)
+
+    def activate(self, version: str):
+        """Point ACTIVE at a complete version with a single atomic rename"""
+        if not self.exists(version):
+            raise FileNotFoundError(f"Model version {version} not found")
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".active.tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"version": version}, f)
+        os.replace(tmp_path, self.active_path)
@@ -0,0 +1,117 @@
+# backend/app/services/model_store.py
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+class ModelArtifactStore:
+    """Directory holding one fitted model bundle plus its metadata.
+
+    The bundle is written uncompressed with joblib so that it can be loaded
+    with ``mmap_mode`` and its arrays served from the shared page cache.
+
+    Bundles are content-addressed (``model-<hash>.joblib``) and the metadata
+    names the one it describes, so replacing the metadata is the single
+    atomic step of a save. A reader always sees a matching pair: the previous
+    bundle is kept until the next save for readers that hold the old metadata.
+    """
+
+    ARTIFACT_FILE = "model.joblib"  # Fixed name written before bundles were content-addressed
+    METADATA_FILE = "metadata.json"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @property
+    def artifact_path(self) -> str:
+        """Bundle named by the current metadata"""
+        return self._artifact_path(self.load_metadata())
+
+    @property
+    def metadata_path(self) -> str:
+        return os.path.join(self.root, self.METADATA_FILE)
+
+    def _artifact_path(self, metadata: Dict) -> str:
+        return os.path.join(self.root, metadata.get("artifact", self.ARTIFACT_FILE))
+
+    def exists(self) -> bool:
+        """Check whether a complete artifact has been written"""
+        try:
+            return os.path.exists(self.artifact_path)
+        except FileNotFoundError:
+            return False
+
+    def save(self, artifacts: Dict[str, Any], metadata: Optional[Dict] = None) -> Dict:
+        """Write the bundle, then switch the metadata to it with one atomic rename"""
+        import joblib  # Deferred: only trainers and model workers pay for joblib and scikit-learn
+
+        os.makedirs(self.root, exist_ok=True)
+        previous = self.load_metadata().get("artifact") if os.path.exists(self.metadata_path) else None
+
+        fd, tmp_artifact = tempfile.mkstemp(dir=self.root, suffix=".joblib.tmp")
+        os.close(fd)
+        try:
+            joblib.dump(artifacts, tmp_artifact)
+            content_hash = self._hash_file(tmp_artifact)
+            artifact = f"model-{content_hash[:16]}.joblib"
+            os.replace(tmp_artifact, os.path.join(self.root, artifact))
+        finally:
+            if os.path.exists(tmp_artifact):
+                os.remove(tmp_artifact)
+
+        metadata = dict(metadata or {})
+        metadata.update({
+            "content_hash": content_hash,
+            "artifact": artifact,
+            "created_at": datetime.utcnow().isoformat(),
+            "components": sorted(artifacts)
+        })
+        self._write_json(self.metadata_path, metadata)
+        self._remove_stale_artifacts(keep={artifact, previous})
+        return metadata
+
+    def load(self, mmap_mode: Optional[str] = "r", verify: bool = True) -> Tuple[Dict[str, Any], Dict]:
+        """Load the bundle and metadata, optionally checking the content hash"""
+        import joblib
+
+        for attempt in range(3):
+            try:
+                metadata = self.load_metadata()
+                path = self._artifact_path(metadata)
+                if verify and self._hash_file(path) != metadata.get("content_hash"):
+                    raise ValueError(f"Model artifact in {self.root} does not match its content hash")
+                return joblib.load(path, mmap_mode=mmap_mode), metadata
+            except FileNotFoundError:
+                # Retried: saves that landed since the metadata was read removed the bundle it named
+                if attempt == 2 or not os.path.exists(self.metadata_path):
+                    raise FileNotFoundError(f"No model artifact found in {self.root}")
+
+    def load_metadata(self) -> Dict:
+        with open(self.metadata_path) as f:
+            return json.load(f)
+
+    def _remove_stale_artifacts(self, keep: set):
+        for path in glob.glob(os.path.join(self.root, "model-*.joblib")) + [os.path.join(self.root, self.ARTIFACT_FILE)]:
+            if os.path.basename(path) not in keep and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # Removed by a concurrent save
+
+    def _write_json(self, path: str, data: Dict):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".json.tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
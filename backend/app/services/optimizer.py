@@ -0,0 +1,185 @@
+# backend/app/services/optimizer.py
+
+import time
+import numpy as np
+from typing import Callable, Dict, Optional
+
+class BatchedParameterOptimizer:
+    """Bounded cross-entropy search that scores each generation in one batched call.
+
+    ``score_fn`` receives an ``(n, d)`` candidate matrix and must return ``n``
+    scores (higher is better), so a whole generation costs a single model
+    dispatch instead of one per candidate.
+    """
+
+    def __init__(
+        self,
+        score_fn: Callable[[np.ndarray], np.ndarray],
+        lower: np.ndarray,
+        upper: np.ndarray,
+        budget: int = 200,
+        population: int = 50,
+        elite_fraction: float = 0.2,
+        tolerance: float = 1e-3,
+        seed: Optional[int] = None
+    ):
+        self.score_fn = score_fn
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.budget = budget
+        self.population = population
+        self.n_elite = max(2, int(population * elite_fraction))
+        self.tolerance = tolerance
+        self.rng = np.random.default_rng(seed)
+
+    def optimize(self, x0: np.ndarray, spread: np.ndarray) -> Dict:
+        """Search for the best candidate starting around x0 with the given initial spread."""
+        start = time.perf_counter()
+        span = self.upper - self.lower
+        mean = np.clip(np.asarray(x0, dtype=np.float64), self.lower, self.upper)
+        sigma = np.asarray(spread, dtype=np.float64).copy()
+
+        best_x, best_score = mean, -np.inf
+        history = []
+        evaluations = 0
+        converged = False
+
+        while evaluations < self.budget:
+            size = min(self.population, self.budget - evaluations)
+            candidates = mean + sigma * self.rng.standard_normal((size, len(mean)))
+            if evaluations == 0:
+                candidates[0] = mean  # Always score the starting point
+            candidates = np.clip(candidates, self.lower, self.upper)
+
+            scores = np.asarray(self.score_fn(candidates), dtype=np.float64)
+            evaluations += size
+
+            top = int(np.argmax(scores))
+            if scores[top] > best_score:
+                best_x, best_score = candidates[top], float(scores[top])
+            history.append(best_score)
+
+            # Refit the sampling distribution to the elite candidates
+            elite = candidates[np.argsort(scores)[-min(self.n_elite, size):]]
+            mean = elite.mean(axis=0)
+            sigma = np.maximum(elite.std(axis=0), span * self.tolerance * 0.1)
+
+            if np.all(sigma / span < self.tolerance):
+                converged = True
+                break
+
+        return {
+            "best": best_x,
+            "best_score": best_score,
+            "stats": {
+                "evaluations": evaluations,
+                "generations": len(history),
+                "batch_calls": len(history),
+                "best_score_history": history,
+                "converged": converged,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)
+            }
+        }
+
+def pareto_front_mask(objectives: np.ndarray, block_size: int = 256) -> np.ndarray:
+    """Boolean mask of the rows no other row Pareto-dominates; all objectives are maximized.
+
+    Rows are visited in descending lexicographic order. A dominating row always
+    sorts ahead of the row it dominates, so each block only needs comparing
+    against the front found so far and against the earlier rows of the block.
+    """
+    objectives = np.asarray(objectives, dtype=np.float64)
+    n, k = objectives.shape
+    order = np.lexsort(objectives.T[::-1])[::-1]
+    sorted_objectives = objectives[order]
+    on_front = np.zeros(n, dtype=bool)
+    front = np.empty((0, k))
+
+    for start in range(0, n, block_size):
+        block = sorted_objectives[start:start + block_size]
+        candidates = np.vstack([front, block])
+        # One 2-D comparison per objective; reducing over a short trailing axis is much slower
+        no_worse = candidates[None, :, 0] >= block[:, 0, None]
+        better = candidates[None, :, 0] > block[:, 0, None]
+        for j in range(1, k):
+            no_worse &= candidates[None, :, j] >= block[:, j, None]
+            better |= candidates[None, :, j] > block[:, j, None]
+        dominated_by = no_worse & better
+        # Within the block only earlier rows can dominate a row
+        dominated_by[:, len(front):] &= np.tri(len(block), k=-1, dtype=bool)
+        survivors = ~dominated_by.any(axis=1)
+        on_front[order[start:start + block_size][survivors]] = True
+        front = np.vstack([front, block[survivors]])
+    return on_front
+
+def non_dominated_sort(objectives: np.ndarray, max_fronts: Optional[int] = None) -> np.ndarray:
+    """Pareto rank of each row, 0 for the first front; rows beyond ``max_fronts`` fronts stay -1"""
+    objectives = np.asarray(objectives, dtype=np.float64)
+    ranks = np.full(len(objectives), -1, dtype=np.int64)
+    remaining = np.arange(len(objectives))
+    rank = 0
+    while len(remaining) and (max_fronts is None or rank < max_fronts):
+        on_front = pareto_front_mask(objectives[remaining])
+        ranks[remaining[on_front]] = rank
+        remaining = remaining[~on_front]
+        rank += 1
+    return ranks
+
+class ParetoFrontSearch:
+    """Samples a bounded parameter space and keeps the non-dominated candidates.
+
+    ``objective_fn`` maps an ``(n, d)`` candidate matrix to ``(n, k)``
+    objective values, all maximized, in one vectorized call. After the
+    initial uniform population, each refinement samples around the current
+    front to fill in the gaps between its points.
+    """
+
+    def __init__(
+        self,
+        objective_fn: Callable[[np.ndarray], np.ndarray],
+        lower: np.ndarray,
+        upper: np.ndarray,
+        population: int = 2048,
+        refinements: int = 1,
+        spread: float = 0.05,
+        seed: Optional[int] = None
+    ):
+        self.objective_fn = objective_fn
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.population = population
+        self.refinements = refinements
+        self.spread = spread
+        self.rng = np.random.default_rng(seed)
+
+    def search(self) -> Dict:
+        start = time.perf_counter()
+        span = self.upper - self.lower
+        candidates = self.lower + span * self.rng.random((self.population, len(span)))
+        objectives = np.asarray(self.objective_fn(candidates), dtype=np.float64)
+        evaluations = len(candidates)
+
+        ranks = non_dominated_sort(objectives, max_fronts=1)
+        for _ in range(self.refinements):
+            front = candidates[ranks == 0]
+            parents = front[self.rng.integers(0, len(front), self.population)]
+            children = np.clip(parents + span * self.spread * self.rng.standard_normal(parents.shape), self.lower, self.upper)
+            child_objectives = np.asarray(self.objective_fn(children), dtype=np.float64)
+            evaluations += len(children)
+
+            # Keep the current front plus the new children, then re-rank
+            candidates = np.vstack([front, children])
+            objectives = np.vstack([objectives[ranks == 0], child_objectives])
+            ranks = non_dominated_sort(objectives, max_fronts=1)
+
+        on_front = ranks == 0
+        return {
+            "candidates": candidates[on_front],
+            "objectives": objectives[on_front],
+            "stats": {
+                "evaluations": evaluations,
+                "front_size": int(on_front.sum()),
+                "refinements": self.refinements,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)
+            }
+        }
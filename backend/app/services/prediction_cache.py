@@ -0,0 +1,114 @@
+# backend/app/services/prediction_cache.py
+
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+class PredictionCache:
+    """Thread-safe LRU cache with TTL for model predictions.
+
+    Keys quantize the numeric parameters so that dashboards sending
+    near-identical values share an entry. Only results that do not change
+    within a quantization step may use those keys; anything that compares a
+    parameter against a threshold or echoes it back is keyed exactly.
+    """
+
+    DEFAULT_QUANTIZATION = {
+        "cutting_speed": 0.5,
+        "feed_rate": 0.001,
+        "depth_of_cut": 0.01
+    }
+
+    def __init__(
+        self,
+        max_size: int = 4096,
+        ttl_seconds: float = 30.0,
+        quantization: Optional[Dict[str, float]] = None
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.quantization = quantization or dict(self.DEFAULT_QUANTIZATION)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, method: str, parameters: Dict, stage: Optional[str], model_version: str, exact: bool = False) -> Tuple:
+        """Build a cache key from quantized (or exact) parameters, tool type, stage and model version"""
+        if exact:
+            values = tuple(float(parameters[name]) for name in self.quantization)
+        else:
+            values = tuple(int(round(parameters[name] / step)) for name, step in self.quantization.items())
+        return (method, values, parameters.get("tool_type"), stage, model_version, exact)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and storing it on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+
+        # Compute outside the lock so slow models do not serialize other lookups
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+def cached_prediction(
+    fn: Optional[Callable] = None, *, exact: bool = False, version: Optional[Callable[[Any], str]] = None
+) -> Callable:
+    """Route a ``method(self, parameters, [stage])`` call through ``self.cache``.
+
+    Use ``@cached_prediction(exact=True)`` for results that depend on the exact
+    parameter values, and ``version=`` for results of a model that changes
+    independently of ``self.model_version``. Callers get their own copy, so
+    mutating a result never changes what the next caller is served.
+    """
+    if fn is None:
+        return functools.partial(cached_prediction, exact=exact, version=version)
+
+    @functools.wraps(fn)
+    def wrapper(self, parameters: Dict, *args):
+        cache = getattr(self, "cache", None)
+        if cache is None:
+            return fn(self, parameters, *args)
+        stage = args[0] if args else None
+        model_version = self.model_version if version is None else version(self)
+        key = cache.make_key(fn.__name__, parameters, stage, model_version, exact)
+        return copy.deepcopy(cache.get_or_compute(key, lambda: fn(self, parameters, *args)))
+    return wrapper
@@ -0,0 +1,190 @@
+# backend/app/services/quality_lut.py
+
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+# The 8 corners of a grid cell as (speed, feed, depth) index offsets
+_CORNERS = np.array([[dx, dy, dz] for dx in (0, 1) for dy in (0, 1) for dz in (0, 1)])
+
+def _write_json(path: str, content: Dict):
+    """Replace a JSON file atomically"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".json.tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(content, f, indent=2)
+    os.replace(tmp_path, path)
+
+class QualityLookupTable:
+    """Quality model precomputed on a dense (tool_type, speed, feed, depth) grid.
+
+    The grid is a float32 array with one ``points^3`` block per tool type
+    code, answered with vectorized trilinear interpolation: eight gathers and
+    a weighted sum per row instead of a walk down every tree of the forest.
+    Saved next to the model artifact, it is memory-mapped by every worker so
+    the table's pages are shared through the OS page cache.
+    """
+
+    GRID_FILE = "quality_lut.npy"
+    METADATA_FILE = "quality_lut.json"
+    FAILURE_FILE = "quality_lut.failed.json"  # Stats of a build that missed the error bound
+    LOCK_FILE = "quality_lut.lock"
+    VALIDATION_SAMPLES = 20_000
+
+    def __init__(self, grid: np.ndarray, bounds: np.ndarray, metadata: Optional[Dict] = None):
+        self.grid = grid
+        self.bounds = np.asarray(bounds, dtype=np.float64)
+        self.metadata = metadata or {}
+        self.tool_types = grid.shape[0]
+        self._flat = grid.reshape(-1)
+        self._last_cell = np.array(grid.shape[1:]) - 2
+        self._scale = (np.array(grid.shape[1:]) - 1) / (self.bounds[:, 1] - self.bounds[:, 0])
+        strides = np.array(grid.strides) // grid.itemsize
+        self._tool_stride = int(strides[0])
+        self._strides = strides[1:]
+        self._corner_offsets = _CORNERS @ self._strides
+
+    @property
+    def points(self) -> int:
+        return self.grid.shape[1]
+
+    @classmethod
+    def build(cls, predict: Callable[[np.ndarray], np.ndarray], bounds: np.ndarray, tool_types: int, points: int) -> "QualityLookupTable":
+        """Evaluate ``predict`` on every grid node, one tool type per batch"""
+        if points < 2:
+            raise ValueError("A lookup table needs at least 2 points per axis")
+        bounds = np.asarray(bounds, dtype=np.float64)
+        axes = [np.linspace(low, high, points) for low, high in bounds]
+        nodes = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, len(axes))
+        grid = np.empty((tool_types, points, points, points), dtype=np.float32)
+        for code in range(tool_types):
+            features = np.column_stack([nodes, np.full(len(nodes), code, dtype=np.float64)])
+            grid[code] = np.asarray(predict(features)).reshape(points, points, points)
+        return cls(grid, bounds, {"points": points})
+
+    @classmethod
+    def fit(
+        cls,
+        predict: Callable[[np.ndarray], np.ndarray],
+        bounds: np.ndarray,
+        tool_types: int,
+        points: int,
+        max_points: int,
+        max_error: float,
+        quantile: float = 99.0,
+        seed: Optional[int] = None
+    ) -> Tuple[Optional["QualityLookupTable"], Dict]:
+        """Build the coarsest table within ``max_error`` of the exact model.
+
+        The error is the ``quantile`` of the absolute difference on random
+        in-bounds samples. Each attempt that misses the bound halves the grid
+        spacing until ``max_points`` is exceeded; then no table is returned
+        and callers keep using the exact model.
+        """
+        start = time.perf_counter()
+        attempts = []
+        while True:
+            table = cls.build(predict, bounds, tool_types, points)
+            errors = table.error_stats(predict, seed=seed, quantiles=(50, 90, quantile))
+            attempts.append({"points": points, **errors})
+            if errors[f"p{quantile:g}"] <= max_error:
+                break
+            if 2 * points - 1 > max_points:
+                table = None
+                break
+            points = 2 * points - 1  # Keeps the previous nodes on the finer grid
+
+        stats = {
+            "enabled": table is not None,
+            "max_error": max_error,
+            "quantile": quantile,
+            "attempts": attempts,
+            "build_seconds": round(time.perf_counter() - start, 3)
+        }
+        if table is not None:
+            table.metadata.update(stats)
+        return table, stats
+
+    def covers(self, features: np.ndarray) -> np.ndarray:
+        """Rows inside the grid bounds with a known tool type code"""
+        x = features[:, :3]
+        codes = features[:, 3]
+        return (
+            ((x >= self.bounds[:, 0]) & (x <= self.bounds[:, 1])).all(axis=1)
+            & (codes >= 0) & (codes < self.tool_types) & (codes == np.floor(codes))
+        )
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Trilinear interpolation for an (n, 4) feature matrix; rows must satisfy ``covers``"""
+        position = (features[:, :3] - self.bounds[:, 0]) * self._scale
+        cell = np.clip(position.astype(np.int64), 0, self._last_cell)
+        fraction = position - cell
+
+        base = features[:, 3].astype(np.int64) * self._tool_stride + cell @ self._strides
+        values = self._flat[base[:, None] + self._corner_offsets]
+        weights = np.where(_CORNERS[None, :, :] == 1, fraction[:, None, :], 1.0 - fraction[:, None, :]).prod(axis=2)
+        return (values * weights).sum(axis=1)
+
+    def error_stats(
+        self,
+        predict: Callable[[np.ndarray], np.ndarray],
+        samples: int = VALIDATION_SAMPLES,
+        seed: Optional[int] = None,
+        quantiles: Tuple[float, ...] = (50, 90, 99)
+    ) -> Dict:
+        """Absolute error against the exact model on uniformly random in-bounds samples"""
+        rng = np.random.default_rng(seed)
+        low, high = self.bounds[:, 0], self.bounds[:, 1]
+        features = np.column_stack([
+            low + (high - low) * rng.random((samples, len(low))),
+            rng.integers(0, self.tool_types, samples)
+        ])
+        errors = np.abs(self.predict(features) - np.asarray(predict(features)))
+        stats = {"samples": samples, "mean": float(errors.mean()), "max": float(errors.max())}
+        for q, value in zip(quantiles, np.percentile(errors, quantiles)):
+            stats[f"p{q:g}"] = float(value)
+        return stats
+
+    def save(self, root: str):
+        """Write the grid and metadata next to a model artifact, replacing any previous table atomically"""
+        fd, tmp_grid = tempfile.mkstemp(dir=root, suffix=".npy.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(self.grid))
+            os.replace(tmp_grid, os.path.join(root, self.GRID_FILE))
+        finally:
+            if os.path.exists(tmp_grid):
+                os.remove(tmp_grid)
+
+        _write_json(os.path.join(root, self.METADATA_FILE), {**self.metadata, "bounds": self.bounds.tolist()})
+        failure_path = os.path.join(root, self.FAILURE_FILE)
+        if os.path.exists(failure_path):
+            os.remove(failure_path)
+
+    @classmethod
+    def save_failure(cls, root: str, stats: Dict):
+        """Record a build that missed the error bound, so later starts can skip rebuilding it"""
+        _write_json(os.path.join(root, cls.FAILURE_FILE), stats)
+
+    @classmethod
+    def load_failure(cls, root: str) -> Optional[Dict]:
+        path = os.path.join(root, cls.FAILURE_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    @classmethod
+    def load(cls, root: str, mmap: bool = True) -> Optional["QualityLookupTable"]:
+        """Load a saved table, or None when there is none"""
+        grid_path = os.path.join(root, cls.GRID_FILE)
+        metadata_path = os.path.join(root, cls.METADATA_FILE)
+        if not (os.path.exists(grid_path) and os.path.exists(metadata_path)):
+            return None
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+        grid = np.load(grid_path, mmap_mode="r" if mmap else None)
+        return cls(grid, np.array(metadata.pop("bounds")), metadata)
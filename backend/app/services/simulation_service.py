@@ -0,0 +1,149 @@
+# backend/app/services/simulation_service.py
+
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+from ..utils.metrics import timed
+from .enhanced_ml_service import EnhancedManufacturingMLService
+
+class MachiningSimulationService:
+    """Columnar machining simulation over many parameter sets at once."""
+
+    NUMERIC_PARAMETERS = ("cutting_speed", "feed_rate", "depth_of_cut")
+
+    # Monte Carlo noise model. Speed, feed and depth are relative deviations of
+    # the actual from the commanded value; the rest are additive, with the same
+    # spread as the single-sample simulation and quality heuristics.
+    NOISE_FACTORS = ("operation_time", "cutting_speed", "feed_rate", "depth_of_cut", "surface_quality", "dimensional_accuracy")
+    NOISE_STD = np.array([2.0, 0.02, 0.02, 0.03, 5.0, 4.0])
+    NOISE_CORRELATION = np.array([
+        # time  speed  feed  depth  surface  dimensional
+        [1.0,   0.0,   0.0,   0.2,   0.0,   0.0],   # operation_time: deeper cuts run long
+        [0.0,   1.0,   0.3,   0.0,  -0.2,   0.0],   # cutting_speed: spindle and feed drives drift together
+        [0.0,   0.3,   1.0,   0.0,  -0.4,  -0.2],   # feed_rate: fast feeds roughen the surface
+        [0.2,   0.0,   0.0,   1.0,  -0.3,  -0.3],   # depth_of_cut: deflection costs finish and accuracy
+        [0.0,  -0.2,  -0.4,  -0.3,   1.0,   0.5],   # surface_quality: chatter hurts both quality metrics
+        [0.0,   0.0,  -0.2,  -0.3,   0.5,   1.0],   # dimensional_accuracy
+    ])
+    MONTE_CARLO_METRICS = ("operation_time", "energy_consumption", "tool_wear", "surface_quality", "dimensional_accuracy", "overall_quality")
+
+    def __init__(self, ml_service: EnhancedManufacturingMLService):
+        self.ml_service = ml_service
+        # Factor once; every Monte Carlo run maps standard normals through it
+        self._noise_factor = np.linalg.cholesky(self.NOISE_CORRELATION) * self.NOISE_STD[:, None]
+
+    def parameters_to_columns(self, parameters: List[Dict]) -> Dict[str, np.ndarray]:
+        """Convert a list of parameter dicts into per-parameter arrays."""
+        columns = {
+            name: np.fromiter((p[name] for p in parameters), dtype=np.float64, count=len(parameters))
+            for name in self.NUMERIC_PARAMETERS
+        }
+        columns["tool_type"] = np.array([p["tool_type"] for p in parameters], dtype=object)
+        return columns
+
+    @timed("simulation.simulate_batch")
+    def simulate_batch(self, columns: Dict[str, np.ndarray]) -> Dict:
+        """Simulate every parameter set in one vectorized pass."""
+        n = len(columns["cutting_speed"])
+
+        # Calculate basic metrics, adjusted by parameters
+        operation_time = 30 + np.random.normal(0, 2, n)
+        speed_factor = columns["cutting_speed"] / 100.0
+        feed_factor = columns["feed_rate"] / 0.2
+        operation_time = operation_time * (1 / speed_factor) * (1 / feed_factor)
+
+        # Get ML predictions for the whole batch
+        quality_metrics = self.ml_service.predict_quality_batch(columns)
+        maintenance_metrics = self.ml_service.predict_maintenance_batch(columns)
+        optimization_data = self.ml_service.optimize_parameters_batch(columns)
+        anomaly_data = self.ml_service.detect_anomalies_batch(columns)
+
+        # Calculate energy consumption (kWh)
+        energy_consumption = operation_time / 60 * columns["cutting_speed"] * columns["depth_of_cut"] * 0.1
+
+        # Calculate tool wear (0-100%)
+        tool_wear = np.minimum(100, (
+            operation_time / 240 *
+            (columns["cutting_speed"] / 100) *
+            (columns["depth_of_cut"] / 2) *
+            100
+        ))
+
+        return {
+            "count": n,
+            "operation_time": np.round(operation_time, 2),
+            "quality_metrics": quality_metrics,
+            "maintenance_metrics": maintenance_metrics,
+            "energy_consumption": np.round(energy_consumption, 2),
+            "tool_wear": np.round(tool_wear, 2),
+            "optimization_suggestions": optimization_data,
+            "anomaly_detection": anomaly_data
+        }
+
+    def draw_noise(self, samples: int, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+        """Draw correlated noise for every NOISE_FACTORS entry in one matrix product"""
+        noise = rng.standard_normal((samples, len(self.NOISE_FACTORS))) @ self._noise_factor.T
+        return {name: noise[:, i] for i, name in enumerate(self.NOISE_FACTORS)}
+
+    @timed("simulation.monte_carlo")
+    def monte_carlo(
+        self,
+        parameters: Dict,
+        samples: int = 10_000,
+        seed: Optional[int] = None,
+        percentiles: Sequence[float] = (5, 50, 90, 95, 99),
+        bins: int = 30
+    ) -> Dict:
+        """Simulate one parameter set ``samples`` times and summarize the outcome distributions.
+
+        Without a seed a fresh one is drawn and returned, so any result can be
+        reproduced by passing the reported seed back in.
+        """
+        if samples < 1:
+            raise ValueError("At least one sample is required")
+        if any(not 0 <= q <= 100 for q in percentiles):
+            raise ValueError("Percentiles must be between 0 and 100")
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % 2**63)
+        rng = np.random.default_rng(seed)
+        noise = self.draw_noise(samples, rng)
+
+        cutting_speed = parameters["cutting_speed"] * (1 + noise["cutting_speed"])
+        feed_rate = parameters["feed_rate"] * (1 + noise["feed_rate"])
+        depth_of_cut = parameters["depth_of_cut"] * (1 + noise["depth_of_cut"])
+
+        # Same process model as simulate_batch, evaluated on the perturbed parameters
+        operation_time = (30 + noise["operation_time"]) * (100.0 / cutting_speed) * (0.2 / feed_rate)
+        energy_consumption = operation_time / 60 * cutting_speed * depth_of_cut * 0.1
+        tool_wear = np.minimum(100, operation_time / 240 * (cutting_speed / 100) * (depth_of_cut / 2) * 100)
+        surface_quality = 85 + noise["surface_quality"]
+        dimensional_accuracy = 88 + noise["dimensional_accuracy"]
+
+        outcomes = np.column_stack([
+            operation_time, energy_consumption, tool_wear,
+            surface_quality, dimensional_accuracy, (surface_quality + dimensional_accuracy) / 2
+        ])
+        quantiles = np.percentile(outcomes, percentiles, axis=0)
+        means = outcomes.mean(axis=0)
+        stds = outcomes.std(axis=0)
+        lows = outcomes.min(axis=0)
+        highs = outcomes.max(axis=0)
+
+        metrics = {}
+        for i, name in enumerate(self.MONTE_CARLO_METRICS):
+            counts, edges = np.histogram(outcomes[:, i], bins=bins)
+            metrics[name] = {
+                "mean": float(means[i]),
+                "std": float(stds[i]),
+                "min": float(lows[i]),
+                "max": float(highs[i]),
+                "percentiles": {f"p{q:g}": float(value) for q, value in zip(percentiles, quantiles[:, i])},
+                "histogram": {"edges": edges, "counts": counts}
+            }
+
+        return {
+            "samples": samples,
+            "seed": seed,
+            "parameters": parameters,
+            "metrics": metrics
+        }
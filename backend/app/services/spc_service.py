@@ -0,0 +1,343 @@
+# backend/app/services/spc_service.py
+
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Control chart constants for X-bar/R charts by subgroup size
+_SUBGROUP_CONSTANTS = {
+    2: {"A2": 1.880, "D3": 0.0, "D4": 3.267, "d2": 1.128},
+    3: {"A2": 1.023, "D3": 0.0, "D4": 2.574, "d2": 1.693},
+    4: {"A2": 0.729, "D3": 0.0, "D4": 2.282, "d2": 2.059},
+    5: {"A2": 0.577, "D3": 0.0, "D4": 2.114, "d2": 2.326},
+    6: {"A2": 0.483, "D3": 0.0, "D4": 2.004, "d2": 2.534},
+    7: {"A2": 0.419, "D3": 0.076, "D4": 1.924, "d2": 2.704},
+    8: {"A2": 0.373, "D3": 0.136, "D4": 1.864, "d2": 2.847},
+    9: {"A2": 0.337, "D3": 0.184, "D4": 1.816, "d2": 2.970},
+    10: {"A2": 0.308, "D3": 0.223, "D4": 1.777, "d2": 3.078}
+}
+
+class FeatureAccumulator:
+    """Streaming SPC state for one feature; every update and query is O(1).
+
+    Keeps Welford mean/variance over individuals, an X-bar/R chart over
+    fixed-size subgroups, an EWMA and a tabular CUSUM around the nominal.
+    """
+
+    def __init__(
+        self,
+        subgroup_size: int = 5,
+        ewma_lambda: float = 0.2,
+        ewma_width: float = 3.0,
+        cusum_k: float = 0.5,
+        cusum_h: float = 5.0,
+        min_subgroups: int = 5
+    ):
+        self.constants = _SUBGROUP_CONSTANTS[subgroup_size]
+        self.subgroup_size = subgroup_size
+        self.ewma_lambda = ewma_lambda
+        self.ewma_width = ewma_width
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.min_subgroups = min_subgroups
+
+        # Individuals (Welford)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.last_value: Optional[float] = None
+
+        # Specification from the most recent measurement
+        self.nominal: Optional[float] = None
+        self.usl: Optional[float] = None
+        self.lsl: Optional[float] = None
+
+        # X-bar/R subgroups
+        self._subgroup_count = 0
+        self._subgroup_min = math.inf
+        self._subgroup_max = -math.inf
+        self._subgroup_sum = 0.0
+        self.subgroups = 0
+        self.grand_mean = 0.0
+        self.range_sum = 0.0
+
+        # EWMA and CUSUM
+        self.ewma: Optional[float] = None
+        self.cusum_high = 0.0
+        self.cusum_low = 0.0
+
+        self.violations = {
+            "out_of_spec": 0,
+            "xbar": 0,
+            "range": 0,
+            "ewma": 0,
+            "cusum_high": 0,
+            "cusum_low": 0
+        }
+
+    @property
+    def std(self) -> Optional[float]:
+        """Overall (long-term) standard deviation"""
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else None
+
+    @property
+    def r_bar(self) -> Optional[float]:
+        return self.range_sum / self.subgroups if self.subgroups else None
+
+    @property
+    def sigma_within(self) -> Optional[float]:
+        """Short-term standard deviation estimated from the average subgroup range"""
+        r_bar = self.r_bar
+        if r_bar:
+            return r_bar / self.constants["d2"]
+        return self.std
+
+    @property
+    def center(self) -> float:
+        return self.nominal if self.nominal is not None else self.mean
+
+    def update(self, value: float, nominal: Optional[float] = None, usl: Optional[float] = None, lsl: Optional[float] = None):
+        """Fold one measurement into every statistic"""
+        if nominal is not None:
+            self.nominal = nominal
+        if usl is not None:
+            self.usl = usl
+        if lsl is not None:
+            self.lsl = lsl
+
+        # Welford running mean and variance
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+        self.last_value = value
+
+        if (self.usl is not None and value > self.usl) or (self.lsl is not None and value < self.lsl):
+            self.violations["out_of_spec"] += 1
+
+        sigma = self.sigma_within
+        self._update_ewma(value, sigma)
+        self._update_cusum(value, sigma)
+        self._update_subgroup(value)
+
+    def _update_ewma(self, value: float, sigma: Optional[float]):
+        lam = self.ewma_lambda
+        self.ewma = value if self.ewma is None else lam * value + (1 - lam) * self.ewma
+        limits = self.ewma_limits(sigma)
+        if limits and not (limits[0] <= self.ewma <= limits[1]):
+            self.violations["ewma"] += 1
+
+    def ewma_limits(self, sigma: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        sigma = self.sigma_within if sigma is None else sigma
+        if not sigma or self.subgroups < self.min_subgroups:
+            return None
+        lam = self.ewma_lambda
+        spread = self.ewma_width * sigma * math.sqrt(lam / (2 - lam) * (1 - (1 - lam) ** (2 * self.n)))
+        return (self.center - spread, self.center + spread)
+
+    def _update_cusum(self, value: float, sigma: Optional[float]):
+        if not sigma or self.subgroups < self.min_subgroups:
+            return
+        k, h = self.cusum_k * sigma, self.cusum_h * sigma
+        self.cusum_high = max(0.0, self.cusum_high + value - self.center - k)
+        self.cusum_low = max(0.0, self.cusum_low + self.center - value - k)
+        # Signal and restart the statistic once it crosses the decision interval
+        if self.cusum_high > h:
+            self.violations["cusum_high"] += 1
+            self.cusum_high = 0.0
+        if self.cusum_low > h:
+            self.violations["cusum_low"] += 1
+            self.cusum_low = 0.0
+
+    def _update_subgroup(self, value: float):
+        self._subgroup_count += 1
+        self._subgroup_sum += value
+        self._subgroup_min = min(self._subgroup_min, value)
+        self._subgroup_max = max(self._subgroup_max, value)
+        if self._subgroup_count < self.subgroup_size:
+            return
+
+        subgroup_mean = self._subgroup_sum / self._subgroup_count
+        subgroup_range = self._subgroup_max - self._subgroup_min
+        self._subgroup_count = 0
+        self._subgroup_sum = 0.0
+        self._subgroup_min, self._subgroup_max = math.inf, -math.inf
+
+        # Check against the limits established before this subgroup
+        limits = self.xbar_r_limits()
+        if limits:
+            if not (limits["xbar_lcl"] <= subgroup_mean <= limits["xbar_ucl"]):
+                self.violations["xbar"] += 1
+            if not (limits["r_lcl"] <= subgroup_range <= limits["r_ucl"]):
+                self.violations["range"] += 1
+
+        self.subgroups += 1
+        self.grand_mean += (subgroup_mean - self.grand_mean) / self.subgroups
+        self.range_sum += subgroup_range
+
+    def xbar_r_limits(self) -> Optional[Dict[str, float]]:
+        if self.subgroups < self.min_subgroups:
+            return None
+        r_bar = self.r_bar
+        c = self.constants
+        return {
+            "xbar_center": self.grand_mean,
+            "xbar_ucl": self.grand_mean + c["A2"] * r_bar,
+            "xbar_lcl": self.grand_mean - c["A2"] * r_bar,
+            "r_center": r_bar,
+            "r_ucl": c["D4"] * r_bar,
+            "r_lcl": c["D3"] * r_bar
+        }
+
+    def _capability(self, sigma: Optional[float]) -> Optional[float]:
+        if not sigma or self.n < 2:
+            return None
+        sides = []
+        if self.usl is not None:
+            sides.append((self.usl - self.mean) / (3 * sigma))
+        if self.lsl is not None:
+            sides.append((self.mean - self.lsl) / (3 * sigma))
+        return min(sides) if sides else None
+
+    def summary(self) -> Dict:
+        ewma_limits = self.ewma_limits()
+        return {
+            "count": self.n,
+            "mean": self.mean,
+            "std": self.std,
+            "sigma_within": self.sigma_within,
+            "last_value": self.last_value,
+            "nominal": self.nominal,
+            "usl": self.usl,
+            "lsl": self.lsl,
+            "cpk": self._capability(self.sigma_within),
+            "ppk": self._capability(self.std),
+            "subgroups": self.subgroups,
+            "xbar_r": self.xbar_r_limits(),
+            "ewma": self.ewma,
+            "ewma_limits": list(ewma_limits) if ewma_limits else None,
+            "cusum_high": self.cusum_high,
+            "cusum_low": self.cusum_low,
+            "violations": dict(self.violations),
+            "in_control": not any(self.violations[name] for name in ("xbar", "range", "ewma", "cusum_high", "cusum_low"))
+        }
+
+class SPCService:
+    """Statistical process control over quality measurements keyed by feature, tool type and stage"""
+
+    def __init__(self, subgroup_size: int = 5):
+        if subgroup_size not in _SUBGROUP_CONSTANTS:
+            raise ValueError(
+                f"Subgroup size must be between {min(_SUBGROUP_CONSTANTS)} and {max(_SUBGROUP_CONSTANTS)}"
+            )
+        self.subgroup_size = subgroup_size
+        self._accumulators: Dict[Tuple[str, str, str], FeatureAccumulator] = {}
+        self._seen: Dict[Tuple[str, str, str], str] = {}
+        self._lock = threading.Lock()
+
+    def _accumulator(self, key: Tuple[str, str, str]) -> FeatureAccumulator:
+        accumulator = self._accumulators.get(key)
+        if accumulator is None:
+            accumulator = self._accumulators.setdefault(key, FeatureAccumulator(self.subgroup_size))
+        return accumulator
+
+    @staticmethod
+    def check_finite(feature: str, *values: Optional[float]):
+        """One NaN or infinity would poison a feature's running mean, EWMA and CUSUM for good"""
+        if not all(math.isfinite(x) for x in values if x is not None):
+            raise ValueError(f"Non-finite measurement for {feature}")
+
+    def record(
+        self,
+        feature: str,
+        value: float,
+        nominal: Optional[float] = None,
+        upper_tolerance: Optional[float] = None,
+        lower_tolerance: Optional[float] = None,
+        tool_type: Optional[str] = None,
+        stage: Optional[str] = None
+    ):
+        """Record one measurement; tolerances are relative to nominal as in QualityMeasurement"""
+        self.check_finite(feature, value, nominal, upper_tolerance, lower_tolerance)
+        key = (feature, tool_type or "unspecified", stage or "unspecified")
+        usl = nominal + upper_tolerance if nominal is not None and upper_tolerance is not None else None
+        lsl = nominal + lower_tolerance if nominal is not None and lower_tolerance is not None else None
+        with self._lock:
+            self._accumulator(key).update(value, nominal, usl, lsl)
+
+    def record_batch(
+        self,
+        features: List[str],
+        values: np.ndarray,
+        nominals: np.ndarray,
+        upper_tolerances: np.ndarray,
+        lower_tolerances: np.ndarray,
+        tool_type: Optional[str] = None,
+        stage: Optional[str] = None
+    ):
+        """Record many measurements, e.g. a bulk CMM upload"""
+        for feature, value, nominal, upper, lower in zip(
+            features, values.tolist(), nominals.tolist(), upper_tolerances.tolist(), lower_tolerances.tolist()
+        ):
+            self.record(feature, value, nominal, upper, lower, tool_type, stage)
+
+    def observe_change(self, change: Dict, stage_name: str):
+        """Feed measurements from a workflow gate_updated change"""
+        if change["type"] != "gate_updated":
+            return
+        gate = change["gate"]
+        for measurement in gate.get("measurements", {}).values():
+            # Gate changes repeat earlier measurements; only count each one once
+            seen_key = (change["stage_id"], gate["name"], measurement["type"])
+            with self._lock:
+                if self._seen.get(seen_key) == measurement["timestamp"]:
+                    continue
+                self._seen[seen_key] = measurement["timestamp"]
+            try:
+                self.record(
+                    f"{gate['name']}/{measurement['type']}",
+                    measurement["value"],
+                    measurement["nominal"],
+                    measurement["upper_tolerance"],
+                    measurement["lower_tolerance"],
+                    measurement.get("tool_type"),
+                    stage_name
+                )
+            except ValueError:
+                continue  # Non-finite gate readings stay out of the charts
+
+    def replay(self, snapshot: Dict, changes: List[Dict]):
+        """Rebuild charts for a recovered workflow from the gate measurements in its snapshot and change tail.
+
+        Bulk CMM runs are not part of the workflow log (gates keep only their
+        summary), so only individually recorded gate measurements come back.
+        """
+        names = {stage["id"]: stage["name"] for stage in snapshot["stages"]}
+        for stage in snapshot["stages"]:
+            for gate in stage["quality_gates"]:
+                self.observe_change({"type": "gate_updated", "stage_id": stage["id"], "gate": gate}, stage["name"])
+        for change in changes:
+            if change["version"] > snapshot["version"]:
+                self.observe_change(change, names[change["stage_id"]])
+
+    def forget_stages(self, stage_ids: List[str]):
+        """Drop duplicate tracking for a removed workflow instance's stages"""
+        stage_ids = set(stage_ids)
+        with self._lock:
+            for key in [key for key in self._seen if key[0] in stage_ids]:
+                del self._seen[key]
+
+    def get_chart(self, feature: str, tool_type: Optional[str] = None, stage: Optional[str] = None) -> Optional[Dict]:
+        key = (feature, tool_type or "unspecified", stage or "unspecified")
+        with self._lock:
+            accumulator = self._accumulators.get(key)
+            return accumulator.summary() if accumulator else None
+
+    def list_charts(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {"feature": feature, "tool_type": tool_type, "stage": stage, **accumulator.summary()}
+                for (feature, tool_type, stage), accumulator in self._accumulators.items()
+            ]
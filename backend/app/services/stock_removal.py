@@ -0,0 +1,253 @@
+# backend/app/services/stock_removal.py
+
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from ..utils.metrics import timed
+
+class DexelStock:
+    """Z-dexel (heightmap) stock model swept by a flat end mill.
+
+    Each grid cell stores the remaining stock top. The tool footprint is a
+    precomputed disk of cell offsets, and the path is swept in chunks of
+    (point, cell) pairs, so each update only touches cells under the tool.
+    Consecutive points in the same cell are merged first, which keeps
+    paths with millions of points to a few seconds.
+    """
+
+    def __init__(
+        self,
+        bounds: Tuple[float, float, float, float],
+        z_bottom: float,
+        z_top: float,
+        cell_size: float = 0.05,
+        max_cells: int = 16_000_000
+    ):
+        x_min, x_max, y_min, y_max = bounds
+        if x_max <= x_min or y_max <= y_min or z_top <= z_bottom:
+            raise ValueError("Stock bounds are empty")
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+
+        self.x_min, self.y_min = x_min, y_min
+        self.z_bottom, self.z_top = z_bottom, z_top
+        self.cell_size = cell_size
+        self.nx = int(math.ceil((x_max - x_min) / cell_size))
+        self.ny = int(math.ceil((y_max - y_min) / cell_size))
+        if self.nx * self.ny > max_cells:
+            raise ValueError(f"Stock grid would have {self.nx * self.ny} cells; increase cell_size")
+
+        self.heights = np.full((self.ny, self.nx), z_top, dtype=np.float32)
+
+    @property
+    def cell_area(self) -> float:
+        return self.cell_size * self.cell_size
+
+    @property
+    def x_max(self) -> float:
+        return self.x_min + self.nx * self.cell_size
+
+    @property
+    def y_max(self) -> float:
+        return self.y_min + self.ny * self.cell_size
+
+    def footprint(self, tool_radius: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Row/column offsets of the cells whose centers lie under the tool disk"""
+        reach = int(math.ceil(tool_radius / self.cell_size))
+        dy, dx = np.mgrid[-reach:reach + 1, -reach:reach + 1]
+        inside = (dx * dx + dy * dy) * self.cell_area <= tool_radius * tool_radius
+        return dy[inside].astype(np.int64), dx[inside].astype(np.int64)
+
+    def sweep(
+        self,
+        points: np.ndarray,
+        tool_diameter: float,
+        max_pairs: int = 4_000_000,
+        max_dense_points: int = 4_000_000
+    ) -> Dict:
+        """Sweep the tool tip along an (n, 3) path, densified so no step skips a cell.
+
+        Removed volume is attributed to path segments in cutting order, so a
+        later deeper pass over the same cells only gets the extra depth. Only
+        the parts of the path where the tool can reach the stock are densified.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] != 3 or len(points) < 2:
+            raise ValueError("Path must be an (n, 3) array with at least two points")
+        if not np.isfinite(points).all():
+            raise ValueError("Path points must be finite")
+        if tool_diameter > max(self.x_max - self.x_min, self.y_max - self.y_min):
+            raise ValueError("tool_diameter must not exceed the stock size")
+        reach = int(math.ceil(tool_diameter / 2 / self.cell_size))
+        if (2 * reach + 1) ** 2 > max_pairs:
+            raise ValueError("Tool footprint covers too many cells; increase cell_size")
+
+        segment_count = len(points) - 1
+        steps = np.diff(points, axis=0)
+        lengths = np.sqrt((steps * steps).sum(axis=1))
+        enter, leave = self._clip(points, steps, (reach + 1) * self.cell_size)
+        dense, segment_of = self._densify(points, steps, lengths, enter, leave, max_dense_points)
+        initial_volume = self.volume()
+
+        # Tip positions above the current stock top can never cut
+        cutting = dense[:, 2] < self.z_top
+        col, row, tip, owner = self._collapse_runs(dense[cutting], segment_of[cutting])
+
+        dy, dx = self.footprint(tool_diameter / 2)
+        flat_heights = self.heights.reshape(-1)
+        segment_volume = np.zeros(segment_count, dtype=np.float64)
+        span = self.z_top - self.z_bottom + 1.0
+
+        chunk = max(1, max_pairs // len(dx))
+        for start in range(0, len(tip), chunk):
+            end = start + chunk
+            rows = row[start:end, None] + dy
+            cols = col[start:end, None] + dx
+            inside = (rows >= 0) & (rows < self.ny) & (cols >= 0) & (cols < self.nx)
+            if not inside.any():
+                continue
+
+            # Pairs are point-major, so a stable sort by cell keeps each cell's visits in path order
+            cells = (rows * self.nx + cols)[inside]
+            order = np.argsort(cells, kind="stable")
+            cells = cells[order]
+            z = np.broadcast_to(tip[start:end, None], inside.shape)[inside][order].astype(np.float64)
+            segments = np.broadcast_to(owner[start:end, None], inside.shape)[inside][order]
+
+            first = np.empty(len(cells), dtype=bool)
+            first[0] = True
+            np.not_equal(cells[1:], cells[:-1], out=first[1:])
+            group = np.cumsum(first) - 1
+
+            # Running minimum per cell: later groups get smaller offsets, which restarts the scan
+            offset = (group[-1] - group) * span
+            running = np.minimum.accumulate(z + offset) - offset
+            before = flat_heights[cells].astype(np.float64)
+            previous = np.empty_like(running)
+            previous[0] = np.inf
+            previous[1:] = running[:-1]
+            previous[first] = np.inf
+            previous = np.minimum(previous, before)
+
+            removed = np.maximum(previous - z, 0.0) * self.cell_area
+            segment_volume += np.bincount(segments, weights=removed, minlength=segment_count)
+
+            last = np.empty(len(cells), dtype=bool)
+            last[-1] = True
+            last[:-1] = first[1:]
+            flat_heights[cells[last]] = np.minimum(before[last], running[last])
+
+        removed_volume = initial_volume - self.volume()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Mean cut cross-section per unit width: an effective depth of cut per segment
+            mean_cut_depth = np.where(lengths > 0, segment_volume / (lengths * tool_diameter), 0.0)
+
+        return {
+            "removed_volume": removed_volume,
+            "path_length": float(lengths.sum()),
+            "points": int(len(points)),
+            "swept_positions": int(len(tip)),
+            "segment_volume": segment_volume,
+            "segment_mean_cut_depth": mean_cut_depth,
+            "engaged_segments": int(np.count_nonzero(segment_volume))
+        }
+
+    def _collapse_runs(self, dense: np.ndarray, segment_of: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """Merge consecutive tips in the same cell; they share a footprint, so only the lowest matters"""
+        col = np.floor((dense[:, 0] - self.x_min) / self.cell_size).astype(np.int64)
+        row = np.floor((dense[:, 1] - self.y_min) / self.cell_size).astype(np.int64)
+        tip = np.maximum(dense[:, 2], self.z_bottom)
+        if not len(tip):
+            return col, row, tip, segment_of
+
+        starts = np.flatnonzero(np.r_[True, (col[1:] != col[:-1]) | (row[1:] != row[:-1])])
+        run_tip = np.minimum.reduceat(tip, starts)
+        # Credit each run to the segment of its first lowest point
+        run_of = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(tip)]))
+        lowest = np.flatnonzero(tip == run_tip[run_of])
+        lowest = lowest[np.r_[True, run_of[lowest][1:] != run_of[lowest][:-1]]]
+        return col[starts], row[starts], run_tip, segment_of[lowest]
+
+    def _clip(self, points: np.ndarray, steps: np.ndarray, margin: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Parameter interval [enter, leave] of each segment inside the box where the tool can cut.
+
+        The box is the stock grown by ``margin`` in x and y and capped at
+        z_top; segments that miss it get ``enter > leave``.
+        """
+        low = np.array([self.x_min - margin, self.y_min - margin, -np.inf])
+        high = np.array([self.x_max + margin, self.y_max + margin, self.z_top])
+        start = points[:-1]
+        moving = steps != 0
+        safe = np.where(moving, steps, 1.0)
+        to_low, to_high = (low - start) / safe, (high - start) / safe
+        # Axes the segment does not move along are either always or never inside
+        still_inside = (start >= low) & (start <= high)
+        near = np.where(moving, np.minimum(to_low, to_high), np.where(still_inside, -np.inf, np.inf))
+        far = np.where(moving, np.maximum(to_low, to_high), np.where(still_inside, np.inf, -np.inf))
+        return np.maximum(near.max(axis=1), 0.0), np.minimum(far.min(axis=1), 1.0)
+
+    def _densify(
+        self,
+        points: np.ndarray,
+        steps: np.ndarray,
+        lengths: np.ndarray,
+        enter: np.ndarray,
+        leave: np.ndarray,
+        max_dense_points: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Insert points over each clipped segment so consecutive tips are at most half a cell apart"""
+        inside = leave >= enter
+        span = np.where(inside, leave - enter, 0.0)
+        subdivisions = np.maximum(1, np.ceil(lengths * span / (self.cell_size / 2))).astype(np.int64)
+        # A segment's end is the next one's start, unless it was clipped or closes the path
+        closed = leave < 1.0
+        closed[-1] = True
+        counts = np.where(inside, subdivisions + closed, 0)
+        total = int(counts.sum())
+        if total > max_dense_points:
+            raise ValueError(f"Path would be swept at {total} positions inside the stock; increase cell_size")
+
+        segment_of = np.repeat(np.arange(len(steps)), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        fraction = enter[segment_of] + span[segment_of] * offsets / subdivisions[segment_of]
+        return points[segment_of] + steps[segment_of] * fraction[:, None], segment_of
+
+    def volume(self) -> float:
+        return float((self.heights.astype(np.float64) - self.z_bottom).sum() * self.cell_area)
+
+    def residual_map(self, max_size: int = 128) -> Dict:
+        """Remaining stock height above the bottom, block-max downsampled to at most max_size per side"""
+        block = max(1, int(math.ceil(max(self.nx, self.ny) / max_size)))
+        ny, nx = -(-self.ny // block), -(-self.nx // block)
+        padded = np.full((ny * block, nx * block), -np.inf, dtype=np.float32)
+        padded[:self.ny, :self.nx] = self.heights
+        residual = padded.reshape(ny, block, nx, block).max(axis=(1, 3)) - self.z_bottom
+        return {
+            "cell_size": self.cell_size * block,
+            "x_min": self.x_min,
+            "y_min": self.y_min,
+            "z_bottom": self.z_bottom,
+            "heights": residual
+        }
+
+@timed("stock_removal.simulate")
+def simulate_stock_removal(
+    points: np.ndarray,
+    tool_diameter: float,
+    bounds: Tuple[float, float, float, float],
+    z_bottom: float,
+    z_top: float,
+    cell_size: float = 0.05,
+    map_size: Optional[int] = 128
+) -> Dict:
+    """Sweep a path through fresh stock and summarize the cut"""
+    stock = DexelStock(bounds, z_bottom, z_top, cell_size)
+    initial_volume = stock.volume()
+    result = stock.sweep(points, tool_diameter)
+    result["initial_volume"] = initial_volume
+    result["remaining_volume"] = initial_volume - result["removed_volume"]
+    if map_size:
+        result["residual_map"] = stock.residual_map(map_size)
+    return result
@@ -0,0 +1,212 @@
+# backend/app/services/telemetry_service.py
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling; returns indices of the kept points"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket boundaries for the points between the fixed first and last samples
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    selected = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Average of the next bucket is the third triangle vertex
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        next_end = max(next_end, next_start + 1)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        ax, ay = x[selected], y[selected]
+        areas = np.abs((ax - avg_x) * (y[start:end] - ay) - (ax - x[start:end]) * (avg_y - ay))
+        selected = start + int(np.argmax(areas))
+        indices[i + 1] = selected
+
+    return indices
+
+class ChannelBuffer:
+    """Preallocated ring buffer of (timestamp, value) samples for one telemetry channel.
+
+    Samples are kept in arrival order and ``window`` binary-searches them, so
+    ``extend`` rejects samples older than the latest one already buffered.
+    """
+
+    SAMPLE_BYTES = np.dtype(np.float64).itemsize + np.dtype(np.float32).itemsize
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros(capacity, dtype=np.float32)
+        self.position = 0
+        self.size = 0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        return float(self.timestamps[(self.position - 1) % self.capacity]) if self.size else None
+
+    def extend(self, timestamps: np.ndarray, values: np.ndarray):
+        """Write time-ordered samples in place, overwriting the oldest once the buffer is full"""
+        timestamps, values = timestamps[-self.capacity:], values[-self.capacity:]
+        n = len(values)
+        with self._lock:
+            last = self.last_timestamp
+            if n and last is not None and timestamps[0] < last:
+                raise ValueError(f"Samples at {timestamps[0]} are older than the channel's latest sample at {last}")
+            end = self.position + n
+            if end <= self.capacity:
+                self.timestamps[self.position:end] = timestamps
+                self.values[self.position:end] = values
+            else:
+                split = self.capacity - self.position
+                self.timestamps[self.position:] = timestamps[:split]
+                self.values[self.position:] = values[:split]
+                self.timestamps[:end - self.capacity] = timestamps[split:]
+                self.values[:end - self.capacity] = values[split:]
+            self.position = end % self.capacity
+            self.size = min(self.capacity, self.size + n)
+            self.total += n
+
+    def window(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Get samples in [start, end] in time order"""
+        with self._lock:
+            if self.size < self.capacity:
+                timestamps = self.timestamps[:self.size].copy()
+                values = self.values[:self.size].copy()
+            else:
+                timestamps = np.roll(self.timestamps, -self.position)
+                values = np.roll(self.values, -self.position)
+
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="right"))
+        return timestamps[lo:hi], values[lo:hi]
+
+class TelemetryService:
+    """High-rate machine telemetry held in per-channel NumPy ring buffers.
+
+    Every channel preallocates a full buffer, so the number of channels
+    clients may create is the memory budget divided by one buffer's size.
+    """
+
+    DEFAULT_CHANNELS = ("spindle_speed", "feed_rate", "temperature")
+
+    def __init__(self, capacity_per_channel: int = 600_000, memory_budget_mb: int = 512):
+        self.capacity_per_channel = capacity_per_channel
+        self.max_channels = memory_budget_mb * 2**20 // (capacity_per_channel * ChannelBuffer.SAMPLE_BYTES)
+        if self.max_channels < 1:
+            raise ValueError(f"A {memory_budget_mb} MB telemetry budget cannot hold one {capacity_per_channel}-sample channel")
+        self._buffers: Dict[Tuple[str, str], ChannelBuffer] = {}
+        self._lock = threading.Lock()
+
+    def _buffer(self, machine_id: str, channel: str, create: bool = False) -> Optional[ChannelBuffer]:
+        key = (machine_id, channel)
+        buffer = self._buffers.get(key)
+        if buffer is None and create:
+            with self._lock:
+                buffer = self._buffers.get(key)
+                if buffer is None:
+                    if len(self._buffers) >= self.max_channels:
+                        raise ValueError(f"Telemetry channel limit of {self.max_channels} reached")
+                    buffer = ChannelBuffer(self.capacity_per_channel)
+                    self._buffers[key] = buffer
+        return buffer
+
+    def ingest(
+        self,
+        machine_id: str,
+        channels: Dict[str, List[float]],
+        timestamps: Optional[List[float]] = None,
+        start_time: Optional[float] = None,
+        sample_rate_hz: Optional[float] = None
+    ) -> int:
+        """Append samples for one or more channels sharing the same timebase"""
+        arrays = {name: np.asarray(values, dtype=np.float32) for name, values in channels.items()}
+        lengths = {len(values) for values in arrays.values()}
+        if len(lengths) != 1:
+            raise ValueError("All channels must have the same number of samples")
+        n = lengths.pop()
+
+        if timestamps is not None:
+            ts = np.asarray(timestamps, dtype=np.float64)
+            if len(ts) != n:
+                raise ValueError("Timestamps must match the number of samples")
+        elif sample_rate_hz:
+            start = time.time() - n / sample_rate_hz if start_time is None else start_time
+            ts = start + np.arange(n, dtype=np.float64) / sample_rate_hz
+        else:
+            raise ValueError("Either timestamps or sample_rate_hz is required")
+
+        if not np.isfinite(ts).all():
+            raise ValueError("Timestamps must be finite")
+        if n > 1 and (np.diff(ts) < 0).any():
+            # Put an out-of-order batch in time order; a stable sort keeps ties in arrival order
+            order = np.argsort(ts, kind="stable")
+            ts = ts[order]
+            arrays = {name: values[order] for name, values in arrays.items()}
+
+        # Checked for every channel first so a stale batch is neither half written nor allocates new channels
+        for name in arrays:
+            buffer = self._buffer(machine_id, name)
+            last = None if buffer is None else buffer.last_timestamp
+            if n and last is not None and ts[0] < last:
+                raise ValueError(f"Samples for {name} at {ts[0]} are older than its latest sample at {last}")
+        for name, values in arrays.items():
+            self._buffer(machine_id, name, create=True).extend(ts, values)
+        return n
+
+    def query(
+        self,
+        machine_id: str,
+        channel: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        width: int = 800
+    ) -> Optional[Dict]:
+        """Get min/max/mean rollups and an LTTB series sized to the requested pixel width"""
+        buffer = self._buffer(machine_id, channel)
+        if buffer is None:
+            return None
+
+        timestamps, values = buffer.window(start, end)
+        if not len(values):
+            return {"rollup": {"count": 0, "min": None, "max": None, "mean": None}, "timestamps": [], "values": []}
+
+        keep = lttb(timestamps, values.astype(np.float64), width)
+        return {
+            "rollup": {
+                "count": int(len(values)),
+                "min": float(values.min()),
+                "max": float(values.max()),
+                "mean": float(values.mean(dtype=np.float64)),
+                "start": float(timestamps[0]),
+                "end": float(timestamps[-1])
+            },
+            "timestamps": timestamps[keep],
+            "values": values[keep]
+        }
+
+    def list_channels(self, machine_id: str) -> List[Dict]:
+        """Summarize the channels recorded for a machine"""
+        channels = []
+        for (machine, channel), buffer in list(self._buffers.items()):
+            if machine != machine_id or not buffer.size:
+                continue
+            last = (buffer.position - 1) % buffer.capacity
+            channels.append({
+                "channel": channel,
+                "samples_buffered": buffer.size,
+                "samples_total": buffer.total,
+                "last_timestamp": float(buffer.timestamps[last]),
+                "last_value": float(buffer.values[last])
+            })
+        return channels
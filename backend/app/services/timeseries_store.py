@@ -0,0 +1,324 @@
+# backend/app/services/timeseries_store.py
+
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .workflow_store import StoreLockedError
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process development only
+    fcntl = None
+
+SECONDS_PER_DAY = 86400
+
+# Rollup tiers: name -> bucket width in seconds. Each tier is a fixed-size
+# per-day array, so a bucket's position is simply (t - day_start) // width.
+ROLLUP_TIERS = {"1s": 1, "1m": 60, "1h": 3600}
+
+_ROLLUP_DTYPE = np.dtype([
+    ("count", "<i8"),
+    ("sum", "<f8"),
+    ("min", "<f4"),
+    ("max", "<f4")
+])
+_RAW_DTYPE = np.dtype([("t", "<i8"), ("v", "<f4")])  # t in nanoseconds since epoch
+
+# Series names become directory names; a name made only of dots would leave the root
+_SERIES_NAME = re.compile(r"^(?!\.+$)[A-Za-z0-9_.:%-]+$")
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_:-]")
+
+def _escape(match: re.Match) -> str:
+    return "".join(f"%{byte:02X}" for byte in match.group().encode())
+
+def series_name(*parts: str) -> str:
+    """Join user-supplied parts (part ids, tool types) into a valid series name.
+
+    Characters a series name cannot hold, including the ``.`` separator and
+    ``%`` itself, are percent-encoded, so every part stays a single path
+    component and distinct parts never map to the same series.
+    """
+    return ".".join(_UNSAFE_CHARS.sub(_escape, str(part)) for part in parts)
+
+class _DaySegment:
+    """Memory-mapped files for one series and one UTC day.
+
+    A read-only segment maps the files another process is writing; it is
+    opened per query, so it sees the owner's appends up to that point.
+    """
+
+    def __init__(self, directory: str, day: int, raw_capacity: int, readonly: bool = False):
+        self.directory = directory
+        self.day = day
+        self.readonly = readonly
+        if not readonly:
+            os.makedirs(directory, exist_ok=True)
+
+        self.rollups = {
+            tier: self._open_fixed(f"rollup_{tier}.bin", SECONDS_PER_DAY // width)
+            for tier, width in ROLLUP_TIERS.items()
+        }
+        self._raw_path = os.path.join(directory, "raw.bin")
+        self._count_path = os.path.join(directory, "raw.count")
+        self.raw_count = 0
+        if os.path.exists(self._count_path):
+            with open(self._count_path) as f:
+                self.raw_count = int(f.read() or 0)
+        self.raw = self._open_raw(max(raw_capacity, self.raw_count))
+        # raw.count is only written on flush; samples appended after the last
+        # flush are still in raw.bin, whose unused tail is zero-filled
+        tail = self.raw["t"][self.raw_count:] != 0
+        self.raw_count += len(tail) if tail.all() else int(tail.argmin())
+        self._saved_count = self.raw_count
+
+    def _open_fixed(self, name: str, length: int) -> np.memmap:
+        path = os.path.join(self.directory, name)
+        if self.readonly:
+            if not os.path.exists(path):
+                # The owner has created the directory but not yet this tier
+                return np.zeros(length, dtype=_ROLLUP_DTYPE)
+            return np.memmap(path, dtype=_ROLLUP_DTYPE, mode="r", shape=(length,))
+        if not os.path.exists(path):
+            rollup = np.memmap(path, dtype=_ROLLUP_DTYPE, mode="w+", shape=(length,))
+            rollup["min"] = np.inf
+            rollup["max"] = -np.inf
+            rollup.flush()
+            return rollup
+        return np.memmap(path, dtype=_ROLLUP_DTYPE, mode="r+", shape=(length,))
+
+    def _open_raw(self, capacity: int) -> np.memmap:
+        size = os.path.getsize(self._raw_path) // _RAW_DTYPE.itemsize if os.path.exists(self._raw_path) else 0
+        if self.readonly:
+            if size == 0:
+                return np.zeros(0, dtype=_RAW_DTYPE)
+            return np.memmap(self._raw_path, dtype=_RAW_DTYPE, mode="r", shape=(size,))
+        capacity = max(capacity, size)
+        if size < capacity:
+            with open(self._raw_path, "ab") as f:
+                f.truncate(capacity * _RAW_DTYPE.itemsize)
+        return np.memmap(self._raw_path, dtype=_RAW_DTYPE, mode="r+", shape=(capacity,))
+
+    def append(self, t_ns: np.ndarray, values: np.ndarray):
+        """Append time-ordered samples; raw range queries rely on that order"""
+        n = len(values)
+        if self.raw_count + n > len(self.raw):
+            self.raw.flush()
+            self.raw = self._open_raw(max(2 * len(self.raw), self.raw_count + n))
+        self.raw["t"][self.raw_count:self.raw_count + n] = t_ns
+        self.raw["v"][self.raw_count:self.raw_count + n] = values
+        self.raw_count += n
+
+        # Fold the samples into every rollup tier at write time
+        seconds = t_ns // 1_000_000_000 - self.day * SECONDS_PER_DAY
+        for tier, width in ROLLUP_TIERS.items():
+            rollup = self.rollups[tier]
+            buckets = seconds // width
+            np.add.at(rollup["count"], buckets, 1)
+            np.add.at(rollup["sum"], buckets, values.astype(np.float64))
+            np.minimum.at(rollup["min"], buckets, values)
+            np.maximum.at(rollup["max"], buckets, values)
+
+    @property
+    def dirty(self) -> bool:
+        return self.raw_count != self._saved_count
+
+    def flush(self):
+        self.raw.flush()
+        for rollup in self.rollups.values():
+            rollup.flush()
+        if self.dirty:
+            with open(self._count_path, "w") as f:
+                f.write(str(self.raw_count))
+            self._saved_count = self.raw_count
+
+class TimeSeriesStore:
+    """Append-only, memory-mapped columnar store for metric history.
+
+    Each series is split into per-day segment directories holding a raw
+    (int64 ns timestamp, float32 value) column and precomputed 1 s / 1 min /
+    1 h rollups. Range queries pick the coarsest tier that still gives the
+    requested number of points and return zero-copy memmap slices.
+
+    Appends only touch the memmaps; a daemon thread flushes them and the
+    sample counts every ``flush_interval`` seconds, off the request path.
+
+    One process owns the files: ``claim`` takes an exclusive lock, and a
+    second process (another uvicorn worker) gets StoreLockedError instead of
+    appending through its own sample counts and overwriting the owner's
+    rows. A store that has not claimed the files is read-only: it drops
+    appends and answers queries from what the owner has written.
+    """
+
+    def __init__(self, root: str, raw_capacity: int = 65536, max_open_segments: int = 256, flush_interval: float = 5.0):
+        self.root = root
+        self.raw_capacity = raw_capacity
+        self.max_open_segments = max_open_segments
+        self._segments: Dict[Tuple[str, int], _DaySegment] = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+        self.flush_interval = flush_interval
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._owner = None
+
+    @property
+    def writable(self) -> bool:
+        return self._owner is not None
+
+    def claim(self):
+        """Take ownership of the files; raises StoreLockedError if another process holds them"""
+        if self._owner is not None:
+            return
+        owner = open(f"{self.root.rstrip(os.sep)}.lock", "w")
+        if fcntl is not None:
+            try:
+                fcntl.flock(owner, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                owner.close()
+                raise StoreLockedError(f"{self.root} is owned by another process")
+        self._owner = owner
+
+    def _start_flusher(self):
+        """Started on the first append, so a store created before a fork flushes in the child"""
+        if self._flusher is None and self.flush_interval > 0 and not self._closed.is_set():
+            self._flusher = threading.Thread(target=self._flush_loop, name="timeseries-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                for segment in self._segments.values():
+                    if segment.dirty:
+                        segment.flush()
+
+    def _segment(self, series: str, day: int, create: bool) -> Optional[_DaySegment]:
+        key = (series, day)
+        segment = self._segments.get(key)
+        if segment is None:
+            directory = os.path.join(self.root, series, str(day))
+            if not create and not os.path.isdir(directory):
+                return None
+            if not self.writable:
+                return _DaySegment(directory, day, 0, readonly=True)
+            if len(self._segments) >= self.max_open_segments:
+                # Close the oldest open segment; its files stay on disk
+                oldest = next(iter(self._segments))
+                self._segments.pop(oldest).flush()
+            segment = _DaySegment(directory, day, self.raw_capacity)
+            self._segments[key] = segment
+        return segment
+
+    def append(self, series: str, timestamps: np.ndarray, values: np.ndarray):
+        """Append samples (timestamps in epoch seconds) to a series; a no-op unless claimed"""
+        if not _SERIES_NAME.fullmatch(series):
+            raise ValueError(f"Invalid series name: {series}")
+        if not self.writable:
+            return
+        t_ns = (np.asarray(timestamps, dtype=np.float64) * 1e9).astype(np.int64)
+        values = np.asarray(values, dtype=np.float32)
+        days = t_ns // (SECONDS_PER_DAY * 1_000_000_000)
+
+        with self._lock:
+            self._start_flusher()
+            for day in np.unique(days):
+                mask = days == day
+                self._segment(series, int(day), create=True).append(t_ns[mask], values[mask])
+
+    def record(self, series_prefix: str, timestamp: float, metrics: Dict[str, Optional[float]]):
+        """Append one sample per numeric metric, e.g. a StageMetrics or simulation result"""
+        for name, value in metrics.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.append(f"{series_prefix}.{name}", np.array([timestamp]), np.array([value]))
+
+    def record_columns(self, series_prefix: str, timestamp: float, columns: Dict[str, np.ndarray]):
+        """Append whole columns sharing one timestamp, e.g. a batch simulation"""
+        for name, values in columns.items():
+            values = np.asarray(values)
+            self.append(f"{series_prefix}.{name}", np.full(len(values), timestamp), values)
+
+    def list_series(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def choose_resolution(self, start: float, end: float, max_points: int) -> str:
+        """Pick the finest tier that keeps the query within max_points buckets, or raw"""
+        span = max(end - start, 0.0)
+        if span <= max_points * 0.1:
+            return "raw"
+        for tier, width in ROLLUP_TIERS.items():
+            if span / width <= max_points:
+                return tier
+        return "1h"
+
+    def query(self, series: str, start: float, end: float, resolution: str = "auto", max_points: int = 2000) -> Dict:
+        """Read [start, end) from one tier, slicing the per-day memmaps without copying"""
+        if resolution == "auto":
+            resolution = self.choose_resolution(start, end, max_points)
+        if resolution != "raw" and resolution not in ROLLUP_TIERS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+
+        first_day, last_day = int(start // SECONDS_PER_DAY), int(end // SECONDS_PER_DAY)
+        parts = []
+        with self._lock:
+            for day in self._days(series, first_day, last_day):
+                segment = self._segment(series, day, create=False)
+                parts.append(self._slice(segment, day, start, end, resolution))
+
+        if resolution == "raw":
+            timestamps = np.concatenate([p[0] for p in parts]) if parts else np.empty(0)
+            values = np.concatenate([p[1] for p in parts]) if parts else np.empty(0, dtype=np.float32)
+            return {"series": series, "resolution": "raw", "timestamps": timestamps, "values": values}
+
+        buckets = [p for p in parts if len(p[0])]
+        timestamps = np.concatenate([p[0] for p in buckets]) if buckets else np.empty(0)
+        rollup = np.concatenate([p[1] for p in buckets]) if buckets else np.empty(0, dtype=_ROLLUP_DTYPE)
+        return {
+            "series": series,
+            "resolution": resolution,
+            "timestamps": timestamps,
+            "count": rollup["count"],
+            "mean": rollup["sum"] / np.maximum(rollup["count"], 1),
+            "min": rollup["min"],
+            "max": rollup["max"]
+        }
+
+    def _days(self, series: str, first_day: int, last_day: int) -> List[int]:
+        """Days with a segment on disk, so sparse long ranges do not probe every day"""
+        directory = os.path.join(self.root, series)
+        if not _SERIES_NAME.fullmatch(series) or not os.path.isdir(directory):
+            return []
+        return sorted(day for day in map(int, os.listdir(directory)) if first_day <= day <= last_day)
+
+    def _slice(self, segment: _DaySegment, day: int, start: float, end: float, resolution: str):
+        day_start = day * SECONDS_PER_DAY
+        if resolution == "raw":
+            raw = segment.raw[:segment.raw_count]
+            lo = int(np.searchsorted(raw["t"], int(start * 1e9), side="left"))
+            hi = int(np.searchsorted(raw["t"], int(end * 1e9), side="left"))
+            return raw["t"][lo:hi] / 1e9, raw["v"][lo:hi]
+
+        width = ROLLUP_TIERS[resolution]
+        lo = max(0, int((start - day_start) // width))
+        hi = min(SECONDS_PER_DAY // width, int(np.ceil((end - day_start) / width)))
+        window = segment.rollups[resolution][lo:hi]
+        occupied = np.flatnonzero(window["count"])
+        return day_start + (lo + occupied) * width, window[occupied]
+
+    def flush(self):
+        with self._lock:
+            for segment in self._segments.values():
+                segment.flush()
+
+    def close(self):
+        """Stop the flush thread, write out every open segment and release ownership"""
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        if self._owner is not None:
+            self._owner.close()
+            self._owner = None
@@ -0,0 +1,102 @@
+# backend/app/services/toolpath_service.py
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import numpy as np
+
+from ..utils.metrics import timed
+
+# Roughing/finishing geometry used by the digital twin (see toolPathCalculations.js)
+STOCK_RADIUS = 3.0
+PASS_HEIGHT = 6.0
+POINTS_PER_TURN = 32
+POINTS_PER_LAYER = 64
+MAX_LOD = 3
+MIN_ANGULAR_POINTS = 8
+
+def helix_points(radius: float, height: float, turns: int, points_per_turn: int = POINTS_PER_TURN) -> np.ndarray:
+    """Helical roughing path as an (n, 3) float32 array, endpoints included"""
+    total = points_per_turn * turns
+    i = np.arange(total + 1, dtype=np.float64)
+    angle = i * (2 * np.pi / points_per_turn)
+    points = np.empty((total + 1, 3), dtype=np.float32)
+    points[:, 0] = radius * np.cos(angle)
+    points[:, 1] = radius * np.sin(angle)
+    points[:, 2] = i * (height / total) if total else 0.0
+    return points
+
+def finishing_points(radius: float, height: float, layer_step: float, points_per_layer: int = POINTS_PER_LAYER) -> np.ndarray:
+    """Layered finishing contours as an (n, 3) float32 array; each layer is a closed ring"""
+    layers = math.ceil(height / layer_step)
+    angle = np.linspace(0.0, 2 * np.pi, points_per_layer + 1)
+    ring = np.column_stack([radius * np.cos(angle), radius * np.sin(angle)])
+    z = np.arange(layers + 1, dtype=np.float64) * layer_step
+
+    points = np.empty((layers + 1, points_per_layer + 1, 3), dtype=np.float32)
+    points[:, :, :2] = ring
+    points[:, :, 2] = z[:, None]
+    return points.reshape(-1, 3)
+
+class ToolPathService:
+    """Generates digital-twin tool paths and caches the encoded buffers per parameter set.
+
+    Paths depend only on feed rate and tool diameter; the level of detail
+    halves the angular resolution per step, so LOD 3 sends 1/8 of the points.
+    """
+
+    def __init__(self, cache_size: int = 256, max_points: int = 2_000_000):
+        self.cache_size = cache_size
+        self.max_points = max_points
+        self._cache: "OrderedDict[Tuple[float, float, int], Tuple[bytes, Dict[str, int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generate(self, feed_rate: float, tool_diameter: float, lod: int = 0) -> Dict[str, np.ndarray]:
+        """Build the roughing and finishing paths as (n, 3) float32 arrays"""
+        if feed_rate <= 0:
+            raise ValueError("feed_rate must be positive")
+        if not 0 <= lod <= MAX_LOD:
+            raise ValueError(f"lod must be between 0 and {MAX_LOD}")
+
+        turns = math.ceil(PASS_HEIGHT / feed_rate)
+        per_turn = max(MIN_ANGULAR_POINTS, POINTS_PER_TURN >> lod)
+        per_layer = max(MIN_ANGULAR_POINTS, POINTS_PER_LAYER >> lod)
+        total = turns * per_turn + (turns + 1) * (per_layer + 1)
+        if total > self.max_points:
+            raise ValueError(f"Tool path would have {total} points; increase feed_rate or lod")
+
+        return {
+            "roughing": helix_points(STOCK_RADIUS - tool_diameter / 2, PASS_HEIGHT, turns, per_turn),
+            "finishing": finishing_points(STOCK_RADIUS, PASS_HEIGHT, feed_rate, per_layer)
+        }
+
+    @timed("toolpath.encode")
+    def encode(self, feed_rate: float, tool_diameter: float, lod: int = 0) -> Tuple[bytes, Dict[str, int]]:
+        """Get both passes as one little-endian float32 xyz buffer, roughing first, plus point counts"""
+        key = (round(feed_rate, 6), round(tool_diameter, 6), lod)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        paths = self.generate(feed_rate, tool_diameter, lod)
+        buffer = np.concatenate([paths["roughing"], paths["finishing"]]).astype("<f4", copy=False).tobytes()
+        counts = {name: len(points) for name, points in paths.items()}
+
+        with self._lock:
+            self._cache[key] = (buffer, counts)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return buffer, counts
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"size": len(self._cache), "max_size": self.cache_size, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,70 @@
+# backend/app/services/workflow_events.py
+
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from .workflow_service import WorkflowService
+
+class WorkflowEventBroker:
+    """Fans WorkflowService changes out to asyncio subscribers.
+
+    Each subscriber first receives whatever it missed since its last known
+    version (or a full snapshot if the change log no longer reaches back
+    that far) and then one delta per change as it happens.
+    """
+
+    RESYNC = {"type": "resync"}
+
+    def __init__(self, workflow_service: WorkflowService, queue_size: int = 256):
+        self.workflow_service = workflow_service
+        self.queue_size = queue_size
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        workflow_service.subscribe(self._publish)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _publish(self, change: Dict):
+        for loop, queue in list(self._subscribers):
+            loop.call_soon_threadsafe(self._enqueue, queue, change)
+
+    def _enqueue(self, queue: asyncio.Queue, change: Dict):
+        try:
+            queue.put_nowait(change)
+        except asyncio.QueueFull:
+            # Slow consumer: drop its backlog and make it resync from a snapshot
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self.RESYNC)
+
+    def _catch_up(self, since: Optional[int]) -> List[Dict]:
+        if since is not None:
+            changes = self.workflow_service.get_changes_since(since)
+            if changes is not None:
+                return changes
+        return [{"type": "snapshot", **self.workflow_service.get_snapshot()}]
+
+    async def stream(self, since: Optional[int] = None, keepalive: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+        """Yield changes newer than since; yields None as a keepalive when idle"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        subscriber = (asyncio.get_running_loop(), queue)
+        self._subscribers.append(subscriber)
+        try:
+            last_version = since
+            pending = self._catch_up(since)
+            while True:
+                for change in pending:
+                    if last_version is not None and change["type"] != "snapshot" and change["version"] <= last_version:
+                        continue
+                    last_version = change["version"]
+                    yield change
+                try:
+                    change = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    pending = []
+                    yield None
+                    continue
+                pending = self._catch_up(None) if change is self.RESYNC else [change]
+        finally:
+            self._subscribers.remove(subscriber)
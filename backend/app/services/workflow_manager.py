@@ -0,0 +1,171 @@
+# backend/app/services/workflow_manager.py
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..config.settings import settings
+from .workflow_events import WorkflowEventBroker
+from .workflow_service import WorkflowService
+from .workflow_store import WorkflowEventStore
+from .spc_service import SPCService
+from .timeseries_store import TimeSeriesStore, series_name
+
+class WorkflowManager:
+    """Registry of per-part workflow instances keyed by (pod_id, part_id).
+
+    Each instance carries its own lock, so work on different parts never
+    contends; the manager lock only guards creating and removing instances.
+    Once a store is opened (at application startup, see ``open_store``),
+    every instance's changes are persisted, and instances are recovered from
+    their latest snapshot plus event tail.
+    With a history store, stage metrics updates are appended to per-stage
+    time series.
+    """
+
+    DEFAULT_PART_ID = "default"
+
+    def __init__(
+        self,
+        default_pod_id: str = settings.pod_id,
+        store: Optional[WorkflowEventStore] = None,
+        spc: Optional[SPCService] = None,
+        history: Optional[TimeSeriesStore] = None
+    ):
+        self.default_pod_id = default_pod_id
+        self.store = store
+        self.spc = spc
+        self.history = history
+        self._instances: Dict[Tuple[str, str], WorkflowService] = {}
+        self._brokers: Dict[Tuple[str, str], WorkflowEventBroker] = {}
+        self._lock = threading.Lock()
+        if store is not None:
+            for pod_id, part_id in store.instances():
+                self._recover(pod_id, part_id)
+        self.default = self.get_or_create(self.DEFAULT_PART_ID)
+
+    def open_store(self, store: WorkflowEventStore):
+        """Start persisting to a store: recover its instances and save a snapshot of every other one.
+
+        Called once at startup, before requests change any state; a recovered
+        instance replaces the fresh in-memory one with the same key.
+        """
+        with self._lock:
+            self.store = store
+            recovered = set()
+            for key in store.instances():
+                if self._recover(*key):
+                    self._brokers.pop(key, None)
+                    recovered.add(key)
+            for key, instance in self._instances.items():
+                if key not in recovered:
+                    store.save_snapshot(instance.pod_id, instance.part_id, instance.get_snapshot())
+                    self._persist(instance)
+            self.default = self._instances[self._key(self.DEFAULT_PART_ID, None)]
+
+    def close_store(self):
+        """Commit queued writes and release the store"""
+        if self.store is not None:
+            self.store.close()
+
+    def _recover(self, pod_id: str, part_id: str) -> bool:
+        snapshot, changes = self.store.load(pod_id, part_id)
+        if snapshot is None:
+            return False
+        instance = WorkflowService(part_id=part_id, pod_id=pod_id)
+        instance.restore(snapshot, changes)
+        if self.spc is not None:
+            self.spc.replay(snapshot, changes)
+        self._attach(instance)
+        self._instances[(pod_id, part_id)] = instance
+        return True
+
+    def _persist(self, instance: WorkflowService):
+        store = self.store
+
+        def persist(change: Dict):
+            store.append(instance.pod_id, instance.part_id, change)
+            if store.should_snapshot(change["version"]):
+                store.save_snapshot(instance.pod_id, instance.part_id, instance.get_snapshot())
+
+        instance.subscribe(persist)
+
+    def _attach(self, instance: WorkflowService):
+        """Subscribe persistence, SPC and metrics history to an instance's changes"""
+        spc, history = self.spc, self.history
+
+        if self.store is not None:
+            self._persist(instance)
+
+        if spc is not None:
+            instance.subscribe(lambda change: spc.observe_change(change, instance.get_stage(change["stage_id"]).name))
+
+        if history is not None:
+            def record_metrics(change: Dict):
+                metrics = change["changes"].get("metrics")
+                if metrics:
+                    history.record(series_name(instance.pod_id, instance.part_id, change["stage_id"]), time.time(), metrics)
+
+            instance.subscribe(record_metrics)
+
+    def _key(self, part_id: str, pod_id: Optional[str]) -> Tuple[str, str]:
+        return (pod_id or self.default_pod_id, part_id)
+
+    def get(self, part_id: Optional[str] = None, pod_id: Optional[str] = None) -> Optional[WorkflowService]:
+        """Get an existing workflow instance, or the default one when no part is given"""
+        return self._instances.get(self._key(part_id or self.DEFAULT_PART_ID, pod_id))
+
+    def get_or_create(self, part_id: str, pod_id: Optional[str] = None) -> WorkflowService:
+        """Get the workflow instance for a part, creating it if needed"""
+        key = self._key(part_id, pod_id)
+        instance = self._instances.get(key)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(key)
+                if instance is None:
+                    instance = WorkflowService(part_id=key[1], pod_id=key[0])
+                    if self.store is not None:
+                        self.store.save_snapshot(instance.pod_id, instance.part_id, instance.get_snapshot())
+                    self._attach(instance)
+                    self._instances[key] = instance
+        return instance
+
+    def remove(self, part_id: str, pod_id: Optional[str] = None) -> bool:
+        """Drop a finished part's workflow instance"""
+        key = self._key(part_id, pod_id)
+        if key == self._key(self.DEFAULT_PART_ID, None):
+            return False
+        with self._lock:
+            self._brokers.pop(key, None)
+            if self.store is not None:
+                self.store.delete(*key)
+            instance = self._instances.pop(key, None)
+            if instance is None:
+                return False
+            if self.spc is not None:
+                self.spc.forget_stages([stage.id for stage in instance.stages])
+            return True
+
+    def events(self, instance: WorkflowService) -> WorkflowEventBroker:
+        """Get the change broker for a workflow instance"""
+        key = (instance.pod_id, instance.part_id)
+        broker = self._brokers.get(key)
+        if broker is None:
+            with self._lock:
+                broker = self._brokers.get(key)
+                if broker is None:
+                    broker = WorkflowEventBroker(instance)
+                    self._brokers[key] = broker
+        return broker
+
+    def list_instances(self) -> List[Dict]:
+        """Summarize all workflow instances"""
+        return [
+            {
+                "pod_id": pod_id,
+                "part_id": part_id,
+                "version": instance.version,
+                "current_stage": instance.get_current_stage().name
+            }
+            for (pod_id, part_id), instance in list(self._instances.items())
+        ]
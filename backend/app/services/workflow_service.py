@@ -1,20 +1,65 @@
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
+from collections import deque
 from datetime import datetime
+import functools
+import logging
+import threading
 import uuid
+from pydantic import TypeAdapter
+from ..config.settings import settings
 from ..models.workflow import (
     WorkflowStage, 
     QualityGate, 
     StageStatus, 
     StageMetrics, 
     QualityMeasurement,
+    MeasurementBatchSummary,
     MeasurementType,
     InspectionMethod
 )
 
+logger = logging.getLogger(__name__)
+
+_stages_adapter = TypeAdapter(List[WorkflowStage])
+_stage_field_adapters = {
+    name: TypeAdapter(field.annotation) for name, field in WorkflowStage.model_fields.items()
+}
+
+def _synchronized(method):
+    """Run a WorkflowService method under the instance lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class WorkflowService:
-    def __init__(self):
+    def __init__(
+        self,
+        part_id: str = "default",
+        pod_id: str = settings.pod_id,
+        change_log_size: int = settings.workflow_change_log_size
+    ):
+        self.part_id = part_id
+        self.pod_id = pod_id
+        self.lock = threading.RLock()
         self.stages = self._initialize_stages()
         self.current_stage_index = 0
+        self._build_indexes()
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:8]  # Distinguishes versions across restarts
+        self.changes: deque = deque(maxlen=change_log_size)
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._serialized: Dict[str, tuple] = {}
+
+    def _build_indexes(self):
+        """Index stages by id and gates by (stage id, gate name) for O(1) lookups"""
+        self._stages_by_id: Dict[str, WorkflowStage] = {stage.id: stage for stage in self.stages}
+        self._gates_by_key: Dict[Tuple[str, str], QualityGate] = {
+            (stage.id, gate.name): gate
+            for stage in self.stages
+            for gate in stage.quality_gates
+        }
 
     def _initialize_stages(self) -> List[WorkflowStage]:
         """Initialize pump housing manufacturing workflow stages with enhanced quality gates"""
@@ -163,10 +208,129 @@ class WorkflowService:
         """Get all workflow stages"""
         return self.stages
 
+    def get_stage(self, stage_id: str) -> Optional[WorkflowStage]:
+        """Get a stage by id"""
+        return self._stages_by_id.get(stage_id)
+
+    def get_gate(self, stage_id: str, gate_name: str) -> Optional[QualityGate]:
+        """Get a quality gate by stage id and name"""
+        return self._gates_by_key.get((stage_id, gate_name))
+
+    def subscribe(self, listener: Callable[[Dict], None]):
+        """Register a callback invoked with every recorded change"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[Dict], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.epoch}-{self.version}"'
+
+    def event_id(self, version: int) -> str:
+        """SSE event id for a version; the epoch makes ids from before a restart unmistakable"""
+        return f"{self.epoch}-{version}"
+
+    def version_from_event_id(self, event_id: str) -> Optional[int]:
+        """Version named by an ``epoch-version`` id, or None when it comes from another epoch"""
+        epoch, _, version = event_id.strip().strip('"').rpartition("-")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    @_synchronized
+    def get_serialized_stages(self) -> bytes:
+        """Get all stages as JSON bytes, serialized at most once per version"""
+        return self._serialize("stages", lambda: _stages_adapter.dump_json(self.stages))
+
+    @_synchronized
+    def get_serialized_current_stage(self) -> bytes:
+        """Get the current stage as JSON bytes, serialized at most once per version"""
+        return self._serialize("current", lambda: self.get_current_stage().model_dump_json())
+
+    def _serialize(self, name: str, dump: Callable[[], bytes]) -> bytes:
+        cached = self._serialized.get(name)
+        if cached is None or cached[0] != self.version:
+            data = dump()
+            if isinstance(data, str):
+                data = data.encode()
+            cached = (self.version, data)
+            self._serialized[name] = cached
+        return cached[1]
+
+    @_synchronized
+    def get_snapshot(self) -> Dict:
+        """Get the full workflow state tagged with its version"""
+        return {
+            "version": self.version,
+            "current_stage_index": self.current_stage_index,
+            "stages": [stage.model_dump(mode="json") for stage in self.stages]
+        }
+
+    @_synchronized
+    def get_changes_since(self, version: int) -> Optional[List[Dict]]:
+        """Get changes newer than version, or None if the log no longer reaches back that far.
+
+        A version ahead of ours was issued before a restart reset the counter;
+        it gets None too, so the caller falls back to a snapshot.
+        """
+        if version > self.version:
+            return None
+        if version == self.version:
+            return []
+        if not self.changes or self.changes[0]["version"] > version + 1:
+            return None
+        return [change for change in self.changes if change["version"] > version]
+
+    def _record_change(self, change_type: str, stage: WorkflowStage, fields: List[str], gate: Optional[QualityGate] = None):
+        """Bump the state version and publish a delta holding only the changed fields"""
+        self.version += 1
+        change = {
+            "version": self.version,
+            "type": change_type,
+            "stage_id": stage.id,
+            "current_stage_index": self.current_stage_index,
+            "changes": stage.model_dump(mode="json", include=set(fields))
+        }
+        if gate is not None:
+            change["gate"] = gate.model_dump(mode="json")
+        self.changes.append(change)
+        for listener in list(self._listeners):
+            # The state has already changed, so a failing subscriber must not fail the update
+            try:
+                listener(change)
+            except Exception:
+                logger.exception("Workflow change listener failed for %s", stage.id)
+
+    @_synchronized
+    def restore(self, snapshot: Dict, changes: List[Dict]):
+        """Rebuild state from a snapshot and replay the changes recorded after it"""
+        self.stages = _stages_adapter.validate_python(snapshot["stages"])
+        self.current_stage_index = snapshot["current_stage_index"]
+        self.version = snapshot["version"]
+        self._build_indexes()
+
+        for change in changes:
+            if change["version"] <= self.version:
+                continue
+            stage = self._stages_by_id[change["stage_id"]]
+            for name, value in change["changes"].items():
+                setattr(stage, name, _stage_field_adapters[name].validate_python(value))
+            if "gate" in change:
+                gate = QualityGate.model_validate(change["gate"])
+                stage.quality_gates = [gate if g.name == gate.name else g for g in stage.quality_gates]
+                self._gates_by_key[(stage.id, gate.name)] = gate
+            self.current_stage_index = change["current_stage_index"]
+            self.version = change["version"]
+            self.changes.append(change)
+
+    @_synchronized
     def update_stage_progress(self, progress: float, metrics: Optional[Dict] = None):
         """Update the progress of the current stage"""
         current_stage = self.get_current_stage()
         current_stage.progress = min(100.0, max(0.0, progress))
+        changed = ["progress"]
         
         if metrics:
             float_metrics = {}
@@ -176,9 +340,11 @@ class WorkflowService:
                 else:
                     float_metrics[k] = v
             current_stage.metrics = StageMetrics(**float_metrics)
+            changed.append("metrics")
         
         if progress >= 100.0 and self.all_gates_passed(current_stage):
             if current_stage.requires_approval and not current_stage.approval_date:
+                self._record_change("progress", current_stage, changed)
                 return  # Wait for approval before advancing
             
             current_stage.status = StageStatus.COMPLETED
@@ -190,15 +356,49 @@ class WorkflowService:
                 next_stage.status = StageStatus.IN_PROGRESS
                 next_stage.start_time = datetime.utcnow()
                 self._initialize_stage_metrics(next_stage)
+                self._record_change("stage_completed", current_stage, changed + ["status", "end_time"])
+                self._record_change("stage_started", next_stage, ["status", "start_time", "metrics"])
+                return
+
+            self._record_change("stage_completed", current_stage, changed + ["status", "end_time"])
+            return
 
+        self._record_change("progress", current_stage, changed)
+
+    @_synchronized
     def update_quality_gate(self, stage_id: str, gate_name: str, measurements: Dict) -> bool:
         """Update a quality gate with measurements"""
-        for stage in self.stages:
-            if stage.id == stage_id:
-                for gate in stage.quality_gates:
-                    if gate.name == gate_name and gate.status != StageStatus.COMPLETED:
-                        return self._process_quality_gate(gate, measurements)
-        return False
+        gate = self._gates_by_key.get((stage_id, gate_name))
+        if gate is None or gate.status == StageStatus.COMPLETED:
+            return False
+
+        previous_status, previous_measurements = gate.status, gate.measurements
+        passed = self._process_quality_gate(gate, measurements)
+        if gate.status is not previous_status or gate.measurements is not previous_measurements:
+            self._record_change("gate_updated", self._stages_by_id[stage_id], [], gate)
+        return passed
+
+    @_synchronized
+    def apply_measurement_batch(self, stage_id: str, gate_name: str, summary: Dict) -> Optional[bool]:
+        """Attach an evaluated bulk measurement summary to a gate and set its status.
+
+        Returns whether the batch passed, or None when the gate is unknown or
+        already completed and the batch was not applied. Raises ValueError,
+        leaving the gate untouched, when the batch's measurement types do not
+        cover the gate's required measurements.
+        """
+        gate = self._gates_by_key.get((stage_id, gate_name))
+        if gate is None or gate.status == StageStatus.COMPLETED:
+            return None
+        missing = [t.value for t in gate.required_measurements if t.value not in summary.get("measurement_types", [])]
+        if missing:
+            raise ValueError(f"Batch is missing measurements required by the gate: {', '.join(missing)}")
+
+        gate.batch_summary = MeasurementBatchSummary(**summary)
+        passed = summary["failed_count"] == 0
+        gate.status = StageStatus.COMPLETED if passed else StageStatus.FAILED
+        self._record_change("gate_updated", self._stages_by_id[stage_id], [], gate)
+        return passed
 
     def _process_quality_gate(self, gate: QualityGate, measurements: Dict) -> bool:
         """Process and validate quality gate measurements"""
@@ -218,7 +418,8 @@ class WorkflowService:
                 lower_tolerance=data.get('lower_tolerance', 0.0),
                 unit=data.get('unit', ''),
                 inspector=data.get('inspector'),
-                notes=data.get('notes')
+                notes=data.get('notes'),
+                tool_type=data.get('tool_type')
             )
             quality_measurements[measurement_type.value] = measurement
             
@@ -239,14 +440,15 @@ class WorkflowService:
         return (measurement.value >= measurement.nominal + measurement.lower_tolerance and
                 measurement.value <= measurement.nominal + measurement.upper_tolerance)
 
+    @_synchronized
     def approve_stage(self, stage_id: str, approver: str) -> bool:
         """Approve a stage for progression"""
-        for stage in self.stages:
-            if stage.id == stage_id and stage.requires_approval:
-                if self.all_gates_passed(stage):
-                    stage.approver = approver
-                    stage.approval_date = datetime.utcnow()
-                    return True
+        stage = self._stages_by_id.get(stage_id)
+        if stage and stage.requires_approval and self.all_gates_passed(stage):
+            stage.approver = approver
+            stage.approval_date = datetime.utcnow()
+            self._record_change("stage_approved", stage, ["approver", "approval_date"])
+            return True
         return False
 
     def all_gates_passed(self, stage: WorkflowStage) -> bool:
@@ -0,0 +1,175 @@
+# backend/app/services/workflow_store.py
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process development only
+    fcntl = None
+
+class StoreLockedError(RuntimeError):
+    pass
+
+class WorkflowEventStore:
+    """Append-only SQLite (WAL) log of workflow changes with periodic snapshots.
+
+    Every change recorded by a WorkflowService is appended as one compact
+    JSON row. Every ``snapshot_interval`` versions the full state is written
+    as a snapshot and the events it covers are pruned, so recovery only ever
+    replays a bounded tail.
+
+    Workflow state lives in the memory of one process, so one process owns
+    the database: opening it takes an exclusive lock, and a second process
+    (another uvicorn worker) gets StoreLockedError instead of overwriting the
+    owner's rows with its own version counter. Writes are queued to a
+    background thread that commits them in batches, so recording a change
+    never waits on disk.
+    """
+
+    def __init__(self, path: str, snapshot_interval: int = 200):
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._owner = open(f"{path}.lock", "w")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._owner, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._owner.close()
+                raise StoreLockedError(f"{path} is owned by another process")
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                pod_id TEXT NOT NULL,
+                part_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (pod_id, part_id, version)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS snapshots (
+                pod_id TEXT NOT NULL,
+                part_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (pod_id, part_id)
+            ) WITHOUT ROWID;
+        """)
+
+        self.write_errors = 0
+        self._writes: "queue.Queue[Optional[Tuple[Callable, tuple]]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="workflow-store-writer", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _dumps(data: Dict) -> str:
+        return json.dumps(data, separators=(",", ":"))
+
+    def _write_loop(self):
+        """Drain the write queue, committing everything queued so far in one transaction"""
+        while True:
+            batch = [self._writes.get()]
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            writes = [write for write in batch if write is not None]
+            if writes:
+                with self._lock:
+                    self._conn.execute("BEGIN")
+                    try:
+                        for statement, args in writes:
+                            statement(*args)
+                        self._conn.execute("COMMIT")
+                    except Exception:
+                        self._conn.execute("ROLLBACK")
+                        self.write_errors += 1
+            for _ in batch:
+                self._writes.task_done()
+            if len(writes) < len(batch):
+                return  # close() queued the stop marker
+
+    def flush(self):
+        """Wait until every queued write is committed"""
+        self._writes.join()
+
+    # Statements run on the writer thread; changes and snapshots are never mutated after being queued
+    def _insert_event(self, pod_id: str, part_id: str, change: Dict):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO events (pod_id, part_id, version, payload) VALUES (?, ?, ?, ?)",
+            (pod_id, part_id, change["version"], self._dumps(change))
+        )
+
+    def _replace_snapshot(self, pod_id: str, part_id: str, snapshot: Dict):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO snapshots (pod_id, part_id, version, payload) VALUES (?, ?, ?, ?)",
+            (pod_id, part_id, snapshot["version"], self._dumps(snapshot))
+        )
+        self._conn.execute(
+            "DELETE FROM events WHERE pod_id = ? AND part_id = ? AND version <= ?",
+            (pod_id, part_id, snapshot["version"])
+        )
+
+    def _delete_instance(self, pod_id: str, part_id: str):
+        self._conn.execute("DELETE FROM snapshots WHERE pod_id = ? AND part_id = ?", (pod_id, part_id))
+        self._conn.execute("DELETE FROM events WHERE pod_id = ? AND part_id = ?", (pod_id, part_id))
+
+    def append(self, pod_id: str, part_id: str, change: Dict):
+        """Queue one change record"""
+        self._writes.put((self._insert_event, (pod_id, part_id, change)))
+
+    def save_snapshot(self, pod_id: str, part_id: str, snapshot: Dict):
+        """Queue replacing the instance snapshot and pruning the events it covers"""
+        self._writes.put((self._replace_snapshot, (pod_id, part_id, snapshot)))
+
+    def should_snapshot(self, version: int) -> bool:
+        return self.snapshot_interval > 0 and version % self.snapshot_interval == 0
+
+    def load(self, pod_id: str, part_id: str) -> Tuple[Optional[Dict], List[Dict]]:
+        """Load the latest snapshot and the events recorded after it"""
+        self.flush()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, payload FROM snapshots WHERE pod_id = ? AND part_id = ?",
+                (pod_id, part_id)
+            ).fetchone()
+            since = row[0] if row else -1
+            events = self._conn.execute(
+                "SELECT payload FROM events WHERE pod_id = ? AND part_id = ? AND version > ? ORDER BY version",
+                (pod_id, part_id, since)
+            ).fetchall()
+        snapshot = json.loads(row[1]) if row else None
+        return snapshot, [json.loads(payload) for (payload,) in events]
+
+    def instances(self) -> List[Tuple[str, str]]:
+        """List (pod_id, part_id) pairs that have persisted state"""
+        self.flush()
+        with self._lock:
+            return self._conn.execute("SELECT pod_id, part_id FROM snapshots").fetchall()
+
+    def delete(self, pod_id: str, part_id: str):
+        """Queue removing an instance's snapshot and events"""
+        self._writes.put((self._delete_instance, (pod_id, part_id)))
+
+    def stats(self) -> Dict:
+        return {"queued_writes": self._writes.qsize(), "write_errors": self.write_errors}
+
+    def close(self):
+        """Commit queued writes, then release the database and its ownership lock"""
+        self._writes.put(None)
+        self._writer.join()
+        with self._lock:
+            self._conn.close()
+        self._owner.close()
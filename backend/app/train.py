@@ -0,0 +1,46 @@
+# backend/app/train.py
+
+import argparse
+
+from .config.settings import settings
+from .services.ml_service import ManufacturingMLService
+from .services.model_registry import ModelRegistry
+
+def main():
+    """Train the quality model offline and register it as a new model version."""
+    parser = argparse.ArgumentParser(description="Train and persist Liberty OS ML models")
+    parser.add_argument("--model-dir", default=settings.model_dir)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=settings.model_seed)
+    parser.add_argument(
+        "--activate",
+        action="store_true",
+        help="make the new version active (always done when no version is active yet)"
+    )
+    parser.add_argument(
+        "--lookup-table",
+        action="store_true",
+        help="precompute the quality lookup table so serving workers only memory-map it (see QUALITY_LUT)"
+    )
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.model_dir)
+    version = registry.create_version()
+    service = ManufacturingMLService(registry.store(version))
+    service.train_models(n_samples=args.samples, seed=args.seed)
+    metadata = service.save_models()
+    if args.lookup_table:
+        service.load_lookup_table()
+        attempts = service.lookup_stats["attempts"]
+        status = "saved" if service.lookup_stats["enabled"] else "not within the error bound, not saved"
+        print(f"Quality lookup table: {attempts[-1]['points']} points per axis, {status}")
+
+    if args.activate or registry.active_version() is None:
+        registry.activate(version)
+        status = "active"
+    else:
+        status = "inactive; activate it with POST /models/{version}/activate"
+    print(f"Saved model {version} to {args.model_dir} ({metadata['content_hash'][:12]}, {status})")
+
+if __name__ == "__main__":
+    main()
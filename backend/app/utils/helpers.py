@@ -5,6 +5,8 @@ def to_python_type(obj: Any) -> Any:
     """Convert numpy types to Python native types"""
     if isinstance(obj, np.generic):
         return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
     if isinstance(obj, dict):
         return {k: to_python_type(v) for k, v in obj.items()}
     if isinstance(obj, (list, tuple)):
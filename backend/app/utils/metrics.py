@@ -0,0 +1,293 @@
+import asyncio
+import contextlib
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; spans cached lookups (sub-millisecond) up to batch sweeps
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set(self, value: float):
+        self.value = value
+
+class MetricFamily:
+    """A named metric with one child per distinct label-value tuple"""
+
+    def __init__(self, name: str, documentation: str, kind: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = _Histogram(self.buckets) if self.kind == "histogram" else _Value()
+                    self._children[values] = child
+        return child
+
+    def observe(self, value: float, *label_values: str):
+        self.labels(*label_values).observe(value)
+
+    def inc(self, amount: float = 1.0, *label_values: str):
+        self.labels(*label_values).inc(amount)
+
+    def set(self, value: float, *label_values: str):
+        self.labels(*label_values).set(value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            if self.kind == "histogram":
+                counts, total = child.snapshot()
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.label_names, values, le)} {cumulative}")
+                labels = _format_labels(self.label_names, values)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+            else:
+                lines.append(f"{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value)}")
+        return lines
+
+class MetricsRegistry:
+    """Process-wide counters, gauges and histograms rendered in the Prometheus text format.
+
+    Recording is a dict lookup, a bisect and an uncontended lock, so
+    instrumentation can stay enabled in production. Services that already
+    keep their own counters are exported through ``register_stats`` and
+    read only when ``/metrics`` is scraped.
+    """
+
+    def __init__(self, namespace: str = "liberty"):
+        self.namespace = namespace
+        self._families: Dict[str, MetricFamily] = {}
+        self._stats: List[Tuple[str, Callable[[], Optional[Dict]], Tuple[str, ...]]] = []
+        self._lock = threading.Lock()
+
+    def _family(self, name: str, documentation: str, kind: str, labels: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS) -> MetricFamily:
+        full_name = f"{self.namespace}_{name}"
+        with self._lock:
+            family = self._families.get(full_name)
+            if family is None:
+                family = MetricFamily(full_name, documentation, kind, labels, buckets)
+                self._families[full_name] = family
+            elif family.kind != kind:
+                raise ValueError(f"{full_name} is already registered as a {family.kind}")
+        return family
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> MetricFamily:
+        return self._family(name, documentation, "counter", labels)
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> MetricFamily:
+        return self._family(name, documentation, "gauge", labels)
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> MetricFamily:
+        return self._family(name, documentation, "histogram", labels, buckets)
+
+    def register_stats(self, prefix: str, stats: Callable[[], Optional[Dict]], counters: Iterable[str] = ()):
+        """Export a service's ``stats()`` dict at scrape time.
+
+        Numeric and boolean values become gauges named ``<prefix>_<key>``,
+        nested dicts are flattened with underscores, and keys listed in
+        ``counters`` are exported as monotonic ``_total`` counters.
+        """
+        self._stats.append((prefix, stats, tuple(counters)))
+
+    def _render_stats(self) -> List[str]:
+        lines = []
+        for prefix, stats, counters in self._stats:
+            try:
+                values = stats()
+            except Exception:
+                continue  # A failing collector must not break the scrape
+            for key, value in _flatten(values or {}):
+                name = f"{self.namespace}_{prefix}_{key}"
+                if key in counters:
+                    lines += [f"# TYPE {name}_total counter", f"{name}_total {_format_value(value)}"]
+                else:
+                    lines += [f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+        return lines
+
+    def render(self) -> str:
+        lines = []
+        for family in list(self._families.values()):
+            lines += family.render()
+        lines += self._render_stats()
+        return "\n".join(lines) + "\n"
+
+def _flatten(values: Dict, prefix: str = "") -> Iterable[Tuple[str, float]]:
+    for key, value in values.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{name}_")
+        elif isinstance(value, (bool, int, float)) and not (isinstance(value, float) and math.isnan(value)):
+            yield name, value
+
+metrics = MetricsRegistry()
+
+SERVICE_LATENCY = metrics.histogram(
+    "service_call_seconds", "Latency of instrumented service methods", ("method",)
+)
+
+def timed(name: str) -> Callable:
+    """Record each call's wall time in ``liberty_service_call_seconds{method=name}``"""
+    def decorator(fn: Callable) -> Callable:
+        histogram = SERVICE_LATENCY.labels(name)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+@contextlib.contextmanager
+def timer(name: str):
+    """Context-manager form of ``timed`` for a block inside a function"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        SERVICE_LATENCY.observe(time.perf_counter() - start, name)
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status codes and in-flight requests.
+
+    Requests are labelled with the matched route template (``/history/{series}``)
+    rather than the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.latency = registry.histogram(
+            "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+        )
+        self.in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being handled").labels()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.in_flight.dec()
+            route = scope.get("route")
+            self.latency.observe(
+                time.perf_counter() - start,
+                scope["method"], getattr(route, "path", "unmatched"), str(status)
+            )
+
+class EventLoopLagMonitor:
+    """Measures how late the event loop wakes a sleeping task.
+
+    Lag is the time a ready callback waited behind whatever was running on the
+    loop, which is what every concurrent request on this worker also waits.
+    """
+
+    def __init__(self, interval: float = 0.25, registry: MetricsRegistry = metrics):
+        self.interval = interval
+        self.lag = registry.histogram(
+            "event_loop_lag_seconds", "Delay between a scheduled and actual event loop wake-up"
+        ).labels()
+        self.max_lag = registry.gauge("event_loop_lag_max_seconds", "Largest event loop lag since start").labels()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - scheduled)
+            self.lag.observe(lag)
+            if lag > self.max_lag.value:
+                self.max_lag.set(lag)
@@ -0,0 +1,117 @@
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, List, Optional, Tuple
+
+Stack = Tuple[CodeType, ...]
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+class SamplingProfiler:
+    """Time-boxed statistical profiler for the threads of a live worker.
+
+    A background thread snapshots every other thread's stack with
+    ``sys._current_frames()`` at a fixed interval. Nothing is hooked into
+    the interpreter, so the profiled code runs at full speed; the cost is
+    one stack walk per thread per sample, and only while a profile runs.
+    """
+
+    def __init__(self, max_duration: float = 60.0, max_depth: int = 128):
+        self.max_duration = max_duration
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+
+    def _stack(self, frame: Optional[FrameType]) -> Stack:
+        codes = []
+        while frame is not None and len(codes) < self.max_depth:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        codes.reverse()  # Root first
+        return tuple(codes)
+
+    def sample(self, duration: float, interval: float) -> Dict:
+        """Sample all threads for ``duration`` seconds, blocking the caller"""
+        if not 0 < duration <= self.max_duration:
+            raise ValueError(f"Duration must be between 0 and {self.max_duration} seconds")
+        if interval <= 0:
+            raise ValueError("Interval must be positive")
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+
+        try:
+            samples: Dict[int, Counter] = {}
+            names: Dict[int, str] = {}
+            own = threading.get_ident()
+            count = 0
+            started = time.perf_counter()
+            deadline = started + duration
+            next_sample = started
+            while next_sample < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id != own:
+                        samples.setdefault(thread_id, Counter())[self._stack(frame)] += 1
+                count += 1
+                next_sample += interval
+                time.sleep(max(0.0, next_sample - time.perf_counter()))
+            elapsed = time.perf_counter() - started
+
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            return {
+                "duration": elapsed,
+                "interval": interval,
+                "samples": count,
+                "threads": {
+                    names.get(thread_id, f"thread-{thread_id}"): stacks for thread_id, stacks in samples.items()
+                }
+            }
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _frame_name(code: CodeType) -> str:
+        return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+    def to_collapsed(self, profile: Dict) -> str:
+        """Brendan Gregg's folded format, one ``thread;root;...;leaf count`` line per distinct stack"""
+        lines = []
+        for thread, stacks in profile["threads"].items():
+            for stack, count in stacks.most_common():
+                frames = ";".join(self._frame_name(code).replace(";", ":") for code in stack)
+                lines.append(f"{thread};{frames} {count}" if frames else f"{thread} {count}")
+        return "\n".join(lines) + "\n"
+
+    def to_speedscope(self, profile: Dict, name: str = "Liberty OS") -> Dict:
+        """speedscope.app file with one sampled profile per thread"""
+        frames: List[Dict] = []
+        index: Dict[CodeType, int] = {}
+        profiles = []
+        for thread, stacks in profile["threads"].items():
+            thread_samples, weights = [], []
+            for stack, count in stacks.most_common():
+                for code in stack:
+                    if code not in index:
+                        index[code] = len(frames)
+                        frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+                thread_samples.append([index[code] for code in stack])
+                weights.append(count * profile["interval"])
+            profiles.append({
+                "type": "sampled",
+                "name": thread,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": profile["duration"],
+                "samples": thread_samples,
+                "weights": weights
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "liberty-os",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles
+        }
@@ -0,0 +1,77 @@
+from typing import Any, Optional
+
+import numpy as np
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .helpers import to_python_type
+from .metrics import timer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+def _default(obj: Any) -> Any:
+    """Fallback for values orjson cannot encode natively"""
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind in "biuf" and obj.dtype != np.float16:
+            # Views, slices and memmaps become a plain C-contiguous array orjson can encode
+            return np.ascontiguousarray(obj).view(np.ndarray)
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps_json(content: Any) -> bytes:
+    """Encode content as JSON, serializing NumPy scalars and arrays natively when orjson is available"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    import json
+    return json.dumps(to_python_type(content), separators=(",", ":")).encode("utf-8")
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Type is not MessagePack serializable: {type(obj).__name__}")
+
+def dumps_msgpack(content: Any) -> bytes:
+    return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+class NumpyJSONResponse(Response):
+    """JSON response that encodes NumPy values directly instead of converting them value by value"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return dumps_msgpack(content)
+
+def wants_msgpack(request: Optional[Request]) -> bool:
+    if request is None or msgpack is None:
+        return False
+    accept = request.headers.get("accept", "")
+    return any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+def negotiated_response(request: Optional[Request], content: Any, status_code: int = 200) -> Response:
+    """Return MessagePack when the client accepts it, NumPy-aware JSON otherwise"""
+    headers = {"Vary": "Accept"}
+    if wants_msgpack(request):
+        with timer("response.render.msgpack"):
+            return MsgPackResponse(content=content, status_code=status_code, headers=headers)
+    with timer("response.render.json"):
+        return NumpyJSONResponse(content=content, status_code=status_code, headers=headers)
@@ -0,0 +1,82 @@
+# backend/benchmarks/common.py
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+def isolate_environment():
+    """Run against in-memory state so results do not depend on what is on disk.
+
+    Must be called before the app is imported; explicitly set variables win.
+    """
+    os.environ.setdefault("WORKFLOW_DB_PATH", "")
+    os.environ.setdefault("TIMESERIES_DIR", "")
+
+def latency_summary(samples_ms: List[float], elapsed_s: Optional[float] = None) -> Dict:
+    """Percentiles and throughput for a list of per-call latencies"""
+    values = np.asarray(samples_ms, dtype=np.float64)
+    if not len(values):
+        return {"n": 0}
+    summary = {
+        "n": int(len(values)),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max())
+    }
+    total_s = elapsed_s if elapsed_s is not None else values.sum() / 1000
+    summary["throughput_per_s"] = float(len(values) / total_s) if total_s > 0 else None
+    return summary
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment_info() -> Dict:
+    import sklearn
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+def write_baseline(path: str, kind: str, config: Dict, results: Dict[str, Dict]):
+    """Write results in the format read by benchmarks.compare"""
+    baseline = {
+        "kind": kind,
+        "meta": environment_info(),
+        "config": config,
+        "benchmarks": results
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+def print_table(results: Dict[str, Dict]):
+    print(f"{'benchmark':<52} {'n':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per s':>10}")
+    for name, summary in results.items():
+        if not summary.get("n"):
+            print(f"{name:<52} {0:>7}")
+            continue
+        throughput = summary.get("throughput_per_s") or 0.0
+        print(
+            f"{name:<52} {summary['n']:>7} {summary['p50_ms']:>9.3f} {summary['p95_ms']:>9.3f} "
+            f"{summary['p99_ms']:>9.3f} {throughput:>10.1f}"
+        )
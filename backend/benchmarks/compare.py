@@ -0,0 +1,83 @@
+# backend/benchmarks/compare.py
+"""Compare two benchmark result files written by benchmarks.micro or benchmarks.load.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 10
+
+Exits with status 1 when any benchmark's p50/p95/p99 regressed by more
+than the threshold percentage, so it can gate a CI job.
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+def _change(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    if before is None or after is None or before <= 0:
+        return None
+    return (after - before) / before * 100
+
+def compare(baseline: Dict, current: Dict, threshold: float, min_ms: float) -> List[Dict]:
+    """Per-benchmark percentage changes; latencies below min_ms on both sides are treated as noise"""
+    rows = []
+    names = sorted(set(baseline["benchmarks"]) | set(current["benchmarks"]))
+    for name in names:
+        before = baseline["benchmarks"].get(name)
+        after = current["benchmarks"].get(name)
+        row = {"name": name, "status": "ok", "changes": {}}
+        if before is None or after is None:
+            row["status"] = "added" if before is None else "removed"
+            rows.append(row)
+            continue
+
+        for metric in METRICS:
+            change = _change(before.get(metric), after.get(metric))
+            row["changes"][metric] = change
+            if change is None or max(before[metric], after[metric]) < min_ms:
+                continue
+            if change > threshold:
+                row["status"] = "regressed"
+            elif change < -threshold and row["status"] == "ok":
+                row["status"] = "improved"
+        if after.get("errors", 0) > before.get("errors", 0):
+            row["status"] = "regressed"
+        rows.append(row)
+    return rows
+
+def _format(change: Optional[float]) -> str:
+    return f"{change:+8.1f}%" if change is not None else f"{'-':>9}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare benchmark results between commits")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    parser.add_argument("--min-ms", type=float, default=0.05, help="ignore changes where both latencies are below this")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline.get("kind") != current.get("kind"):
+        sys.exit(f"Cannot compare {baseline.get('kind')} results with {current.get('kind')} results")
+
+    print(f"baseline {baseline['meta'].get('commit')}  ->  current {current['meta'].get('commit')}")
+    print(f"{'benchmark':<52} {'p50':>9} {'p95':>9} {'p99':>9}  status")
+    rows = compare(baseline, current, args.threshold, args.min_ms)
+    for row in rows:
+        changes = row["changes"]
+        print(
+            f"{row['name']:<52} {_format(changes.get('p50_ms'))} {_format(changes.get('p95_ms'))} "
+            f"{_format(changes.get('p99_ms'))}  {row['status']}"
+        )
+
+    regressions = [row["name"] for row in rows if row["status"] == "regressed"]
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold}%")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
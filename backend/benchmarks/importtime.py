@@ -0,0 +1,81 @@
+# backend/benchmarks/importtime.py
+"""Import-time budget for the API worker, measured with ``python -X importtime``.
+
+Each run imports the app in a fresh interpreter, like a new uvicorn worker
+or container does before it can serve. The check fails when the median
+cumulative import time exceeds the budget or when a module that should
+load lazily (scikit-learn, SciPy, joblib, pandas) is imported at startup.
+Run from backend/:
+
+    python -m benchmarks.importtime --budget-ms 1200
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from .common import latency_summary, write_baseline
+
+# Top-level packages only the warm-up, model workers and trainers may pull in
+LAZY_MODULES = ("sklearn", "scipy", "joblib", "pandas")
+
+def measure(module: str) -> Dict[str, Tuple[int, int]]:
+    """Import module in a fresh interpreter; returns {module: (self_us, cumulative_us)}"""
+    env = {**os.environ, "WORKFLOW_DB_PATH": "", "TIMESERIES_DIR": "", "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the API's import time against a budget")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1200.0, help="maximum median cumulative import time")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--output", default="", help="also write a baseline readable by benchmarks.compare")
+    args = parser.parse_args()
+
+    # The first run warms the bytecode and filesystem caches and is discarded
+    measure(args.module)
+    runs = [measure(args.module) for _ in range(args.runs)]
+    totals_ms: List[float] = [run[args.module][1] / 1000 for run in runs]
+    median_ms = statistics.median(totals_ms)
+
+    last = runs[-1]
+    print(f"{'module':<60} {'self ms':>9} {'cumulative ms':>14}")
+    for name, (self_us, cumulative_us) in sorted(last.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"{name:<60} {self_us / 1000:>9.1f} {cumulative_us / 1000:>14.1f}")
+    print(f"{args.module}: median {median_ms:.0f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+
+    failures = []
+    eager = sorted({name for name in last if name.split(".")[0] in LAZY_MODULES})
+    if eager:
+        roots = sorted({name.split(".")[0] for name in eager})
+        failures.append(f"imported at startup but should load lazily: {', '.join(roots)}")
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+
+    if args.output:
+        write_baseline(args.output, "importtime", vars(args), {f"import.{args.module}": latency_summary(totals_ms)})
+        print(f"Wrote {args.output}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+# backend/benchmarks/load.py
+"""In-process ASGI load generator replaying the frontend's request mix.
+
+Each simulated client behaves like one open dashboard:
+
+* App.js posts /simulate/machining every polling interval
+* App.js and WorkflowTracker each hold a /workflow/stream server-sent event
+  subscription open for the whole session
+* OptimizationPanel and ParameterAnalysis post /optimize/parameters/{stage} and
+  /analyze/parameters whenever the operator changes a parameter
+* operators occasionally report progress with PUT /workflow/stage/progress
+
+Streams are reported as the time to their first (snapshot) event and as
+the delay from sending a progress update to each subscriber receiving it.
+Requests are sent straight to the ASGI app, so the numbers measure the
+application and not a network stack. Run from backend/:
+
+    python -m benchmarks.load --clients 50 --duration 20 --output benchmarks/results/load.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+
+from .common import isolate_environment, latency_summary, print_table, write_baseline
+
+isolate_environment()
+
+from app.config.settings import settings  # noqa: E402
+from app.main import app  # noqa: E402
+
+STAGES = ("Material Setup", "Initial Machining", "Quality Verification", "Process Completion")
+
+class ASGIClient:
+    """Minimal HTTP/1.1 client that calls an ASGI app directly"""
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _scope(method: str, path: str, headers: Iterable[Tuple[str, str]]) -> Dict:
+        raw_path, _, query = path.partition("?")
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": raw_path,
+            "raw_path": raw_path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"benchmark"), (b"content-type", b"application/json")]
+            + [(name.lower().encode(), value.encode()) for name, value in headers],
+            "client": ("127.0.0.1", 0),
+            "server": ("benchmark", 80)
+        }
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Dict] = None,
+        headers: Iterable[Tuple[str, str]] = ()
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        payload = json.dumps(body).encode() if body is not None else b""
+        scope = self._scope(method, path, headers)
+        done = asyncio.Event()
+        sent_body = False
+        status = 0
+        response_headers: Dict[str, str] = {}
+        chunks: List[bytes] = []
+
+        async def receive():
+            nonlocal sent_body
+            if not sent_body:
+                sent_body = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers.update((k.decode(), v.decode()) for k, v in message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    done.set()
+
+        await self.app(scope, receive, send)
+        done.set()
+        return status, response_headers, b"".join(chunks)
+
+    async def stream(
+        self,
+        path: str,
+        on_event: Callable[[str, str], None],
+        stop: asyncio.Event,
+        headers: Iterable[Tuple[str, str]] = ()
+    ) -> int:
+        """GET a server-sent event stream, calling on_event(type, data) per event until stop is set"""
+        scope = self._scope("GET", path, headers)
+        sent_request = False
+        status = 0
+        buffer = ""
+
+        async def receive():
+            nonlocal sent_request
+            if not sent_request:
+                sent_request = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await stop.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status, buffer
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                buffer += message.get("body", b"").decode()
+                *events, buffer = buffer.split("\n\n")
+                for event in events:
+                    fields = dict(line.split(": ", 1) for line in event.splitlines() if not line.startswith(":"))
+                    if "data" in fields:
+                        on_event(fields.get("event", "message"), fields["data"])
+
+        await self.app(scope, receive, send)
+        return status
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: ASGIClient, name: str, method: str, path: str, **kwargs) -> Tuple[int, Dict[str, str], bytes]:
+        start = time.perf_counter()
+        try:
+            status, headers, body = await client.request(method, path, **kwargs)
+        except Exception:
+            self.errors[name] += 1
+            return 0, {}, b""
+        self.latencies[name].append((time.perf_counter() - start) * 1000)
+        self.statuses[name][status] += 1
+        if status >= 500:
+            self.errors[name] += 1
+        return status, headers, body
+
+    async def subscribe(self, client: ASGIClient, sent_at: Dict[float, float], stop: asyncio.Event):
+        """Hold one workflow stream open, timing the snapshot and every progress delta it carries"""
+        start = time.perf_counter()
+        connected = False
+
+        def on_event(event_type: str, data: str):
+            nonlocal connected
+            now = time.perf_counter()
+            if not connected:
+                connected = True
+                self.latencies["SSE /workflow/stream (first event)"].append((now - start) * 1000)
+            if event_type != "progress":
+                return
+            # Progress updates carry a unique temperature, which identifies when they were sent
+            temperature = (json.loads(data)["changes"].get("metrics") or {}).get("temperature")
+            if temperature in sent_at:
+                self.latencies["SSE progress delivery"].append((now - sent_at[temperature]) * 1000)
+
+        name = "SSE /workflow/stream (first event)"
+        try:
+            status = await client.stream("/workflow/stream", on_event, stop)
+        except Exception:
+            self.errors[name] += 1
+            return
+        self.statuses[name][status] += 1
+        if status != 200:
+            self.errors[name] += 1
+
+async def simulated_client(
+    client: ASGIClient,
+    recorder: Recorder,
+    rng: random.Random,
+    interval: float,
+    deadline: float,
+    param_change_rate: float,
+    progress_rate: float,
+    sent_at: Dict[float, float]
+):
+    parameters = {"cutting_speed": 100.0, "feed_rate": 0.2, "depth_of_cut": 2.0, "tool_type": "carbide"}
+    stage = STAGES[1]
+
+    async def on_parameter_change():
+        await asyncio.gather(
+            recorder.call(client, "POST /optimize/parameters/{stage}", "POST", f"/optimize/parameters/{quote(stage)}", body=parameters),
+            recorder.call(client, "POST /analyze/parameters", "POST", "/analyze/parameters", body=parameters)
+        )
+
+    # Stagger start-up so clients do not tick in lockstep
+    await asyncio.sleep(rng.uniform(0, interval))
+    await on_parameter_change()
+    while time.perf_counter() < deadline:
+        tick = time.perf_counter()
+        await recorder.call(client, "POST /simulate/machining", "POST", "/simulate/machining", body=parameters)
+
+        if rng.random() < param_change_rate:
+            parameters = {
+                **parameters,
+                "cutting_speed": round(rng.uniform(60, 180), 1),
+                "feed_rate": round(rng.uniform(0.1, 0.45), 2),
+                "depth_of_cut": round(rng.uniform(0.5, 4.5), 1)
+            }
+            stage = rng.choice(STAGES)
+            await on_parameter_change()
+
+        if rng.random() < progress_rate:
+            temperature = rng.uniform(19, 24)
+            sent_at[temperature] = time.perf_counter()
+            await recorder.call(
+                client, "PUT /workflow/stage/progress", "PUT", "/workflow/stage/progress",
+                body={"progress": rng.uniform(0, 95), "metrics": {"temperature": temperature}}
+            )
+
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - tick)))
+
+async def run_load(args) -> Tuple[Dict[str, Dict], float]:
+    client = ASGIClient(app)
+    recorder = Recorder()
+    sent_at: Dict[float, float] = {}
+    stop = asyncio.Event()
+    async with app.router.lifespan_context(app):
+        start = time.perf_counter()
+        deadline = start + args.duration
+        interval = args.interval * args.time_scale
+        streams = [
+            asyncio.ensure_future(recorder.subscribe(client, sent_at, stop))
+            for _ in range(args.clients * args.streams_per_client)
+        ]
+        await asyncio.gather(*[
+            simulated_client(
+                client, recorder, random.Random(args.seed + i), interval, deadline,
+                args.param_change_rate, args.progress_rate, sent_at
+            )
+            for i in range(args.clients)
+        ])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*streams)
+
+    results = {
+        f"load.{name}": {
+            **latency_summary(samples, elapsed),
+            "errors": recorder.errors[name],
+            "statuses": {str(code): count for code, count in sorted(recorder.statuses[name].items())}
+        }
+        for name, samples in sorted(recorder.latencies.items())
+    }
+    # Stream timings are deliveries, not requests, and stay out of the request totals
+    requests = [name for name in recorder.latencies if not name.startswith("SSE ")]
+    all_samples = [sample for name in requests for sample in recorder.latencies[name]]
+    results["load.all"] = {**latency_summary(all_samples, elapsed), "errors": sum(recorder.errors[name] for name in requests)}
+    return results, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the frontend request mix against the app in-process")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load")
+    parser.add_argument("--interval", type=float, default=5.0, help="frontend polling interval in seconds")
+    parser.add_argument(
+        "--time-scale", type=float, default=0.02,
+        help="multiplier on the polling interval; 0.02 turns 5 s into 100 ms, 0 runs closed-loop"
+    )
+    parser.add_argument("--param-change-rate", type=float, default=0.1, help="chance per tick of a parameter change")
+    parser.add_argument("--progress-rate", type=float, default=0.05, help="chance per tick of a progress update")
+    parser.add_argument("--streams-per-client", type=int, default=2, help="open /workflow/stream subscriptions per client")
+    parser.add_argument("--seed", type=int, default=settings.model_seed)
+    parser.add_argument("--output", default="benchmarks/results/load.json")
+    args = parser.parse_args()
+
+    np.random.seed(args.seed)
+    results, elapsed = asyncio.run(run_load(args))
+    print_table(results)
+    print(f"{results['load.all']['n']} requests in {elapsed:.1f} s, {results['load.all']['errors']} errors")
+    stream_errors = sum(result["errors"] for name, result in results.items() if name.startswith("load.SSE "))
+    if stream_errors:
+        print(f"{stream_errors} workflow streams failed")
+    write_baseline(args.output, "load", vars(args), results)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
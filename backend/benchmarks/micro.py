@@ -0,0 +1,146 @@
+# backend/benchmarks/micro.py
+"""Micro-benchmarks for EnhancedManufacturingMLService and WorkflowService methods.
+
+Run from backend/:
+
+    python -m benchmarks.micro --output benchmarks/results/micro.json
+"""
+
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from .common import isolate_environment, latency_summary, print_table, write_baseline
+
+isolate_environment()
+
+from app.config.settings import settings  # noqa: E402
+from app.services.enhanced_ml_service import EnhancedManufacturingMLService  # noqa: E402
+from app.services.prediction_cache import PredictionCache  # noqa: E402
+from app.services.simulation_service import MachiningSimulationService  # noqa: E402
+from app.models.workflow import StageStatus  # noqa: E402
+from app.services.workflow_service import WorkflowService  # noqa: E402
+
+BASE_PARAMETERS = {"cutting_speed": 100.0, "feed_rate": 0.2, "depth_of_cut": 2.0, "tool_type": "carbide"}
+
+def run_benchmark(fn: Callable[[int], None], iterations: int, warmup: int) -> Dict:
+    """Call fn(i) warmup + iterations times, timing each measured call"""
+    for i in range(warmup):
+        fn(i)
+    samples: List[float] = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return latency_summary(samples)
+
+def _varied(i: int) -> Dict:
+    """Distinct parameters per call so cached methods are measured on misses"""
+    return {**BASE_PARAMETERS, "cutting_speed": 60.0 + (i % 1400) * 0.1, "feed_rate": 0.1 + (i // 1400 % 40) * 0.01}
+
+def _columns(n: int) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(settings.model_seed)
+    return {
+        "cutting_speed": rng.uniform(50, 200, n),
+        "feed_rate": rng.uniform(0.1, 0.5, n),
+        "depth_of_cut": rng.uniform(0.5, 5.0, n),
+        "tool_type": "carbide"
+    }
+
+def ml_benchmarks(batch_size: int, sweep_steps: int) -> Tuple[Dict[str, Callable[[int], None]], Dict[str, Callable[[int], None]]]:
+    """Per-request methods and the heavier columnar/sweep methods, which run fewer iterations"""
+    service = EnhancedManufacturingMLService(cache=PredictionCache(max_size=100_000, ttl_seconds=3600))
+    service.initialize_models()
+    simulation = MachiningSimulationService(service)
+    columns = _columns(batch_size)
+    axes = {
+        "cutting_speed": np.linspace(50, 200, sweep_steps),
+        "feed_rate": np.linspace(0.1, 0.5, sweep_steps),
+        "depth_of_cut": np.linspace(0.5, 5.0, sweep_steps)
+    }
+    light = {
+        "ml.predict_quality": lambda i: service.predict_quality(_varied(i)),
+        "ml.predict_quality[cached]": lambda i: service.predict_quality(BASE_PARAMETERS),
+        "ml.predict_maintenance": lambda i: service.predict_maintenance(_varied(i)),
+        "ml.detect_anomalies": lambda i: service.detect_anomalies(_varied(i)),
+        "ml.optimize_parameters": lambda i: service.optimize_parameters(_varied(i)),
+        "ml.get_parameter_optimization": lambda i: service.get_parameter_optimization(_varied(i), "Initial Machining"),
+        "ml.analyze_parameter_relationships": lambda i: service.analyze_parameter_relationships(_varied(i))
+    }
+    heavy = {
+        f"ml.predict_quality_batch[{batch_size}]": lambda i: service.predict_quality_batch(columns),
+        f"ml.predict_maintenance_batch[{batch_size}]": lambda i: service.predict_maintenance_batch(columns),
+        f"ml.detect_anomalies_batch[{batch_size}]": lambda i: service.detect_anomalies_batch(columns),
+        f"ml.optimize_parameters_batch[{batch_size}]": lambda i: service.optimize_parameters_batch(columns),
+        f"ml.sweep_parameter_relationships[{sweep_steps}^3]": lambda i: service.sweep_parameter_relationships(axes),
+        f"simulation.monte_carlo[{batch_size}]": lambda i: simulation.monte_carlo(BASE_PARAMETERS, batch_size, seed=i)
+    }
+    return light, heavy
+
+def workflow_benchmarks() -> Dict[str, Callable[[int], None]]:
+    service = WorkflowService(part_id="benchmark")
+    stage = service.get_current_stage()
+    gate = stage.quality_gates[0]
+    # Out of tolerance, so the gate fails and stays open for the next update
+    failing = {
+        measurement_type.value: {"value": 2.0, "nominal": 1.0, "upper_tolerance": 0.1, "lower_tolerance": -0.1}
+        for measurement_type in gate.required_measurements
+    }
+    metrics = {"temperature": 21.0, "spindle_speed": 1200.0, "feed_rate": 0.2}
+    # A separate instance whose approval stage has passed every gate, so each approval
+    # succeeds and publishes a change without closing the gate benchmarked above
+    approvals = WorkflowService(part_id="benchmark-approvals")
+    approvable = next(s for s in approvals.get_all_stages() if s.requires_approval)
+    for approvable_gate in approvable.quality_gates:
+        approvable_gate.status = StageStatus.COMPLETED
+        approvable_gate.documentation_url = "benchmark"
+
+    return {
+        "workflow.get_current_stage": lambda i: service.get_current_stage(),
+        "workflow.get_all_stages": lambda i: service.get_all_stages(),
+        "workflow.get_stage": lambda i: service.get_stage(stage.id),
+        "workflow.update_stage_progress": lambda i: service.update_stage_progress(i % 99, metrics),
+        "workflow.update_quality_gate": lambda i: service.update_quality_gate(
+            stage.id, gate.name, {k: {**v, "value": 2.0 + (i % 2) * 0.01} for k, v in failing.items()}
+        ),
+        "workflow.approve_stage": lambda i: approvals.approve_stage(approvable.id, f"approver-{i}"),
+        "workflow.get_serialized_stages": lambda i: service.get_serialized_stages(),
+        "workflow.get_serialized_stages[invalidated]": lambda i: (
+            service.update_stage_progress(i % 99), service.get_serialized_stages()
+        ),
+        "workflow.get_serialized_current_stage": lambda i: service.get_serialized_current_stage(),
+        "workflow.get_snapshot": lambda i: service.get_snapshot(),
+        "workflow.get_changes_since": lambda i: service.get_changes_since(max(0, service.version - 10))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark service methods")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--sweep-steps", type=int, default=50)
+    parser.add_argument("--heavy-iterations", type=int, default=20, help="iterations for batch and sweep methods")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--output", default="benchmarks/results/micro.json")
+    args = parser.parse_args()
+
+    random.seed(settings.model_seed)
+    np.random.seed(settings.model_seed)
+
+    light, heavy = ml_benchmarks(args.batch_size, args.sweep_steps)
+    light.update(workflow_benchmarks())
+    results = {}
+    for benchmarks, iterations in ((light, args.iterations), (heavy, args.heavy_iterations)):
+        for name, fn in benchmarks.items():
+            if args.filter in name:
+                results[name] = run_benchmark(fn, iterations, min(args.warmup, iterations))
+
+    print_table(results)
+    write_baseline(args.output, "micro", vars(args), results)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
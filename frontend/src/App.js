@@ -12,6 +12,7 @@ import WorkflowTracker from './components/workflow/WorkflowTracker';
 import OptimizationPanel from './components/OptimizationPanel';
 import ParameterAnalysis from './components/ParameterAnalysis';
 import DigitalTwin from './components/digital-twin/DigitalTwin';
+import { subscribeToWorkflow } from './services/workflowStream';
 
 function App() {
   const [processData, setProcessData] = useState(null);
@@ -51,19 +52,14 @@ function App() {
   }, [simulateMachining]);
 
   useEffect(() => {
-    const fetchCurrentStage = async () => {
-      try {
-        const response = await fetch('http://127.0.0.1:8000/workflow/current');
-        const data = await response.json();
-        setCurrentStage(data.name);
-      } catch (error) {
-        console.error('Error fetching current stage:', error);
-      }
-    };
-
-    fetchCurrentStage();
-    const interval = setInterval(fetchCurrentStage, 5000);
-    return () => clearInterval(interval);
+    const unsubscribe = subscribeToWorkflow(
+      (stages) => {
+        const current = stages.find(stage => stage.status === 'in_progress');
+        if (current) setCurrentStage(current.name);
+      },
+      (error) => console.error('Error streaming current stage:', error)
+    );
+    return unsubscribe;
   }, []);
 
   if (!processData) return (
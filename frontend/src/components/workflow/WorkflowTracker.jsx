@@ -5,6 +5,7 @@ import WorkflowStage from './WorkflowStage';
 import MeasurementModal from './MeasurementModal';
 import DocumentUpload from './DocumentUpload';
 import ApprovalDialog from './ApprovalDialog';
+import { subscribeToWorkflow } from '../../services/workflowStream';
 
 const WorkflowTracker = () => {
   const [stages, setStages] = useState([]);
@@ -27,23 +28,20 @@ const WorkflowTracker = () => {
   const [error, setError] = useState(null);
 
   useEffect(() => {
-    const fetchStages = async () => {
-      try {
-        const response = await fetch('http://127.0.0.1:8000/workflow/stages');
-        const data = await response.json();
+    const unsubscribe = subscribeToWorkflow(
+      (data) => {
         setStages(data);
-        
+        setError(null);
+
         const currentIndex = data.findIndex(stage => stage.status === 'in_progress');
         setCurrentStageIndex(currentIndex >= 0 ? currentIndex : 0);
-      } catch (error) {
-        console.error('Error fetching workflow stages:', error);
-        setError('Failed to fetch workflow stages');
+      },
+      (error) => {
+        console.error('Error streaming workflow stages:', error);
+        setError('Lost connection to workflow updates, reconnecting...');
       }
-    };
-
-    fetchStages();
-    const interval = setInterval(fetchStages, 5000);
-    return () => clearInterval(interval);
+    );
+    return unsubscribe;
   }, []);
 
   const handleProgressUpdate = async () => {
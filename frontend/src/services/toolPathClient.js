@@ -0,0 +1,23 @@
+// src/services/toolPathClient.js
+
+const TOOL_PATH_URL = 'http://127.0.0.1:8000/toolpath';
+
+// Fetch server-generated tool paths as Float32Array xyz buffers, ready for a BufferAttribute.
+// lod 0 is full detail; each step halves the points per turn/layer (max 3).
+export const fetchToolPath = async (parameters, lod = 0) => {
+  const response = await fetch(`${TOOL_PATH_URL}?lod=${lod}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(parameters),
+  });
+  if (!response.ok) {
+    throw new Error(`Tool path request failed: ${response.status}`);
+  }
+
+  const buffer = await response.arrayBuffer();
+  const roughingPoints = Number(response.headers.get('X-Roughing-Points'));
+  return {
+    roughing: new Float32Array(buffer, 0, roughingPoints * 3),
+    finishing: new Float32Array(buffer, roughingPoints * 3 * 4),
+  };
+};
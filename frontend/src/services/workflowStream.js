@@ -0,0 +1,43 @@
+// src/services/workflowStream.js
+
+const STREAM_URL = 'http://127.0.0.1:8000/workflow/stream';
+const CHANGE_EVENTS = ['progress', 'gate_updated', 'stage_completed', 'stage_started', 'stage_approved'];
+
+// Apply a single delta from the server to the local list of stages
+const applyChange = (stages, change) =>
+  stages.map(stage => {
+    if (stage.id !== change.stage_id) return stage;
+
+    const updated = { ...stage, ...change.changes };
+    if (change.gate) {
+      updated.quality_gates = stage.quality_gates.map(gate =>
+        gate.name === change.gate.name ? change.gate : gate
+      );
+    }
+    return updated;
+  });
+
+// Subscribe to workflow changes; onStages is called with the full stage list after every change.
+// EventSource reconnects on its own and resumes from the last event id it received.
+export const subscribeToWorkflow = (onStages, onError) => {
+  let stages = [];
+  const source = new EventSource(STREAM_URL);
+
+  source.addEventListener('snapshot', (event) => {
+    stages = JSON.parse(event.data).stages;
+    onStages(stages);
+  });
+
+  CHANGE_EVENTS.forEach(type =>
+    source.addEventListener(type, (event) => {
+      stages = applyChange(stages, JSON.parse(event.data));
+      onStages(stages);
+    })
+  );
+
+  source.onerror = (error) => {
+    if (onError) onError(error);
+  };
+
+  return () => source.close();
+};